@@ -0,0 +1,367 @@
+"""Offline benchmark for the travel workflow.
+
+Runs the pipeline against a deterministic stub model (no OpenAI calls) over
+synthetic catalogs, so changes to our own code can be measured apart from
+model latency. Two passes per catalog size:
+
+    stages      each workflow step on its own: wall time, CPU time, peak
+                traced memory and the size of the prompt it builds
+    end-to-end  concurrent run_travel_workflow_async calls: throughput,
+                latency percentiles and CPU per request, with the stub
+                sleeping --latency-ms per model call
+
+Catalogs are built from SAMPLE_CHALLENGES and assets/challenge_seed_data.json;
+the smallest size (17) is SAMPLE_CHALLENGES as-is.
+
+Usage:
+    python benchmark.py                               # 17 … 100000 challenges
+    python benchmark.py --sizes 17 1000 --requests 40 --concurrency 8
+    python benchmark.py --latency-ms 800 --engine local --json results.json
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from strands.models.model import Model
+
+import main
+from cache import TTLCache
+from catalog import ChallengeCatalog
+from geo import GeoPoint
+from invoke_agent import SAMPLE_CHALLENGES, TEST_SCENARIOS
+from preferences import extract_preferences
+
+SEED_DATA = Path(__file__).resolve().parents[3] / "assets" / "challenge_seed_data.json"
+DEFAULT_SIZES = (17, 100, 1_000, 10_000, 100_000)
+STAGE_REPEATS = 5
+JITTER_DEGREES = 0.01  # ~1 km around each template challenge
+ROW_ID_RE = re.compile(r"^(\S+) \| ", re.MULTILINE)
+
+
+# ── Stub model ───────────────────────────────────────────────
+
+class StubModel(Model):
+    """Replays canned Planner/Research/Guide replies after a fixed latency.
+
+    The Planner echoes the rule-based preferences for the user's message, the
+    Research agent picks the first `route_stops` shortlisted rows in order,
+    and the Guide returns a fixed response. Replies are streamed in
+    `chunk_chars` pieces, or sent as the structured-output tool call when
+    strands asks for one (structured_output() returns them validated), and
+    report token usage at ~4 chars per token.
+    """
+
+    GUIDE_REPLY = json.dumps({
+        "response": "Here's your route — the first stop is just a short walk away. "
+                    "Ready to start this route?",
+        "route": {},
+    })
+
+    def __init__(self, latency_ms: float = 0.0, route_stops: int = 4, chunk_chars: int = 16):
+        self.config = {"model_id": "stub", "latency_ms": latency_ms}
+        self.latency = latency_ms / 1000
+        self.route_stops = route_stops
+        self.chunk_chars = chunk_chars
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """The canned reply validated into `output_model` (the legacy strands path)."""
+        text = self.reply(system_prompt or "", self.user_text(prompt))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        yield {"output": output_model.model_validate_json(text)}
+
+    @staticmethod
+    def user_text(messages) -> str:
+        if not messages:
+            return ""
+        return "".join(block.get("text", "") for block in messages[-1]["content"])
+
+    def reply(self, system_prompt: str, user_text: str) -> str:
+        if "Planner" in system_prompt:
+            return json.dumps(extract_preferences(user_text)[0])
+        if "Research" in system_prompt:
+            ids = [i for i in ROW_ID_RE.findall(user_text) if i != "chlgID"][:self.route_stops]
+            return json.dumps({
+                "selected_challenges": [{"chlgID": i, "reason": "benchmark pick"} for i in ids],
+                "route_order": ids,
+            })
+        return self.GUIDE_REPLY
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        user_text = self.user_text(messages)
+        text = self.reply(system_prompt or "", user_text)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        yield {"messageStart": {"role": "assistant"}}
+        if tool_specs:
+            # Structured output: answer through the schema tool strands registered.
+            yield {"contentBlockStart": {"start": {"toolUse": {
+                "name": tool_specs[0]["name"], "toolUseId": f"stub-{id(text)}",
+            }}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": text}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            yield {"contentBlockStart": {"start": {}}}
+            for i in range(0, len(text), self.chunk_chars):
+                yield {"contentBlockDelta": {"delta": {"text": text[i:i + self.chunk_chars]}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+        prompt_chars = len(system_prompt or "") + len(user_text)
+        yield {"metadata": {
+            "usage": {"inputTokens": prompt_chars // 4, "outputTokens": len(text) // 4,
+                      "totalTokens": (prompt_chars + len(text)) // 4},
+            "metrics": {"latencyMs": int(self.latency * 1000)},
+        }}
+
+
+def install_stub_model(model: StubModel) -> None:
+    """Build every pooled agent on `model`; call before the first request."""
+    main.load_model = lambda: model
+
+
+# ── Synthetic catalogs ───────────────────────────────────────
+
+def seed_challenges(path: Path = SEED_DATA) -> list[dict]:
+    """assets/challenge_seed_data.json converted to the runtime challenge shape."""
+    try:
+        seeds = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return []
+    return [
+        {
+            "chlgID": f"seed_{s['id']}",
+            "title": s["title"],
+            "description": s.get("description", ""),
+            "type": s["type"],
+            "difficulty": s.get("difficulty", "medium"),
+            "expected_duration": "01:00:00",
+            "location": GeoPoint(s["latitude"], s["longitude"]).to_wire(),
+            "score": round(min(10.0, 6.0 + s.get("points", 0) / 50), 1),
+            "joined_people": [],
+        }
+        for s in seeds
+    ]
+
+
+def synthetic_catalog(size: int, seed: int = 0) -> list[dict]:
+    """`size` challenges jittered around the sample and seed challenges.
+
+    Deterministic for a given (size, seed); sizes up to len(SAMPLE_CHALLENGES)
+    are a prefix of SAMPLE_CHALLENGES.
+    """
+    if size <= len(SAMPLE_CHALLENGES):
+        return copy.deepcopy(SAMPLE_CHALLENGES[:size])
+    templates = SAMPLE_CHALLENGES + seed_challenges()
+    rng = random.Random(seed)
+    challenges = copy.deepcopy(SAMPLE_CHALLENGES)
+    for i in range(len(challenges), size):
+        template = templates[i % len(templates)]
+        point = GeoPoint.from_wire(template["location"])
+        challenges.append({
+            **template,
+            "chlgID": f"bench_{i:06d}",
+            "title": f"{template['title']} #{i}",
+            "location": GeoPoint(
+                point.lat + rng.uniform(-JITTER_DEGREES, JITTER_DEGREES),
+                point.lng + rng.uniform(-JITTER_DEGREES, JITTER_DEGREES),
+            ).to_wire(precision=4),
+            "score": round(min(10.0, max(0.0, float(template["score"]) + rng.uniform(-1, 1))), 1),
+            "joined_people": [f"usr_{rng.randrange(10_000)}" for _ in range(rng.randrange(5))],
+        })
+    return challenges
+
+
+# ── Per-stage measurements ───────────────────────────────────
+
+def measure(fn, repeats: int = STAGE_REPEATS) -> tuple[dict, object]:
+    """Median wall/CPU ms over `repeats` calls, plus peak traced memory of one call."""
+    wall, cpu = [], []
+    for _ in range(repeats):
+        started_wall, started_cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        wall.append((time.perf_counter() - started_wall) * 1000)
+        cpu.append((time.process_time() - started_cpu) * 1000)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "wall_ms": round(statistics.median(wall), 3),
+        "cpu_ms": round(statistics.median(cpu), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }, result
+
+
+def bench_stages(challenges: list[dict], message: str) -> dict[str, dict]:
+    """Each model-free workflow step against one catalog.
+
+    catalog/travel_model are measured on fresh catalogs (they are built once
+    per catalog version in production); later steps reuse a warm one.
+    """
+    stages = {}
+    stages["catalog"], catalog = measure(lambda: ChallengeCatalog("bench", challenges))
+
+    def travel_model():
+        fresh = ChallengeCatalog("bench", challenges)
+        return fresh.travel
+    stages["travel_model"], _ = measure(travel_model, repeats=1)
+    catalog.travel  # warm for the steps below
+
+    stages["preferences"], (prefs, _) = measure(lambda: extract_preferences(message))
+    preferences = json.dumps(prefs)
+    available_time = prefs["available_time_hours"]
+
+    stages["research_prompt"], (shortlist, research_msg) = measure(
+        lambda: main.research_request(prefs, preferences, available_time, catalog)
+    )
+    stages["research_prompt"]["prompt_bytes"] = (
+        len(main.load_prompt("research").encode()) + len(research_msg.encode())
+    )
+    research_reply = StubModel(route_stops=4).reply("Research", research_msg)
+    stages["route_build"], route = measure(
+        lambda: main.route_from_research_response(
+            main.extract_json(research_reply), None, shortlist, research_msg, catalog
+        )
+    )
+    stages["local_solver"], _ = measure(lambda: main.solve_locally(prefs, catalog))
+    stages["fallback_route"], _ = measure(lambda: main.build_fallback_route(prefs, catalog))
+
+    stages["guide_prompt"], (guide_system, guide_msg) = measure(
+        lambda: main.guide_request(message, [], route, catalog)
+    )
+    stages["guide_prompt"]["prompt_bytes"] = len(guide_system.encode()) + len(guide_msg.encode())
+    stages["guide_parse"], _ = measure(lambda: main.guide_response_text(StubModel.GUIDE_REPLY))
+    return stages
+
+
+# ── End-to-end throughput ────────────────────────────────────
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def bench_end_to_end(challenges: list[dict], requests: int, concurrency: int,
+                           route_engine: str) -> dict:
+    catalog = await asyncio.to_thread(ChallengeCatalog, "bench", challenges)
+    await asyncio.to_thread(lambda: catalog.travel)
+    prompts = [s["prompt"] for s in TEST_SCENARIOS]
+    slots = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await main.run_travel_workflow_async(
+                    f"{prompts[i % len(prompts)]} (request {i})", catalog, [], route_engine
+                )
+            except Exception:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - started_wall
+    cpu = time.process_time() - started_cpu
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 1) if latencies else None,
+        "cpu_ms_per_request": round(cpu * 1000 / requests, 2),
+    }
+
+
+# ── Report ───────────────────────────────────────────────────
+
+def print_report(results: list[dict]) -> None:
+    for entry in results:
+        print("=" * 78)
+        print(f"CATALOG: {entry['size']} challenges")
+        print("-" * 78)
+        print(f"  {'stage':<16}{'wall ms':>11}{'cpu ms':>11}{'peak KiB':>12}{'prompt B':>12}")
+        for stage, m in entry["stages"].items():
+            prompt = m.get("prompt_bytes", "")
+            print(f"  {stage:<16}{m['wall_ms']:>11.3f}{m['cpu_ms']:>11.3f}"
+                  f"{m['peak_kib']:>12.1f}{prompt:>12}")
+        e2e = entry.get("end_to_end")
+        if e2e:
+            print("-" * 78)
+            print(f"  end-to-end: {e2e['throughput_rps']} req/s, p50 {e2e['p50_ms']} ms, "
+                  f"p99 {e2e['p99_ms']} ms, {e2e['cpu_ms_per_request']} CPU ms/request, "
+                  f"{e2e['errors']}/{e2e['requests']} errors")
+    print("=" * 78)
+
+
+def main_cli(argv: list[str] | None = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="catalog sizes to benchmark")
+    parser.add_argument("--requests", type=int, default=20,
+                        help="end-to-end requests per catalog size (0 skips the pass)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated model latency per call")
+    parser.add_argument("--engine", choices=("research", "local"), default="research")
+    parser.add_argument("--route-cache", action="store_true",
+                        help="keep the route cache on (off by default so every request routes)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the workflow's INFO logs")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        main.log.setLevel(logging.WARNING)
+    if not args.route_cache:
+        main.ROUTE_CACHE = TTLCache(0, 0)
+    install_stub_model(StubModel(latency_ms=args.latency_ms))
+
+    message = TEST_SCENARIOS[0]["prompt"]
+    results = []
+    for size in args.sizes:
+        challenges = synthetic_catalog(size, args.seed)
+        entry = {"size": size, "stages": bench_stages(challenges, message)}
+        if args.requests > 0:
+            entry["end_to_end"] = asyncio.run(bench_end_to_end(
+                challenges, args.requests, args.concurrency, args.engine
+            ))
+        results.append(entry)
+        print_report([entry])
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "config": {k: v for k, v in vars(args).items() if k != "json"},
+            "results": results,
+        }, indent=2))
+        print(f"Results written to {args.json}")
+    return results
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,13 +1,26 @@
+import argparse
+import csv
 import json
-import sys
+import statistics
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, partial
+from pathlib import Path
+
 import boto3
 import requests
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
 
 AGENT_ARN = "arn:aws:bedrock-agentcore:us-east-1:975263988636:runtime/travelAgent_Agent-HET7Du6ZKx"
 LOCAL_DEV_URL = "http://localhost:8080/invocations"
 USE_LOCAL = True
 
+# Connections kept per host; load runs above this many workers queue for one.
+MAX_CONNECTIONS = 64
+
 # ── 15+ challenges spanning all major HK districts ──────────
 
 SAMPLE_CHALLENGES = [
@@ -262,15 +275,91 @@ TEST_SCENARIOS = [
 ]
 
 
-def invoke_agent_local(prompt: str, challenges: list, history: list | None = None):
-    payload = {
-        "prompt": prompt,
-        "challenges": challenges,
-        "history": history or [],
-    }
-    resp = requests.post(LOCAL_DEV_URL, json=payload, timeout=120, stream=True)
+def iter_sse_events(lines):
+    """Yield decoded `data:` payloads from an SSE line stream as they arrive."""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line or not line.startswith("data: "):
+            continue
+        data = line[6:]
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            yield data
+
+
+def collect_stream(events, on_event=None) -> dict:
+    """Consume staged workflow events and return the final WorkflowResult dict.
+
+    `on_event` is called with every preferences/route/token/result event.
+    """
+    for event in events:
+        if isinstance(event, dict) and "type" in event:
+            if on_event:
+                on_event(event)
+            if event["type"] == "result":
+                return event["result"]
+        elif isinstance(event, dict) and "error" in event:
+            return {"raw": json.dumps(event)}
+    return {"raw": "stream ended without a result event"}
+
+
+def print_progress(event: dict):
+    kind = event["type"]
+    if kind == "preferences":
+        print(f"[preferences] {json.dumps(event['preferences'])}")
+    elif kind == "route":
+        route = event.get("route") or {}
+        titles = [c["title"] for c in route.get("challenges", [])]
+        print(f"[route] {len(titles)} stop(s): {', '.join(titles)}")
+        print("[guide] ", end="", flush=True)
+    elif kind == "token":
+        print(event["text"], end="", flush=True)
+    elif kind == "result":
+        print()
+
+
+def build_payload(prompt: str, challenges: list, history: list | None, stream: bool,
+                  catalog_version: str | None = None) -> dict:
+    """Send the catalog by version id when the runtime already holds it."""
+    payload = {"prompt": prompt, "history": history or [], "stream": stream}
+    if catalog_version:
+        payload["catalog_version"] = catalog_version
+    else:
+        payload["challenges"] = challenges
+    return payload
+
+
+@cache
+def http_session() -> requests.Session:
+    """One keep-alive session for every local call (thread-safe for plain POSTs)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONNECTIONS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@cache
+def agent_core_client():
+    """Shared bedrock-agentcore client; boto3 clients are thread-safe."""
+    return boto3.client(
+        "bedrock-agentcore",
+        region_name="us-east-1",
+        config=Config(max_pool_connections=MAX_CONNECTIONS, read_timeout=120),
+    )
+
+
+def invoke_agent_local(prompt: str, challenges: list, history: list | None = None,
+                       stream: bool = True, on_event=None, catalog_version: str | None = None):
+    payload = build_payload(prompt, challenges, history, stream, catalog_version)
+    resp = http_session().post(LOCAL_DEV_URL, json=payload, timeout=120, stream=True)
     resp.raise_for_status()
 
+    if stream:
+        return collect_stream(iter_sse_events(resp.iter_lines(decode_unicode=True)), on_event)
+
     chunks = []
     for line in resp.iter_lines(decode_unicode=True):
         if not line:
@@ -304,22 +393,21 @@ def invoke_agent_local(prompt: str, challenges: list, history: list | None = Non
     return {"raw": raw}
 
 
-def invoke_agent_remote(prompt: str, challenges: list, history: list | None = None):
-    agent_core_client = boto3.client("bedrock-agentcore", region_name="us-east-1")
-
-    payload = json.dumps({
-        "prompt": prompt,
-        "challenges": challenges,
-        "history": history or [],
-    }).encode()
+def invoke_agent_remote(prompt: str, challenges: list, history: list | None = None,
+                        stream: bool = True, on_event=None, catalog_version: str | None = None,
+                        session_id: str | None = None):
+    payload = json.dumps(build_payload(prompt, challenges, history, stream, catalog_version)).encode()
 
-    response = agent_core_client.invoke_agent_runtime(
+    response = agent_core_client().invoke_agent_runtime(
         agentRuntimeArn=AGENT_ARN,
-        runtimeSessionId=str(uuid.uuid4()),
+        runtimeSessionId=session_id or str(uuid.uuid4()),
         payload=payload,
         qualifier="DEFAULT",
     )
 
+    if stream:
+        return collect_stream(iter_sse_events(response["response"].iter_lines()), on_event)
+
     full_response = []
     for chunk in response.get("response", []):
         text = chunk.decode("utf-8") if isinstance(chunk, bytes) else str(chunk)
@@ -339,10 +427,49 @@ def invoke_agent_remote(prompt: str, challenges: list, history: list | None = No
         return {"raw": raw}
 
 
-def invoke_agent(prompt: str, challenges: list, history: list | None = None):
+# Catalog version each runtime reported, keyed by the runtime that holds it:
+# LOCAL_RUNTIME for the single local process, else the AgentCore session id.
+LOCAL_RUNTIME = "local"
+_catalog_versions: dict[str, str] = {}
+
+
+def is_catalog_miss(result) -> bool:
+    metadata = result.get("metadata", {}) if isinstance(result, dict) else {}
+    return bool(metadata.get("catalog_miss"))
+
+
+def invoke_agent(prompt: str, challenges: list, history: list | None = None,
+                 stream: bool = True, on_event=None, session_id: str | None = None,
+                 on_resend=None):
+    """Invoke the runtime, sending the full catalog only when it is not held yet.
+
+    AgentCore runs each runtimeSessionId in its own microVM, so remotely a
+    catalog version is only sent on a reused `session_id`; without one every
+    call is a new session and gets the full list. On a catalog miss the miss
+    reply is not passed to `on_event`; `on_resend` is called before the list
+    is resent.
+    """
     if USE_LOCAL:
-        return invoke_agent_local(prompt, challenges, history)
-    return invoke_agent_remote(prompt, challenges, history)
+        send, runtime = invoke_agent_local, LOCAL_RUNTIME
+    else:
+        session_id = session_id or str(uuid.uuid4())
+        send, runtime = partial(invoke_agent_remote, session_id=session_id), session_id
+
+    def forward(event):
+        if on_event and not (event.get("type") == "result" and is_catalog_miss(event["result"])):
+            on_event(event)
+
+    result = send(prompt, challenges, history, stream, forward, _catalog_versions.get(runtime))
+    if is_catalog_miss(result):
+        _catalog_versions.pop(runtime, None)
+        if on_resend:
+            on_resend()
+        result = send(prompt, challenges, history, stream, on_event)
+
+    metadata = result.get("metadata", {}) if isinstance(result, dict) else {}
+    if metadata.get("catalog_version"):
+        _catalog_versions[runtime] = metadata["catalog_version"]
+    return result
 
 
 def print_result(result, scenario_name: str = ""):
@@ -396,14 +523,125 @@ def print_result(result, scenario_name: str = ""):
     print()
 
 
-if __name__ == "__main__":
-    scenario_idx = None
-    if len(sys.argv) > 1:
-        try:
-            scenario_idx = int(sys.argv[1]) - 1
-        except ValueError:
-            pass
+# ── Load generator ───────────────────────────────────────────
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 1)
+
+
+def timed_invoke(scenario: dict, scheduled: float, stream: bool) -> dict:
+    """One invocation, timed from `scheduled` (its due time in an open-loop run).
+
+    A catalog-miss round trip is excluded: it measures the resend protocol,
+    not the request.
+    """
+    first_event = None
+    miss_seconds = 0.0
+    started = time.perf_counter()
+
+    def on_event(event):
+        nonlocal first_event
+        if first_event is None:
+            first_event = time.perf_counter()
+
+    def on_resend():
+        nonlocal miss_seconds
+        miss_seconds = time.perf_counter() - started
+
+    error = ""
+    try:
+        result = invoke_agent(scenario["prompt"], SAMPLE_CHALLENGES, stream=stream,
+                              on_event=on_event, on_resend=on_resend)
+        if isinstance(result, str):
+            result = json.loads(result)  # non-stream bodies are JSON-encoded twice
+        if not isinstance(result, dict) or "raw" in result:
+            error = "unparseable response"
+        elif (result.get("metadata") or {}).get("error"):
+            error = result["metadata"]["error"]
+    except Exception as e:
+        error = type(e).__name__
+    finished = time.perf_counter() - miss_seconds
+    return {
+        "scenario": scenario["name"],
+        "latency_ms": round((finished - scheduled) * 1000, 1),
+        "ttfb_ms": round((first_event - miss_seconds - scheduled) * 1000, 1) if first_event else None,
+        "ok": not error,
+        "error": error,
+    }
 
+
+def run_load(scenarios: list[dict], requests_total: int, concurrency: int,
+             rate: float | None = None, stream: bool = True) -> tuple[dict, list[dict]]:
+    """Run `requests_total` invocations cycling through `scenarios`.
+
+    Closed loop by default: `concurrency` workers each start the next request
+    as soon as theirs returns. With `rate`, requests are released at that many
+    per second (open loop) and `concurrency` caps how many are in flight.
+    """
+    samples: list[dict] = []
+    lock = threading.Lock()
+
+    def worker(i: int, due: float | None):
+        # Open loop times from the scheduled release, so a request that waits
+        # for a free worker counts the wait; closed loop times from the start.
+        scheduled = due if due is not None else time.perf_counter()
+        sample = timed_invoke(scenarios[i % len(scenarios)], scheduled, stream)
+        with lock:
+            samples.append(sample)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(requests_total):
+            due = None
+            if rate:
+                due = started + i / rate
+                time.sleep(max(0.0, due - time.perf_counter()))
+            pool.submit(worker, i, due)
+    elapsed = time.perf_counter() - started
+
+    latencies = [s["latency_ms"] for s in samples if s["ok"]]
+    ttfbs = [s["ttfb_ms"] for s in samples if s["ok"] and s["ttfb_ms"] is not None]
+    errors = sum(not s["ok"] for s in samples)
+    summary = {
+        "target": "local" if USE_LOCAL else "remote",
+        "requests": len(samples),
+        "concurrency": concurrency,
+        "rate_rps": rate,
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.5),
+            "p90": percentile(latencies, 0.9),
+            "p99": percentile(latencies, 0.99),
+            "mean": round(statistics.fmean(latencies), 1) if latencies else None,
+            "max": max(latencies, default=None),
+        },
+        "ttfb_ms": {
+            "p50": percentile(ttfbs, 0.5),
+            "p90": percentile(ttfbs, 0.9),
+            "p99": percentile(ttfbs, 0.99),
+        },
+    }
+    return summary, samples
+
+
+def write_load_report(path: str, summary: dict, samples: list[dict]):
+    """JSON gets the summary and every sample; CSV gets one row per request."""
+    out = Path(path)
+    if out.suffix == ".csv":
+        with out.open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["scenario", "latency_ms", "ttfb_ms", "ok", "error"])
+            writer.writeheader()
+            writer.writerows(samples)
+    else:
+        out.write_text(json.dumps({"summary": summary, "samples": samples}, indent=2))
+
+
+def run_scenarios(scenario_idx: int | None):
     scenarios = TEST_SCENARIOS if scenario_idx is None else [TEST_SCENARIOS[scenario_idx]]
 
     for i, scenario in enumerate(scenarios):
@@ -414,5 +652,39 @@ if __name__ == "__main__":
         print(f"# Expected: {scenario['expect']}")
         print(f"{'#' * 70}\n")
 
-        result = invoke_agent(scenario["prompt"], SAMPLE_CHALLENGES)
+        result = invoke_agent(scenario["prompt"], SAMPLE_CHALLENGES, on_event=print_progress)
         print_result(result, scenario["name"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Invoke the travel agent runtime.")
+    parser.add_argument("scenario", nargs="?", type=int,
+                        help="run only this TEST_SCENARIOS entry (1-based)")
+    parser.add_argument("--remote", action="store_true",
+                        help="call the deployed AgentCore runtime instead of localhost")
+    parser.add_argument("--load", action="store_true", help="load-test instead of printing results")
+    parser.add_argument("--requests", type=int, default=50, help="total requests in load mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="max requests in flight")
+    parser.add_argument("--rate", type=float, help="target requests per second (open loop)")
+    parser.add_argument("--no-stream", action="store_true", help="request the single JSON response")
+    parser.add_argument("--output", metavar="PATH", help="write the load report (.json or .csv)")
+    args = parser.parse_args()
+
+    if args.remote:
+        USE_LOCAL = False
+    scenario_idx = args.scenario - 1 if args.scenario else None
+
+    if not args.load:
+        run_scenarios(scenario_idx)
+    else:
+        scenarios = TEST_SCENARIOS if scenario_idx is None else [TEST_SCENARIOS[scenario_idx]]
+        if USE_LOCAL:
+            # Prime the local runtime's catalog so load requests send it by version.
+            # Remote requests each get their own session, so they always send the list.
+            invoke_agent(scenarios[0]["prompt"], SAMPLE_CHALLENGES, stream=not args.no_stream)
+        summary, samples = run_load(scenarios, args.requests, args.concurrency,
+                                    args.rate, stream=not args.no_stream)
+        print(json.dumps(summary, indent=2))
+        if args.output:
+            write_load_report(args.output, summary, samples)
+            print(f"Report written to {args.output}")
@@ -0,0 +1,145 @@
+"""Route cache keyed by normalized preferences and a catalog fingerprint.
+
+Many users ask for the same thing ("3 hours, food and photos"). Routes built
+by Research or the local solver are cached so repeated intents skip route
+selection; the Guide still writes a fresh message for every request.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from helpers import encode_json
+
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "256"))
+ROUTE_CACHE_TTL_SECONDS = int(os.getenv("ROUTE_CACHE_TTL_SECONDS", "1800"))
+ROUTE_CACHE_DIR = os.getenv("ROUTE_CACHE_DIR", "")
+
+# Only fields that change which stops a route contains or how they are ordered.
+# joined_people churns constantly and only feeds the Guide's social info.
+FINGERPRINT_FIELDS = ("chlgID", "type", "difficulty", "expected_duration", "location", "score")
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and an optional disk tier.
+
+    Values must be JSON-serializable when `disk_dir` is set; disk entries
+    expire by file modification time.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, disk_dir: str | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value, now)
+        return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._store(key, value, time.monotonic())
+        self._disk_set(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def _store(self, key: str, value, stamp: float) -> None:
+        self._entries[key] = (stamp, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _disk_get(self, key: str):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _disk_set(self, key: str, value) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(encode_json(value), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+
+def catalog_fingerprint(challenges: list) -> str:
+    """Content hash of the route-relevant fields of a challenge catalog."""
+    digest = hashlib.sha256()
+    for c in sorted(challenges, key=lambda c: str(c.get("chlgID", ""))):
+        digest.update(json.dumps([c.get(f) for f in FINGERPRINT_FIELDS]).encode())
+    return digest.hexdigest()[:16]
+
+
+def normalize_preferences(prefs: dict) -> dict:
+    """Reduce preferences to the fields that shape a route, in canonical form.
+
+    Hours are kept exact: a route built for any longer budget may not fit.
+    """
+    try:
+        hours = float(prefs.get("available_time_hours", 4) or 4)
+    except (TypeError, ValueError):
+        hours = 4.0
+    return {
+        "available_time_hours": hours,
+        "interests": sorted({str(i).strip().lower() for i in prefs.get("interests", [])}),
+        "difficulty_preference": str(prefs.get("difficulty_preference", "any")).strip().lower(),
+        "special_requests": " ".join(str(prefs.get("special_requests", "")).lower().split()),
+    }
+
+
+def route_cache_key(prefs: dict, fingerprint: str, route_engine: str) -> str:
+    return json.dumps(
+        {"prefs": normalize_preferences(prefs), "catalog": fingerprint, "engine": route_engine},
+        sort_keys=True,
+    )
+
+
+ROUTE_CACHE = TTLCache(ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL_SECONDS, ROUTE_CACHE_DIR or None)
@@ -0,0 +1,77 @@
+"""Candidate pruning and compact catalog serialization for the Research prompt.
+
+The Research agent only needs a shortlist of feasible challenges and a handful
+of fields per challenge. Pruning keeps research prompt size (and latency)
+roughly constant as the catalog grows.
+"""
+
+import os
+from collections import defaultdict
+
+from catalog import ChallengeCatalog
+from routing import Candidate, build_candidates
+from travel import district_of
+
+RESEARCH_CANDIDATE_LIMIT = int(os.getenv("RESEARCH_CANDIDATE_LIMIT", "40"))
+CLUSTER_CELL_DEGREES = 0.02  # ~2 km — roughly one district-sized walking area
+CLUSTER_TOP_N = 3
+
+COMPACT_COLUMNS = (
+    "chlgID", "title", "type", "difficulty", "duration", "lat,lng", "district", "score", "joined",
+)
+
+
+def prune_candidates(prefs: dict, catalog: ChallengeCatalog,
+                     limit: int = RESEARCH_CANDIDATE_LIMIT) -> list[Candidate]:
+    """Keep the best `limit` feasible candidates, grouped by area.
+
+    Candidates are scored by routing.build_candidates (type, difficulty,
+    social proof), dropped if they cannot fit the time budget on their own,
+    and then taken area by area — strongest cluster first — so the survivors
+    still contain groups of nearby stops the agent can chain into a route.
+    """
+    budget = float(prefs.get("available_time_hours", 4) or 4) * 3600
+    scored = build_candidates(prefs, catalog, limit=None)
+    feasible = [c for c in scored if c.duration <= budget]
+    if not feasible:
+        return scored[:limit]  # nothing fits — let the agent pick the closest match
+    if len(feasible) <= limit:
+        return feasible
+
+    cells: dict[tuple[int, int], list[Candidate]] = defaultdict(list)
+    for cand in feasible:
+        lat, lng = cand.point
+        cells[(int(lat // CLUSTER_CELL_DEGREES), int(lng // CLUSTER_CELL_DEGREES))].append(cand)
+
+    ranked_cells = sorted(
+        cells.values(),
+        key=lambda members: sum(m.prize for m in members[:CLUSTER_TOP_N]),
+        reverse=True,
+    )
+
+    kept: list[Candidate] = []
+    for members in ranked_cells:
+        kept.extend(members[:limit - len(kept)])
+        if len(kept) >= limit:
+            break
+    return kept
+
+
+def serialize_compact(candidates: list[Candidate]) -> str:
+    """Render candidates as a pipe-delimited table, one challenge per line."""
+    lines = [" | ".join(COMPACT_COLUMNS)]
+    for cand in candidates:
+        c = cand.challenge
+        lat, lng = cand.point
+        lines.append(" | ".join((
+            c["chlgID"],
+            c.get("title", "").replace("|", "/"),
+            c.get("type", ""),
+            c.get("difficulty", ""),
+            c.get("expected_duration", ""),
+            f"{lat:.4f},{lng:.4f}",
+            district_of(cand.point) or "-",
+            f"{float(c.get('score', 0) or 0):g}",
+            str(len(c.get("joined_people") or [])),
+        )))
+    return "\n".join(lines)
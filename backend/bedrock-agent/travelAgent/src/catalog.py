@@ -0,0 +1,212 @@
+"""Server-side challenge catalogs, indexed once per version.
+
+Clients send the full challenge list once, then refer to it by
+`catalog_version` (or send a delta against it), so request size and decode
+time no longer grow with the catalog.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+
+from cache import catalog_fingerprint
+from distance import DistanceMatrix
+from geo import GeoPoint, challenge_point
+from helpers import parse_duration_seconds
+from spatial import SpatialIndex
+from travel import TravelTimeModel
+
+CATALOG_MAX_VERSIONS = int(os.getenv("CATALOG_MAX_VERSIONS", "8"))
+
+
+def catalog_content_hash(challenges: list) -> str:
+    """Hash of every field, used as the version id when the client sends none."""
+    digest = hashlib.sha256()
+    for c in sorted(challenges, key=lambda c: str(c.get("chlgID", ""))):
+        digest.update(json.dumps(c, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+class ChallengeCatalog:
+    """One catalog version, indexed once and shared by every request on it.
+
+    Indexes are built eagerly and are cheap (one pass over the challenges);
+    the distance matrix, travel model and spatial index are built on first use.
+    Treat the challenge dicts and every index as read-only.
+    """
+
+    def __init__(self, version: str, challenges: list, fingerprint: str | None = None,
+                 points: dict[str, GeoPoint] | None = None, content_hash: str | None = None):
+        self.version = version
+        self.challenges = challenges
+        self.content_hash = content_hash
+        self.fingerprint = fingerprint or catalog_fingerprint(challenges)
+        self.by_id: dict[str, dict] = {c["chlgID"]: c for c in challenges}
+        self.durations: dict[str, int] = {
+            c["chlgID"]: parse_duration_seconds(c.get("expected_duration", "01:00:00"))
+            for c in challenges
+        }
+        self.participants: dict[str, int] = {
+            c["chlgID"]: len(c.get("joined_people") or []) for c in challenges
+        }
+        if points is None:
+            points = {}
+            for c in challenges:
+                point = challenge_point(c)
+                if point is not None:
+                    points[c["chlgID"]] = point
+        self.points = points
+
+        # Score-sorted (highest first) overall and per type / difficulty.
+        self.by_score: list[dict] = sorted(
+            challenges, key=lambda c: float(c.get("score", 0) or 0), reverse=True
+        )
+        self.by_type: dict[str, list[dict]] = defaultdict(list)
+        self.by_difficulty: dict[str, list[dict]] = defaultdict(list)
+        for c in self.by_score:
+            self.by_type[c.get("type", "").lower()].append(c)
+            self.by_difficulty[c.get("difficulty", "").lower()].append(c)
+        self.by_type = dict(self.by_type)
+        self.by_difficulty = dict(self.by_difficulty)
+
+        self._distances: DistanceMatrix | None = None
+        self._travel: TravelTimeModel | None = None
+        self._spatial: SpatialIndex | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.challenges)
+
+    def of_types(self, types) -> list[dict]:
+        """Challenges of any of `types`, highest score first."""
+        buckets = [self.by_type.get(t.lower(), []) for t in types]
+        if len(buckets) == 1:
+            return buckets[0]
+        return list(heapq.merge(
+            *buckets, key=lambda c: float(c.get("score", 0) or 0), reverse=True
+        ))
+
+    @property
+    def distances(self) -> DistanceMatrix:
+        """All-pairs distances, built on first use and kept for the catalog's lifetime."""
+        if self._distances is None:
+            with self._lock:
+                if self._distances is None:
+                    self._distances = DistanceMatrix(self.points)
+        return self._distances
+
+    @property
+    def travel(self) -> TravelTimeModel:
+        """District-aware travel times over `distances`, built on first use."""
+        if self._travel is None:
+            distances = self.distances
+            with self._lock:
+                if self._travel is None:
+                    self._travel = TravelTimeModel(self.points, distances)
+        return self._travel
+
+    @property
+    def spatial(self) -> SpatialIndex:
+        """Grid index for radius / nearest queries, built on first use."""
+        if self._spatial is None:
+            with self._lock:
+                if self._spatial is None:
+                    self._spatial = SpatialIndex(self.points)
+        return self._spatial
+
+    def around(self, point: GeoPoint, radius_km: float) -> "ChallengeCatalog":
+        """The challenges within `radius_km` of `point`, as a derived catalog.
+
+        Shares this catalog's distance matrix and travel model (they are
+        keyed by chlgID, so a subset can use them as-is).
+        """
+        ids = {chlg_id for chlg_id, _ in self.spatial.within(point, radius_km)}
+        sub = ChallengeCatalog(
+            self.version,
+            [c for c in self.challenges if c["chlgID"] in ids],
+            fingerprint=f"{self.fingerprint}@{point.lat:.3f},{point.lng:.3f}~{radius_km:g}",
+            points={chlg_id: self.points[chlg_id] for chlg_id in ids},
+        )
+        sub._distances = self.distances
+        sub._travel = self.travel
+        return sub
+
+
+class CatalogStore:
+    """Bounded LRU of catalogs keyed by version id."""
+
+    def __init__(self, max_versions: int = CATALOG_MAX_VERSIONS):
+        self.max_versions = max_versions
+        self._catalogs: OrderedDict[str, ChallengeCatalog] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: str) -> ChallengeCatalog | None:
+        with self._lock:
+            catalog = self._catalogs.get(version)
+            if catalog is not None:
+                self._catalogs.move_to_end(version)
+            return catalog
+
+    def put(self, challenges: list, version: str | None = None) -> ChallengeCatalog:
+        """Store `challenges` under `version` (default: their content hash).
+
+        Clients resend the full list on every request, so when the version is
+        already held with the same content the stored catalog, with whatever
+        matrix, travel model and spatial index it has built, is returned as-is.
+        """
+        content_hash = catalog_content_hash(challenges)
+        version = version or content_hash
+        with self._lock:
+            held = self._catalogs.get(version)
+            if held is not None and held.content_hash == content_hash:
+                self._catalogs.move_to_end(version)
+                return held
+        catalog = ChallengeCatalog(version, challenges, content_hash=content_hash)
+        with self._lock:
+            self._catalogs[catalog.version] = catalog
+            self._catalogs.move_to_end(catalog.version)
+            while len(self._catalogs) > self.max_versions:
+                self._catalogs.popitem(last=False)
+        return catalog
+
+    def apply_delta(self, delta: dict) -> ChallengeCatalog | None:
+        """Build a new catalog from `base_version` plus added/changed/removed.
+
+        Returns None when the base version is unknown.
+        """
+        base = self.get(delta.get("base_version", ""))
+        if base is None:
+            return None
+        by_id = {c["chlgID"]: c for c in base.challenges}
+        for chlg_id in delta.get("removed", []):
+            by_id.pop(chlg_id, None)
+        for c in delta.get("added", []) + delta.get("changed", []):
+            by_id[c["chlgID"]] = c
+        return self.put(list(by_id.values()), delta.get("version"))
+
+    def resolve(self, payload: dict) -> tuple[ChallengeCatalog | None, str | None]:
+        """Find the catalog an invoke payload refers to.
+
+        Returns (catalog, missed_version). missed_version is set when the
+        payload named a version (or delta base) this runtime does not hold;
+        the client should resend the full list.
+        """
+        challenges = payload.get("challenges")
+        version = payload.get("catalog_version")
+        delta = payload.get("catalog_delta")
+
+        if challenges:
+            return self.put(challenges, version), None
+        if delta:
+            catalog = self.apply_delta(delta)
+            return catalog, None if catalog else delta.get("base_version")
+        if version:
+            catalog = self.get(version)
+            return catalog, None if catalog else version
+        return None, None
+
+
+CATALOGS = CatalogStore()
@@ -0,0 +1,100 @@
+"""Request-level latency budget shared by the workflow stages.
+
+Each stage (planner → route → guide) may use whatever is left of the budget
+minus the shares reserved for the stages after it, so time a fast stage does
+not use carries forward. A stage that would overrun raises StageTimeout and
+the workflow substitutes its local fallback, recording the stage in
+metadata["degraded"].
+"""
+
+import asyncio
+import os
+import time
+from typing import AsyncIterator
+
+LATENCY_BUDGET_SECONDS = float(os.getenv("LATENCY_BUDGET_SECONDS", "30"))
+
+STAGES = ("planner", "route", "guide")
+STAGE_SHARES = {"planner": 0.2, "route": 0.4, "guide": 0.4}
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"{stage} stage missed its deadline")
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, budget_seconds: float = LATENCY_BUDGET_SECONDS):
+        self.budget = budget_seconds
+        self.expires = time.monotonic() + budget_seconds
+        self.degraded: list[str] = []
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "Deadline":
+        """Budget from payload["latency_budget_ms"], else LATENCY_BUDGET_SECONDS."""
+        try:
+            return cls(float(payload["latency_budget_ms"]) / 1000)
+        except (KeyError, TypeError, ValueError):
+            return cls()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def stage_timeout(self, stage: str) -> float:
+        later = STAGES[STAGES.index(stage) + 1:]
+        reserved = sum(STAGE_SHARES[s] for s in later) * self.budget
+        return max(0.0, self.remaining() - reserved)
+
+    def degrade(self, stage: str) -> None:
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+    async def run(self, stage: str, awaitable):
+        """Await `awaitable` within the stage's timeout or raise StageTimeout."""
+        timeout = self.stage_timeout(stage)
+        if timeout <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            elif isinstance(awaitable, asyncio.Future):
+                awaitable.cancel()
+            raise StageTimeout(stage)
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeout(stage) from None
+
+    async def iterate(self, stage: str, agen: AsyncIterator) -> AsyncIterator:
+        """Yield from `agen` until the stage's timeout, then raise StageTimeout.
+
+        `agen` runs in a single task of its own (so context-local state such
+        as tracing spans stays consistent) and is cancelled on timeout.
+        """
+        items: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put_nowait(item)
+            finally:
+                items.put_nowait(done)
+
+        expires = time.monotonic() + self.stage_timeout(stage)
+        task = asyncio.create_task(pump())
+        try:
+            while True:
+                timeout = expires - time.monotonic()
+                if timeout <= 0:
+                    raise StageTimeout(stage)
+                try:
+                    item = await asyncio.wait_for(items.get(), timeout)
+                except asyncio.TimeoutError:
+                    raise StageTimeout(stage) from None
+                if item is done:
+                    break
+                yield item
+        finally:
+            if not task.done():
+                task.cancel()
+        await task  # re-raise the generator's own exception, if any
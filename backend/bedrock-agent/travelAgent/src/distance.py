@@ -0,0 +1,131 @@
+"""Vectorized great-circle distances over a challenge catalog.
+
+A DistanceMatrix is built once per catalog version (see
+ChallengeCatalog.distances). Catalogs up to DISTANCE_MATRIX_MAX_POINTS get a
+dense float32 all-pairs matrix computed in one NumPy pass; larger ones compute
+rows on demand and keep the most recent in a bounded LRU, so memory stays
+linear in the catalog size.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from geo import GeoPoint
+
+EARTH_RADIUS_KM = 6371.0
+# 4000 points → 64 MB of float32; beyond that, rows are computed on demand.
+DISTANCE_MATRIX_MAX_POINTS = int(os.getenv("DISTANCE_MATRIX_MAX_POINTS", "4000"))
+DISTANCE_ROW_CACHE_SIZE = int(os.getenv("DISTANCE_ROW_CACHE_SIZE", "1024"))
+
+
+def haversine_matrix(lat1: np.ndarray, lng1: np.ndarray,
+                     lat2: np.ndarray, lng2: np.ndarray) -> np.ndarray:
+    """All-pairs haversine distance in km between two sets of points in radians.
+
+    Returns a (len(lat1), len(lat2)) float32 array.
+    """
+    lat1 = lat1[:, None]
+    lng1 = lng1[:, None]
+    h = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))).astype(np.float32)
+
+
+def points_to_radians(points) -> tuple[np.ndarray, np.ndarray]:
+    coords = np.radians(np.asarray(list(points), dtype=np.float64).reshape(-1, 2))
+    return coords[:, 0], coords[:, 1]
+
+
+class DistanceMatrix:
+    """Distances between every pair of challenges in one catalog, keyed by chlgID."""
+
+    def __init__(self, points: dict[str, GeoPoint],
+                 max_dense: int = DISTANCE_MATRIX_MAX_POINTS,
+                 row_cache_size: int = DISTANCE_ROW_CACHE_SIZE):
+        self.ids = list(points)
+        self.index = {chlg_id: i for i, chlg_id in enumerate(self.ids)}
+        self._lat, self._lng = points_to_radians(points.values())
+        self.dense = (
+            haversine_matrix(self._lat, self._lng, self._lat, self._lng)
+            if len(self.ids) <= max_dense else None
+        )
+        self.row_cache_size = row_cache_size
+        self._rows: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, chlg_id: str) -> bool:
+        return chlg_id in self.index
+
+    def _row(self, i: int) -> np.ndarray:
+        if self.dense is not None:
+            return self.dense[i]
+        with self._lock:
+            row = self._rows.get(i)
+            if row is not None:
+                self._rows.move_to_end(i)
+                return row
+        row = haversine_matrix(self._lat[i:i + 1], self._lng[i:i + 1], self._lat, self._lng)[0]
+        with self._lock:
+            self._rows[i] = row
+            while len(self._rows) > self.row_cache_size:
+                self._rows.popitem(last=False)
+        return row
+
+    def row(self, chlg_id: str) -> np.ndarray:
+        """Distance in km from one challenge to every challenge, in `ids` order."""
+        return self._row(self.index[chlg_id])
+
+    def km(self, a: str, b: str) -> float:
+        if self.dense is not None:
+            return float(self.dense[self.index[a], self.index[b]])
+        return float(self._row(self.index[a])[self.index[b]])
+
+    def submatrix(self, chlg_ids: list[str]) -> np.ndarray:
+        """Pairwise distances between a subset of challenges, in the given order."""
+        idx = np.fromiter((self.index[c] for c in chlg_ids), dtype=np.intp, count=len(chlg_ids))
+        if self.dense is not None:
+            return self.dense[np.ix_(idx, idx)]
+        return haversine_matrix(self._lat[idx], self._lng[idx], self._lat[idx], self._lng[idx])
+
+    def distances_from(self, point: GeoPoint) -> np.ndarray:
+        """Distance in km from an arbitrary point to every challenge, in `ids` order."""
+        lat, lng = points_to_radians([point])
+        return haversine_matrix(lat, lng, self._lat, self._lng)[0]
+
+    def nearest(self, target: str | GeoPoint, k: int = 5,
+                max_km: float | None = None) -> list[tuple[str, float]]:
+        """The `k` challenges closest to a chlgID or a point, nearest first.
+
+        A chlgID target is excluded from its own result.
+        """
+        if isinstance(target, str):
+            row = self.row(target)
+            exclude = self.index[target]
+        else:
+            row = self.distances_from(target)
+            exclude = -1
+        n = len(row)
+        take = min(k + (exclude >= 0), n)
+        if take <= 0:
+            return []
+        idx = np.argpartition(row, take - 1)[:take] if take < n else np.arange(n)
+        idx = idx[np.argsort(row[idx], kind="stable")]
+        result = []
+        for i in idx.tolist():
+            if i == exclude:
+                continue
+            dist = float(row[i])
+            if max_km is not None and dist > max_km:
+                break
+            result.append((self.ids[i], dist))
+            if len(result) == k:
+                break
+        return result
@@ -0,0 +1,194 @@
+"""Route edits parsed from follow-up messages.
+
+"drop the last stop", "swap the curry for something near Central", "start
+with the temple", "I have 2 more hours": a follow-up that changes the route
+the session already holds is applied to that route locally
+(routing.edit_route) and only the Guide runs, instead of the full pipeline.
+Messages the rules cannot pin to a single edit give None and are planned
+from scratch as before.
+"""
+
+import re
+
+from geo import GeoPoint
+from preferences import WORD_NUMBERS, mentioned_hours, mentioned_interests
+from records import PlannedRoute
+from travel import find_district
+
+REMOVE = "remove"
+REPLACE = "replace"
+REORDER = "reorder"
+ADD = "add"
+TRIM = "trim"
+
+# REORDER positions besides a target index.
+FIRST, LAST, REVERSE, OPTIMIZE = "first", "last", "reverse", "optimize"
+
+DEFAULT_EXTRA_SECONDS = 3600
+
+ORDINALS = {"first": 0, "1st": 0, "second": 1, "2nd": 1, "third": 2, "3rd": 2,
+            "fourth": 3, "4th": 3, "fifth": 4, "5th": 4, "sixth": 5, "6th": 5,
+            "last": -1, "final": -1}
+TITLE_STOP_WORDS = {"the", "and", "with", "challenge", "quest", "tour", "walk", "spot", "stop",
+                    "hong", "kong", "at", "of", "in", "for", "a", "an", "on", "to"}
+
+ORDINAL_RE = re.compile(
+    r"\b(" + "|".join(ORDINALS) + r")\b(?:\s+(?:stop|one|place|challenge))?"
+)
+STOP_NUMBER_RE = re.compile(r"\bstop\s*(?:#|no\.?|number)?\s*(\d)\b")
+REORDER_RE = re.compile(
+    r"\b(?:reorder|re-order|rearrange|reverse|optimi[sz]e|start with|begin with|end with|"
+    r"finish with|save .+ for last|move|do .+ (?:first|last))\b"
+)
+REVERSE_RE = re.compile(r"\breverse\b")
+OPTIMIZE_RE = re.compile(r"\b(?:optimi[sz]e|shortest|less (?:walking|travel)|reorder|re-order|"
+                         r"rearrange)\b")
+POSITION_RE = re.compile(
+    r"\b(?:(?P<first>start with|begin with|first|to the (?:start|beginning|front))"
+    r"|(?P<last>end with|finish with|for last|last|to the end))\b"
+)
+REMOVE_RE = re.compile(r"\b(?:remove|drop|skip|delete|cut|ditch|lose|get rid of|take out)\b")
+REPLACE_RE = re.compile(r"\b(?:swap|replace|switch|substitute|change)\b")
+SPLIT_RE = re.compile(r"\b(?:for|with|to)\b")
+MORE_TIME_RE = re.compile(
+    r"\b(\d+(?:\.\d+)?|" + "|".join(re.escape(w) for w in WORD_NUMBERS)
+    + r")\s+(?:more|extra)\s+(?:hours?|hrs?)\b"
+    r"|\b(another|an extra|one more) hour\b"
+    r"|\b(more time|extend|longer)\b"
+)
+LESS_TIME_RE = re.compile(r"\b(?:only (?:have|got)|less time|shorter|cut it|down to|no more than)\b")
+ADD_RE = re.compile(r"\b(?:add|one more|another|extra|include)\b")
+NEAR_RE = re.compile(r"\b(?:near|in|around|at|close to|by)\s+([a-z' ]+)")
+
+
+class RouteEdit:
+    __slots__ = ("kind", "index", "position", "interests", "near", "extra_seconds",
+                 "budget_seconds", "count")
+
+    def __init__(self, kind: str, index: int | None = None, position: str | None = None,
+                 interests: list[str] | None = None, near: GeoPoint | None = None,
+                 extra_seconds: int | None = None, budget_seconds: int | None = None, count: int = 1):
+        self.kind = kind
+        self.index = index
+        self.position = position
+        self.interests = interests or []
+        self.near = near
+        self.extra_seconds = extra_seconds
+        self.budget_seconds = budget_seconds
+        self.count = count
+
+    def describe(self) -> dict:
+        """The edit for response metadata."""
+        described = {"kind": self.kind}
+        for slot in self.__slots__[1:]:
+            value = getattr(self, slot)
+            if slot == "count" and self.kind != ADD:
+                continue
+            if value is not None and value != [] and (value != 0 or slot == "index"):
+                described[slot] = [value.lat, value.lng] if slot == "near" else value
+        return described
+
+
+def _target(text: str, route: PlannedRoute) -> int | None:
+    """Index of the stop `text` refers to, by title words, stop number or ordinal."""
+    scores = []
+    for stop in route.challenges:
+        title = stop.title.lower()
+        words = {w for w in re.findall(r"[a-z']+", title) if w not in TITLE_STOP_WORDS and len(w) > 2}
+        scores.append(10 if title in text else sum(1 for w in words if re.search(rf"\b{w}\b", text)))
+    best = max(scores, default=0)
+    if best and scores.count(best) == 1:
+        return scores.index(best)
+
+    n = len(route.challenges)
+    match = STOP_NUMBER_RE.search(text)
+    if match and 1 <= int(match.group(1)) <= n:
+        return int(match.group(1)) - 1
+    match = ORDINAL_RE.search(text)
+    if match and ORDINALS[match.group(1)] < n:
+        return ORDINALS[match.group(1)] % n
+    return None
+
+
+def _near(text: str) -> GeoPoint | None:
+    for match in NEAR_RE.finditer(text):
+        words = match.group(1).split()
+        for size in (3, 2, 1):
+            district = find_district(" ".join(words[:size]))
+            if district is not None:
+                return district.center
+    return None
+
+
+def _extra_seconds(text: str) -> int | None:
+    match = MORE_TIME_RE.search(text)
+    if match is None:
+        return None
+    if match.group(1):
+        token = match.group(1)
+        hours = WORD_NUMBERS[token] if token in WORD_NUMBERS else float(token)
+        return int(hours * 3600)
+    return DEFAULT_EXTRA_SECONDS
+
+
+def parse_edit(message: str, route: PlannedRoute) -> RouteEdit | None:
+    """The edit `message` asks for on `route`, or None if it is not a clear single edit."""
+    text = message.lower().replace("’", "'")
+
+    if REORDER_RE.search(text):
+        if REVERSE_RE.search(text):
+            return RouteEdit(REORDER, position=REVERSE)
+        positions = list(POSITION_RE.finditer(text))
+        if positions:
+            # The last position phrase is where the stop goes; the rest names it.
+            where = positions[-1]
+            index = _target(text[:where.start()] + " " + text[where.end():], route)
+            if index is not None:
+                return RouteEdit(REORDER, index, FIRST if where.group("first") else LAST)
+        if OPTIMIZE_RE.search(text):
+            return RouteEdit(REORDER, position=OPTIMIZE)
+        return None
+
+    hours = mentioned_hours(text) if LESS_TIME_RE.search(text) else None
+    if hours is not None:
+        budget = int(hours * 3600)
+        cost = route.duration_seconds + route.travel_seconds
+        if budget > cost:
+            return RouteEdit(ADD, extra_seconds=budget - cost, count=0)
+        # A route that already fits the budget is trimmed to itself.
+        return RouteEdit(TRIM, budget_seconds=budget)
+
+    removal = REMOVE_RE.search(text)
+    addition = ADD_RE.search(text)
+    if removal and addition and addition.start() > removal.end():
+        # "skip the peak, add a food stop" is a replacement.
+        index = _target(text[:addition.start()], route)
+        if index is None:
+            return None
+        wanted = text[addition.start():]
+        return RouteEdit(REPLACE, index, interests=mentioned_interests(wanted), near=_near(wanted))
+
+    if removal and not REPLACE_RE.search(text):
+        index = _target(text, route)
+        if index is None or len(route.challenges) < 2:
+            return None
+        return RouteEdit(REMOVE, index)
+
+    if REPLACE_RE.search(text) or "instead of" in text:
+        if "instead of" in text:
+            wanted, _, target_text = text.partition("instead of")
+        else:
+            split = SPLIT_RE.search(text)
+            target_text, wanted = (text[:split.start()], text[split.end():]) if split else (text, "")
+        index = _target(target_text, route)
+        if index is None:
+            return None
+        return RouteEdit(REPLACE, index, interests=mentioned_interests(wanted), near=_near(wanted))
+
+    extra = _extra_seconds(text)
+    if extra is not None:
+        return RouteEdit(ADD, interests=mentioned_interests(text), near=_near(text),
+                         extra_seconds=extra, count=0)
+    if ADD_RE.search(text):
+        return RouteEdit(ADD, interests=mentioned_interests(text), near=_near(text))
+    return None
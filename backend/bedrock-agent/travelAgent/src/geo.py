@@ -0,0 +1,86 @@
+"""Typed geographic coordinates.
+
+Challenge locations arrive in three shapes:
+
+- wire strings from Firestore / the app: ["22.293° N", "114.168° E"]
+- browser-agent ChallengeSuggestion floats: [longitude, latitude]
+- seed data records: {"latitude": 22.2932, "longitude": 114.1686}
+
+They are parsed once, at catalog ingestion, into a GeoPoint; routing and
+distance code works on its floats. The string form stays on the wire.
+"""
+
+from typing import NamedTuple
+
+_HEMISPHERE_SIGN = {"N": 1, "S": -1, "E": 1, "W": -1}
+
+
+class GeoPoint(NamedTuple):
+    lat: float
+    lng: float
+
+    @classmethod
+    def from_wire(cls, location) -> "GeoPoint":
+        """Parse ["22.293° N", "114.168° E"]; S and W hemispheres are negative."""
+        return cls(parse_coordinate(location[0]), parse_coordinate(location[1]))
+
+    @classmethod
+    def from_lon_lat(cls, pair) -> "GeoPoint":
+        """Parse a browser-agent [longitude, latitude] float pair."""
+        return cls(float(pair[1]), float(pair[0]))
+
+    @classmethod
+    def from_record(cls, record: dict) -> "GeoPoint":
+        """Parse a seed-data style {"latitude": ..., "longitude": ...} record."""
+        return cls(float(record["latitude"]), float(record["longitude"]))
+
+    def to_wire(self, precision: int = 3) -> list[str]:
+        return [
+            f"{abs(self.lat):.{precision}f}° {'N' if self.lat >= 0 else 'S'}",
+            f"{abs(self.lng):.{precision}f}° {'E' if self.lng >= 0 else 'W'}",
+        ]
+
+
+def parse_coordinate(coord) -> float:
+    """Parse "22.293° N", "22.293N", "-22.293" or a bare number to signed degrees."""
+    if isinstance(coord, (int, float)):
+        return float(coord)
+    text = coord.strip().upper()
+    sign = 1
+    if text and text[-1] in _HEMISPHERE_SIGN:
+        sign = _HEMISPHERE_SIGN[text[-1]]
+        text = text[:-1]
+    return sign * float(text.replace("°", "").strip())
+
+
+def parse_point(value) -> GeoPoint | None:
+    """GeoPoint from a request field: {"lat", "lng"}, {"latitude", "longitude"} or a wire pair."""
+    try:
+        if isinstance(value, dict):
+            if "lat" in value:
+                return GeoPoint(float(value["lat"]), float(value["lng"]))
+            return GeoPoint.from_record(value)
+        if isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value):
+            return GeoPoint.from_wire(value)
+    except (ValueError, IndexError, KeyError, TypeError, AttributeError):
+        pass
+    return None
+
+
+def challenge_point(challenge: dict) -> GeoPoint | None:
+    """Best-effort GeoPoint for a challenge in any of the supported formats.
+
+    A numeric `location` pair is read as [longitude, latitude], the
+    browser-agent convention; string pairs are the wire format.
+    """
+    try:
+        if "location" in challenge:
+            location = challenge["location"]
+            if all(isinstance(v, (int, float)) for v in location):
+                return GeoPoint.from_lon_lat(location)
+            return GeoPoint.from_wire(location)
+        if "latitude" in challenge and "longitude" in challenge:
+            return GeoPoint.from_record(challenge)
+    except (ValueError, IndexError, KeyError, TypeError, AttributeError):
+        pass
+    return None
@@ -0,0 +1,123 @@
+"""Rule-based intent classification ahead of the planning pipeline.
+
+Only a request for a route needs the Planner, Research and Guide. Greetings,
+thanks and off-topic chatter get a templated reply, a question about the
+route the session already holds gets a single Guide call, and a change to
+that route is applied locally (see edits.py) before a single Guide call. Anything the rules
+are unsure about is treated as PLAN, so a misclassification costs latency,
+never a missing route.
+"""
+
+import re
+
+from preferences import mentions_preferences
+
+GREETING = "greeting"
+THANKS = "thanks"
+OFF_TOPIC = "off_topic"
+ROUTE_QUESTION = "route_question"
+ROUTE_EDIT = "route_edit"
+PLAN = "plan"
+
+# A greeting / thanks message consists only of these words and contains at
+# least one of the first set.
+GREETING_WORDS = {"hi", "hii", "hey", "heya", "hello", "hola", "yo", "sup", "howdy", "hiya",
+                  "wassup", "up", "greetings", "morning"}
+GREETING_FILLER = {"there", "good", "afternoon", "evening", "everyone", "all", "guys", "again",
+                   "what's", "whats", "oh", "ok", "okay"}
+THANKS_WORDS = {"thanks", "thank", "thx", "ty", "tysm", "cheers", "appreciate", "appreciated",
+                "bye", "goodbye", "cya"}
+THANKS_FILLER = {"you", "so", "much", "a", "lot", "very", "really", "ok", "okay", "great",
+                 "perfect", "awesome", "cool", "nice", "lovely", "amazing", "that's", "thats",
+                 "it", "i", "for", "the", "your", "help", "that", "see", "ya", "later", "again",
+                 "sounds", "good", "got", "will", "do", "now", "all", "bro", "man", "mate"}
+MAX_SMALL_TALK_WORDS = 8
+
+QUESTION_RE = re.compile(
+    r"\?\s*$|^(?:how|what|what's|whats|where|when|which|why|who|is|are|can|could|do|does|"
+    r"should|will|would|any)\b"
+)
+ROUTE_REFERENCE_RE = re.compile(
+    r"\b(?:this|the|my|that|your|our) (?:route|plan|itinerary|trip|tour|walk)\b"
+    r"|\b(?:first|second|third|fourth|fifth|sixth|last|next|final|each|every) (?:stop|one|place)\b"
+    r"|\bstop (?:#|no\.? ?|number )?\d\b|\bbetween (?:the )?stops\b"
+)
+# Requests to change or replace the route are planning work, not questions.
+CHANGE_RE = re.compile(
+    r"\b(?:plan|new|another|different|instead|swap|replace|change|remove|drop|skip|add|"
+    r"more|less|fewer|shorter|longer|extend|reorder|redo)\b"
+)
+# Change requests CHANGE_RE misses. Without one of these (or a CHANGE_RE
+# word), a question about the route is a question even when it says "extra"
+# or "move" ("any extra cost at the second stop?").
+EDIT_REQUEST_RE = re.compile(
+    r"\b(?:switch|substitute|delete|ditch|get rid of|take out|re-order|rearrange|reverse|"
+    r"optimi[sz]e|start with|begin with|end with|finish with|do .+ (?:first|last)|"
+    r"move (?:the|it|that|this|stop)|extra (?:hours?|time|stops?)|only (?:have|got))\b"
+)
+EDIT_RE = re.compile(
+    r"\b(?:swap|replace|switch|substitute|instead of|remove|drop|skip|delete|ditch|"
+    r"get rid of|take out|reorder|re-order|rearrange|reverse|optimi[sz]e|do .+ (?:first|last)|"
+    r"start with|begin with|end with|"
+    r"finish with|move|add|one more|extra|extend|more time|more hours?|another hour|"
+    r"only (?:have|got)|less time|shorter)\b"
+)
+NEW_PLAN_RE = re.compile(
+    r"\b(?:plan|(?:new|different|another|whole) (?:route|plan|itinerary|day)|start over|"
+    r"from scratch)\b"
+)
+OFF_TOPIC_RE = re.compile(
+    r"\b(?:weather|forecast|temperature|news|stocks?|bitcoin|crypto|politics?|election|"
+    r"joke|poem|song|recipe|code|coding|python|javascript|homework|math|translate|"
+    r"who are you|are you (?:a bot|human|real|an ai)|what model)\b"
+)
+TRAVEL_RE = re.compile(
+    r"\b(?:hong kong|hk|kowloon|island|mtr|ferry|tram|district|challenges?|visit|go|see|do|"
+    r"explore|trip|tour|route|itinerary|spots?|places?|near|nearby)\b"
+)
+
+TEMPLATED_REPLIES = {
+    GREETING: ("Hey there! 你好 (nei hou) — welcome to Hong Kong! Tell me how much time you "
+               "have and what you're into — food, culture, hiking, photos, nightlife — and "
+               "I'll put a route together for you."),
+    THANKS: ("多謝 (do je) — my pleasure! Enjoy the route, and come back any time you want "
+             "another one."),
+    OFF_TOPIC: ("That's outside what I can help with — I'm your Hong Kong route guide. Tell me "
+                "how long you've got and what you'd like to do, and I'll plan the stops."),
+}
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"[a-z']+", text)
+
+
+def _only(words: list[str], core: set[str], filler: set[str]) -> bool:
+    return (0 < len(words) <= MAX_SMALL_TALK_WORDS
+            and any(w in core for w in words)
+            and all(w in core or w in filler for w in words))
+
+
+def classify_intent(message: str, route_titles: list[str] | tuple = ()) -> str:
+    """The intent of `message`; `route_titles` are the stops of the route held for the session."""
+    text = message.lower().replace("’", "'").strip()
+    words = _words(text)
+    if not words:
+        return GREETING
+    if _only(words, GREETING_WORDS, GREETING_FILLER):
+        return GREETING
+    if _only(words, THANKS_WORDS, THANKS_FILLER):
+        return THANKS
+
+    if (route_titles and QUESTION_RE.search(text) and not CHANGE_RE.search(text)
+            and not EDIT_REQUEST_RE.search(text)):
+        names_stop = any(title.lower() in text for title in route_titles)
+        if names_stop or ROUTE_REFERENCE_RE.search(text):
+            return ROUTE_QUESTION
+    if route_titles and EDIT_RE.search(text) and not NEW_PLAN_RE.search(text):
+        return ROUTE_EDIT
+
+    if mentions_preferences(text) or TRAVEL_RE.search(text):
+        return PLAN
+    if OFF_TOPIC_RE.search(text):
+        return OFF_TOPIC
+    return PLAN
@@ -0,0 +1,120 @@
+"""Incremental extraction of JSON values from model output.
+
+Models wrap their JSON in prose, code fences or a second object. The parser
+here scans text chunk by chunk, tracking only string and bracket state, and
+returns the first complete top-level object or array that decodes (and that
+`accept` approves) as soon as its closing bracket arrives, so a streaming
+caller can stop generation there instead of waiting for the completion.
+
+backend/browser-agent and backend/photo-verification deploy on their own and
+keep a copy of this file next to their scripts; copy it there after editing
+it here (test_jsonstream checks they match). Keep it free of imports from
+this package.
+"""
+
+import json
+import re
+from typing import Callable, Iterable
+
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_IN_STRING = re.compile(r'["\\]')
+_INVALID = object()
+
+
+class JsonStreamParser:
+    """Find the first complete JSON object/array in text fed piece by piece.
+
+    `openers` limits which brackets may start a value ("{" for objects only).
+    A balanced span that does not decode, or that `accept` rejects, is skipped
+    and scanning resumes inside it, so "{not json} {"a": 1}" and an object
+    nested in prose-with-braces are both found.
+    """
+
+    def __init__(self, openers: str = "{[", accept: Callable[[object], bool] | None = None):
+        self.openers = openers
+        self.accept = accept
+        self.value = None
+        self.done = False
+        self._parts: list[str] = []  # text of the value in progress
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str):
+        """Consume `chunk`; returns the value once complete, None until then."""
+        while chunk and not self.done:
+            chunk = self._scan(chunk)
+        return self.value
+
+    def _scan(self, chunk: str) -> str:
+        """Scan one chunk; returns text that has to be scanned again, if any."""
+        start = i = 0
+        if self._depth == 0:
+            start = self._find_opener(chunk, 0)
+            if start < 0:
+                return ""
+            self._depth, self._in_string, self._escaped = 1, False, False
+            i = start + 1
+        n = len(chunk)
+        while i < n:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    i += 1
+                    continue
+                m = _IN_STRING.search(chunk, i)
+                if m is None:
+                    break
+                if m.group() == "\\":
+                    self._escaped = True
+                else:
+                    self._in_string = False
+                i = m.end()
+                continue
+
+            m = _STRUCTURAL.search(chunk, i)
+            if m is None:
+                break
+            ch = m.group()
+            i = m.end()
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    text = "".join(self._parts) + chunk[start:i]
+                    self._parts = []
+                    value = self._decode(text)
+                    if value is not _INVALID:
+                        self.value, self.done = value, True
+                        return ""
+                    return text[1:] + chunk[i:]  # rescan inside the rejected span
+        self._parts.append(chunk[start:])
+        return ""
+
+    def _find_opener(self, buf: str, i: int) -> int:
+        found = [p for p in (buf.find(c, i) for c in self.openers) if p >= 0]
+        return min(found) if found else -1
+
+    def _decode(self, text: str):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return _INVALID
+        if self.accept is not None and not self.accept(value):
+            return _INVALID
+        return value
+
+
+def first_json(text: str | Iterable[str], openers: str = "{[",
+               accept: Callable[[object], bool] | None = None):
+    """First complete JSON value in `text` (a string or chunks), or None."""
+    parser = JsonStreamParser(openers, accept)
+    for chunk in [text] if isinstance(text, str) else text:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.value
+
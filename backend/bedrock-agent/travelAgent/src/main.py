@@ -1,19 +1,85 @@
+import asyncio
 import os
 import json
-import re
+import time
+from contextlib import aclosing
+from functools import partial
 from pathlib import Path
+from typing import AsyncGenerator, Generator
 
 os.environ["BYPASS_TOOL_CONSENT"] = "true"
 
 from jinja2 import Environment, FileSystemLoader
+from pydantic import ValidationError
 from strands import Agent
+from strands.types.exceptions import StructuredOutputException
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from model.load import load_model
-from models import Route, RouteChallenge, WorkflowResult
+from cache import ROUTE_CACHE, route_cache_key
+from candidates import prune_candidates, serialize_compact
+from catalog import CATALOGS, ChallengeCatalog
+from deadline import Deadline, StageTimeout
+from edits import parse_edit
+from geo import GeoPoint, parse_point
+from helpers import encode_json
+from intent import PLAN, ROUTE_EDIT, ROUTE_QUESTION, TEMPLATED_REPLIES, classify_intent
+from jsonstream import JsonStreamParser, first_json
+from model.load import MODEL_ID, invoke_agent_async, iterate_on_model_loop, load_model
+from model.pool import AgentPool
+from models import (
+    BatchResult,
+    GuideReply,
+    ResearchPlan,
+    Route,
+    TravelPreferences,
+    WorkflowResult,
+)
+from preferences import extract_preferences
+from records import PlannedRoute, RouteStop, wire_location
+from routing import edit_route, solve_route
+from sessions import SESSION_RECENT_TURNS, SESSIONS, Session
+from speculation import SPECULATION, same_route_inputs, should_speculate
+from telemetry import record_agent_call, record_fallback, record_parse, stage_span
+from travel import find_district
+from streaming import (
+    BATCH_ITEM,
+    PREFERENCES,
+    RESULT,
+    ROUTE,
+    TOKEN,
+    JsonFieldStreamer,
+    stream_agent_text_async,
+    stream_event,
+)
 
 app = BedrockAgentCoreApp()
 log = app.logger
 
+# "research" asks the Research agent to pick stops; "local" solves the route
+# in-process and skips that model call entirely.
+ROUTE_ENGINE = os.getenv("ROUTE_ENGINE", "research")
+
+# Agents that answer through the model's structured-output tool, validated
+# against the schemas in models.py, instead of free-text JSON: a comma list of
+# "planner", "research", "guide", or "all". Structured Guide answers arrive
+# in one piece rather than streamed token by token.
+STRUCTURED_OUTPUT = {
+    name.strip() for name in os.getenv("STRUCTURED_OUTPUT", "").split(",") if name.strip()
+}
+if "all" in STRUCTURED_OUTPUT:
+    STRUCTURED_OUTPUT = {"planner", "research", "guide"}
+
+# Minimum rule-based extraction confidence for skipping the Planner agent.
+PLANNER_FAST_PATH_CONFIDENCE = float(os.getenv("PLANNER_FAST_PATH_CONFIDENCE", "0.7"))
+
+# "nearby" mode defaults, and how far from a user-supplied start point
+# the workflow looks for stops.
+NEARBY_RADIUS_KM = float(os.getenv("NEARBY_RADIUS_KM", "1.5"))
+NEARBY_LIMIT = int(os.getenv("NEARBY_LIMIT", "10"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+START_RADIUS_KM = float(os.getenv("START_RADIUS_KM", "3"))
+
 PROMPTS_DIR = Path(__file__).parent / "prompts"
 _jinja_env = Environment(
     loader=FileSystemLoader(str(PROMPTS_DIR)),
@@ -26,50 +92,68 @@ def load_prompt(name: str, **kwargs) -> str:
     return template.render(**kwargs)
 
 
-# ── Duration helpers ─────────────────────────────────────────
-
-def parse_duration_seconds(duration_str: str) -> int:
-    parts = duration_str.strip().split(":")
-    if len(parts) == 3:
-        return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-    return 0
-
-
-def seconds_to_duration(total_seconds: int) -> str:
-    h = total_seconds // 3600
-    m = (total_seconds % 3600) // 60
-    s = total_seconds % 60
-    return f"{h:02d}:{m:02d}:{s:02d}"
-
-
-def calculate_total_duration(challenges: list) -> str:
-    total = sum(
-        parse_duration_seconds(c.get("expected_duration", "00:00:00"))
-        for c in challenges
-    )
-    return seconds_to_duration(total)
-
+# ── Parsing helpers ──────────────────────────────────────────
 
 def extract_json(text: str) -> dict:
-    """Extract JSON object from text that may contain extra commentary."""
-    cleaned = re.sub(r"```(?:json)?\s*", "", text).strip()
-    match = re.search(r"\{[\s\S]*\}", cleaned)
-    if match:
-        return json.loads(match.group())
-    return {}
+    """First complete JSON object in text that may contain extra commentary ({} if none)."""
+    return first_json(text, openers="{") or {}
+
 
+def agent_output(result, agent: str) -> dict:
+    """An agent's answer as a dict: its structured output if it produced one,
+    else the first JSON object in its text. Records whether one was found."""
+    structured = getattr(result, "structured_output", None)
+    if structured is not None:
+        data, mode = structured.model_dump(), "structured"
+    else:
+        data, mode = extract_json(str(result)), "text"
+    record_parse(agent, bool(data), mode)
+    return data
 
-def parse_lat(coord: str) -> float:
-    return float(coord.replace("°", "").replace("N", "").replace("S", "").replace(" ", ""))
 
+async def agent_json(pool: AgentPool, prompt: str, agent: str,
+                     output_model: type) -> tuple[dict, object | None]:
+    """One Planner / Research call; returns (its answer as a dict, the AgentResult).
 
-def parse_lng(coord: str) -> float:
-    return float(coord.replace("°", "").replace("E", "").replace("W", "").replace(" ", ""))
+    In structured-output mode the call is awaited whole. Otherwise its text is
+    fed to a JsonStreamParser as it streams and the call is closed once the
+    first object is complete, so trailing commentary is never generated; the
+    AgentResult is then None.
+    """
+    if agent in STRUCTURED_OUTPUT:
+        with pool.acquire() as instance:
+            result = await invoke_agent_async(instance, prompt, structured_output_model=output_model)
+        return agent_output(result, agent), result
+
+    parser = JsonStreamParser(openers="{")
+    results = []
+    chunks = stream_agent_text_async(pool.acquire, prompt, on_result=results.append)
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            parser.feed(chunk)
+            if parser.done:
+                break
+    data = parser.value or {}
+    record_parse(agent, bool(data), "text")
+    return data, results[0] if results else None
+
+
+def structured_kwargs(agent: str, output_model: type) -> dict:
+    """invoke_async kwargs requesting `output_model` when `agent` is in STRUCTURED_OUTPUT."""
+    return {"structured_output_model": output_model} if agent in STRUCTURED_OUTPUT else {}
+
+
+def input_tokens(result) -> int:
+    """Input tokens the model reported for an agent call (0 if unavailable)."""
+    try:
+        return int(result.metrics.accumulated_usage.get("inputTokens", 0))
+    except AttributeError:
+        return 0
 
 
-def build_fallback_route(prefs: dict, challenges: list) -> Route | None:
+def build_fallback_route(prefs: dict, catalog: ChallengeCatalog) -> PlannedRoute | None:
     """Build a route when the Research agent fails to produce valid output."""
-    if not challenges:
+    if not catalog.challenges:
         return None
 
     interests = [i.lower() for i in prefs.get("interests", [])]
@@ -77,57 +161,48 @@ def build_fallback_route(prefs: dict, challenges: list) -> Route | None:
     time_hours = prefs.get("available_time_hours", 4)
     time_seconds = time_hours * 3600
 
-    filtered = challenges
-    if interests:
-        type_match = [c for c in challenges if c.get("type", "").lower() in interests]
-        if type_match:
-            filtered = type_match
+    # Catalog views are already score-sorted; filtering keeps that order.
+    filtered = catalog.of_types(interests) if interests else []
+    if not filtered:
+        filtered = catalog.by_score
 
     if difficulty != "any":
-        diff_match = [c for c in filtered if c.get("difficulty", "").lower() == difficulty]
+        if filtered is catalog.by_score:
+            diff_match = catalog.by_difficulty.get(difficulty, [])
+        else:
+            diff_match = [c for c in filtered if c.get("difficulty", "").lower() == difficulty]
         if diff_match:
             filtered = diff_match
 
-    filtered.sort(key=lambda c: c.get("score", 0), reverse=True)
+    travel = catalog.travel
+
+    def hop(a: dict, b: dict) -> int:
+        if a["chlgID"] in travel and b["chlgID"] in travel:
+            return travel.seconds(a["chlgID"], b["chlgID"])
+        return 900  # 15 min when the location is unknown
 
     selected = []
     total_secs = 0
     for c in filtered:
-        dur = parse_duration_seconds(c.get("expected_duration", "01:00:00"))
-        travel_buffer = 900 * len(selected)  # 15 min between each stop
+        dur = catalog.durations[c["chlgID"]]
+        travel_buffer = hop(selected[-1], c) if selected else 0
         if total_secs + dur + travel_buffer <= time_seconds:
             selected.append(c)
-            total_secs += dur
+            total_secs += dur + travel_buffer
         if len(selected) >= 6:
             break
 
     if not selected:
         selected = filtered[:1]
 
-    try:
-        selected.sort(key=lambda c: parse_lat(c["location"][0]))
-    except (ValueError, IndexError, KeyError):
-        pass
-
-    route_challenges = [
-        RouteChallenge(
-            chlgID=c["chlgID"],
-            title=c["title"],
-            type=c["type"],
-            location=c["location"],
-            expected_duration=c["expected_duration"],
-            reason="Best match for your preferences",
-        )
+    points = catalog.points
+    selected.sort(key=lambda c: points[c["chlgID"]].lat if c["chlgID"] in points else 0.0)
+
+    stops = [
+        RouteStop.from_catalog(catalog, c["chlgID"], "Best match for your preferences")
         for c in selected
     ]
-
-    return Route(
-        challenges=route_challenges,
-        total_duration=calculate_total_duration(selected),
-        estimated_travel_time=seconds_to_duration(900 * max(0, len(selected) - 1)),
-        start_location=selected[0]["location"],
-        end_location=selected[-1]["location"],
-    )
+    return PlannedRoute(stops, sum(hop(a, b) for a, b in zip(selected, selected[1:])))
 
 
 # ── Agent 1: Planner ─────────────────────────────────────────
@@ -160,184 +235,914 @@ def create_guide(challenge_count: int = 0):
     )
 
 
-# ── Route builder ────────────────────────────────────────────
+# ── Agent pools ──────────────────────────────────────────────
+# One shared model client; agents are recycled with their conversation reset.
 
-def build_route_from_research(research_json: dict, all_challenges: list) -> Route | None:
-    challenge_lookup = {c["chlgID"]: c for c in all_challenges}
+PLANNERS = AgentPool(create_planner)
+RESEARCHERS = AgentPool(create_research)
+GUIDES = AgentPool(create_guide)
 
-    ordered_challenges: list[RouteChallenge] = []
+
+# ── Route builder ────────────────────────────────────────────
+
+def build_route_from_research(research_json: dict, catalog: ChallengeCatalog) -> PlannedRoute | None:
+    stops: list[RouteStop] = []
     route_order = research_json.get("route_order", [])
     selected = {c["chlgID"]: c for c in research_json.get("selected_challenges", [])}
 
     for chlg_id in route_order:
-        if chlg_id in selected:
-            ordered_challenges.append(RouteChallenge(**selected[chlg_id]))
-        elif chlg_id in challenge_lookup:
-            orig = challenge_lookup[chlg_id]
-            ordered_challenges.append(RouteChallenge(
-                chlgID=orig["chlgID"],
-                title=orig["title"],
-                type=orig["type"],
-                location=orig["location"],
-                expected_duration=orig["expected_duration"],
-            ))
-
-    if not ordered_challenges:
+        # The catalog is authoritative for everything but the agent's reason;
+        # the compact research table does not carry the wire location format.
+        # IDs the agent invented are dropped.
+        if chlg_id in catalog.by_id:
+            reason = selected.get(chlg_id, {}).get("reason")
+            stops.append(RouteStop.from_catalog(catalog, chlg_id, reason))
+
+    if not stops:
         return None
 
-    return Route(
-        challenges=ordered_challenges,
-        total_duration=calculate_total_duration(
-            [c.model_dump() for c in ordered_challenges]
-        ),
-        estimated_travel_time=research_json.get("estimated_travel_time", "00:00:00"),
-        start_location=ordered_challenges[0].location,
-        end_location=ordered_challenges[-1].location,
-    )
+    return PlannedRoute(stops, catalog.travel.route_seconds([stop.chlgID for stop in stops]))
 
 
-# ── Workflow orchestrator ────────────────────────────────────
+# ── Workflow steps ───────────────────────────────────────────
+# Shared by the blocking and the asyncio orchestrators below; none of these
+# call a model.
 
-def run_travel_workflow(message: str, challenges: list, history: list) -> WorkflowResult:
-    log.info("[Workflow] Starting planner → research → guide pipeline")
+def restrict_to_start(catalog: ChallengeCatalog, start: GeoPoint | None,
+                      start_radius_km: float) -> ChallengeCatalog:
+    if start is None:
+        return catalog
+    local = catalog.around(start, start_radius_km)
+    log.info("[Spatial] %d of %d challenge(s) within %.1f km of start",
+             len(local.challenges), len(catalog.challenges), start_radius_km)
+    return local if local.challenges else catalog
 
-    # Step 1: Planner
-    planner = create_planner()
-    planner_response = planner(
-        f"Extract travel preferences from this message: '{message}'"
-    )
-    preferences = str(planner_response)
-    log.info("[Planner] %s", preferences)
 
-    try:
-        prefs_json = extract_json(preferences)
-        available_time = prefs_json.get("available_time_hours", 4)
-    except (json.JSONDecodeError, AttributeError):
-        prefs_json = {}
-        available_time = 4
-
-    # Step 2: Research
-    research = create_research()
+def planner_prompt(message: str) -> str:
+    return f"Extract travel preferences from this message: '{message}'"
+
+
+def solve_locally(prefs_json: dict, catalog: ChallengeCatalog) -> PlannedRoute | None:
+    started = time.perf_counter()
+    with stage_span("route_build", engine="local", **{"catalog.challenges": len(catalog)}) as span:
+        route = solve_route(prefs_json, catalog)
+        span.set_attribute("route.stops", len(route.challenges) if route else 0)
+    log.info("[Solver] %d stop(s) in %.1f ms",
+             len(route.challenges) if route else 0,
+             (time.perf_counter() - started) * 1000)
+    return route
+
+
+def research_request(prefs_json: dict, preferences: str, available_time,
+                     catalog: ChallengeCatalog) -> tuple[list, str]:
+    """Shortlist candidates and render the Research user message."""
+    shortlist = prune_candidates(prefs_json, catalog)
     research_user_msg = load_prompt(
         "research_user",
         preferences=preferences,
-        challenges_json=json.dumps(challenges, indent=2),
-        challenge_count=len(challenges),
+        challenges_table=serialize_compact(shortlist),
+        challenge_count=len(shortlist),
+        total_count=len(catalog.challenges),
         available_time=available_time,
     )
-    research_response = research(research_user_msg)
-    research_text = str(research_response)
-    log.info("[Research] %s", research_text[:500])
+    return shortlist, research_user_msg
 
-    try:
-        research_json = extract_json(research_text)
-    except json.JSONDecodeError:
-        log.error("[Research] Failed to parse JSON")
-        research_json = {}
 
-    route = build_route_from_research(research_json, challenges)
+def route_from_research_response(research_json: dict, research_response, shortlist: list,
+                                 research_user_msg: str,
+                                 catalog: ChallengeCatalog) -> PlannedRoute | None:
+    log.info("[Research] prompt: %d/%d candidates, %d chars, %d input tokens",
+             len(shortlist), len(catalog.challenges), len(research_user_msg),
+             input_tokens(research_response))
+    log.info("[Research] %s", encode_json(research_json)[:500])
 
-    if route is None:
-        log.warning("[Research] Route build failed, using fallback")
-        route = build_fallback_route(prefs_json, challenges)
+    with stage_span("route_build", engine="research") as span:
+        if not research_json:
+            log.error("[Research] No JSON object in response")
+        span.set_attribute("json.parsed", bool(research_json))
+        route = build_route_from_research(research_json, catalog)
+        span.set_attribute("route.stops", len(route.challenges) if route else 0)
+    return route
 
-    # Step 3: Guide
-    if history:
-        history_str = "\n".join(
-            [f"{h['role']}: {h['content']}" for h in history[-6:]]
-        )
-    else:
-        history_str = "This is the start of the conversation."
+
+def history_text(history: list) -> str:
+    """The conversation for the Guide prompt: a session summary, if any, plus recent turns."""
+    summary = history[:1] if history and history[0]["role"] == "summary" else []
+    lines = [f"Earlier in this conversation:\n{h['content']}" for h in summary]
+    recent = history[len(summary):][-SESSION_RECENT_TURNS:]
+    lines += [f"{h['role']}: {h['content']}" for h in recent]
+    return "\n".join(lines) or "This is the start of the conversation."
+
+
+def guide_request(message: str, history: list, route: PlannedRoute | None,
+                  catalog: ChallengeCatalog) -> tuple[str, str]:
+    """(system prompt, user message) for the Guide."""
+    history_str = history_text(history)
 
     social_info = ""
     if route:
         for rc in route.challenges:
-            orig = next(
-                (c for c in challenges if c["chlgID"] == rc.chlgID), None
-            )
-            if orig and orig.get("joined_people"):
-                count = len(orig["joined_people"])
-                if count > 0:
-                    social_info += f"- {rc.title}: {count} other traveler(s) already joined\n"
+            count = catalog.participants.get(rc.chlgID, 0)
+            if count > 0:
+                social_info += f"- {rc.title}: {count} other traveler(s) already joined\n"
 
-    route_dict = route.model_dump() if route else {}
     challenge_count = len(route.challenges) if route else 0
-    guide = create_guide(challenge_count=challenge_count)
     guide_user_msg = load_prompt(
         "guide_user",
         history=history_str,
         message=message,
-        route_json=json.dumps(route_dict, indent=2),
+        route_json=encode_json(route.to_wire() if route else {}),
         social_info=social_info if social_info else "No other travelers yet — they could be the first!",
         total_duration=route.total_duration if route else "N/A",
         travel_time=route.estimated_travel_time if route else "N/A",
     )
-    guide_response = guide(guide_user_msg)
-    guide_text = str(guide_response)
-    log.info("[Guide] Response written")
+    return load_prompt("guide", challenge_count=challenge_count), guide_user_msg
+
+
+def templated_guide_message(route: PlannedRoute | None) -> str:
+    """Guide text without the Guide agent, used when it would miss the deadline."""
+    if route is None:
+        return ("I couldn't put a route together just now — tell me how much time you "
+                "have and what you're into, and I'll try again!")
+    lines = [f"Here's a {len(route.challenges)}-stop route for you:"]
+    lines += [
+        f"{i}. {rc.title} ({rc.type}, {rc.expected_duration}) — {rc.reason}"
+        for i, rc in enumerate(route.challenges, 1)
+    ]
+    lines.append(f"Total time: {route.total_duration}, plus about "
+                 f"{route.estimated_travel_time} travelling between stops.")
+    lines.append("Ready to start this route?")
+    return "\n".join(lines)
+
+
+def guide_response_text(guide_text: str) -> str:
+    """Friendly text from the Guide's JSON; the code-built route stays authoritative."""
+    return extract_json(guide_text).get("response", guide_text)
+
+
+# ── Workflow orchestrator ────────────────────────────────────
+# Runs on the caller's event loop: model calls are awaited (bounded by
+# MAX_INFLIGHT_MODEL_CALLS per loop) and CPU-bound steps run in worker
+# threads, so one process serves many sessions concurrently. Blocking callers
+# use travel_workflow_events / run_travel_workflow, which drive the same
+# pipeline on the shared model loop.
+
+async def select_route(prefs_json: dict, preferences: str, available_time,
+                       catalog: ChallengeCatalog, route_engine: str) -> PlannedRoute | None:
+    """Pick and order stops with the Research agent or the local solver."""
+    if route_engine == "local":
+        return await asyncio.to_thread(solve_locally, prefs_json, catalog)
+
+    shortlist, research_user_msg = await asyncio.to_thread(
+        research_request, prefs_json, preferences, available_time, catalog
+    )
+    with stage_span("research", candidates=len(shortlist),
+                    **{"catalog.challenges": len(catalog)}) as span:
+        try:
+            research_json, research_response = await agent_json(
+                RESEARCHERS, research_user_msg, "research", ResearchPlan
+            )
+        except StructuredOutputException as e:
+            log.error("[Research] Structured output failed: %s", e)
+            record_parse("research", False, "structured")
+            return None
+        record_agent_call(span, research_response, MODEL_ID, research_user_msg)
+    return await asyncio.to_thread(
+        route_from_research_response, research_json, research_response, shortlist,
+        research_user_msg, catalog
+    )
+
 
-    # Parse Guide JSON — extract friendly text, keep code-built route as authority
+async def cached_route(prefs_json: dict, preferences: str, available_time,
+                       catalog: ChallengeCatalog, route_engine: str
+                       ) -> tuple[PlannedRoute | None, float]:
+    """select_route behind the route cache; returns (route, seconds spent)."""
+    started = time.perf_counter()
+    cache_key = route_cache_key(prefs_json, catalog.fingerprint, route_engine)
+    cached = await asyncio.to_thread(ROUTE_CACHE.get, cache_key)
+    if cached is not None:
+        log.info("[Cache] route hit %s", ROUTE_CACHE.stats())
+        return PlannedRoute.from_wire(cached), time.perf_counter() - started
+
+    log.info("[Cache] route miss %s", ROUTE_CACHE.stats())
+    route = await select_route(prefs_json, preferences, available_time, catalog, route_engine)
+    if route is not None:
+        await asyncio.to_thread(ROUTE_CACHE.set, cache_key, route.to_wire())
+    return route, time.perf_counter() - started
+
+
+async def travel_workflow_events_async(message: str, catalog: ChallengeCatalog, history: list,
+                                       route_engine: str = ROUTE_ENGINE,
+                                       start: GeoPoint | None = None,
+                                       start_radius_km: float = START_RADIUS_KM,
+                                       deadline: Deadline | None = None,
+                                       ) -> AsyncGenerator[dict, None]:
+    """Run planner → research → guide, yielding staged events as each step lands.
+
+    With a `start` point, only challenges within `start_radius_km` of it are
+    considered (the whole catalog if none are). Each stage runs against
+    `deadline`; one that would overrun is replaced by its local fallback and
+    listed in metadata["degraded"]. The last event is the RESULT event,
+    carrying the WorkflowResult object.
+    """
+    deadline = deadline or Deadline()
+    result_event = None
+    # Callers stop at the RESULT event without closing the generator, so the
+    # root span has to end before it is handed over.
+    with stage_span("workflow", route_engine=route_engine,
+                    **{"catalog.challenges": len(catalog)}) as span:
+        async for event in _workflow_events(
+            message, catalog, history, route_engine, start, start_radius_km, deadline
+        ):
+            if event["type"] == RESULT:
+                result_event = event
+                break
+            yield event
+        span.set_attribute("degraded", ",".join(deadline.degraded))
+    if result_event is not None:
+        yield result_event
+
+
+async def _workflow_events(message: str, catalog: ChallengeCatalog, history: list,
+                           route_engine: str, start: GeoPoint | None, start_radius_km: float,
+                           deadline: Deadline) -> AsyncGenerator[dict, None]:
+    log.info("[Workflow] Starting planner → %s → guide pipeline", route_engine)
+    catalog = await asyncio.to_thread(restrict_to_start, catalog, start, start_radius_km)
+    metadata: dict = {}
+
+    # Step 1: Planner (skipped when the local parser is confident enough).
+    # Otherwise route selection may start from the parser's guess while it runs.
+    prefs_json, confidence = extract_preferences(message)
+    speculative = None
+    route = None
+    hit = False
     try:
-        guide_json = extract_json(guide_text)
-        response_text = guide_json.get("response", guide_text)
-    except (json.JSONDecodeError, Exception):
-        response_text = guide_text
+        if confidence >= PLANNER_FAST_PATH_CONFIDENCE:
+            with stage_span("planner", fast_path=True, confidence=confidence):
+                preferences = json.dumps(prefs_json)
+                available_time = prefs_json["available_time_hours"]
+                log.info("[Planner] fast path (confidence %.2f) %s", confidence, preferences)
+        else:
+            guess = prefs_json
+            if should_speculate(message, route_engine):
+                speculative = asyncio.create_task(cached_route(
+                    guess, json.dumps(guess), guess["available_time_hours"], catalog, route_engine
+                ))
+            planner_started = time.perf_counter()
+            with stage_span("planner", fast_path=False, confidence=confidence) as span:
+                try:
+                    prompt = planner_prompt(message)
+                    planned, planner_response = await deadline.run("planner", agent_json(
+                        PLANNERS, prompt, "planner", TravelPreferences
+                    ))
+                    record_agent_call(span, planner_response, MODEL_ID, prompt)
+                    log.info("[Planner] (parser confidence %.2f) %s", confidence, planned)
+                    prefs_json = planned or guess
+                    span.set_attribute("json.parsed", prefs_json is not guess)
+                    if prefs_json is guess:
+                        log.warning("[Planner] No preferences in response, using parsed ones")
+                        record_fallback("planner", "parse_failed")
+                except StageTimeout:
+                    deadline.degrade("planner")
+                    span.set_attribute("degraded", True)
+                    record_fallback("planner", "deadline")
+                    log.warning("[Deadline] planner timed out, using parsed preferences %s", guess)
+                except StructuredOutputException as e:
+                    record_parse("planner", False, "structured")
+                    record_fallback("planner", "parse_failed")
+                    log.error("[Planner] Structured output failed (%s), using parsed preferences", e)
+                preferences = json.dumps(prefs_json)
+                available_time = prefs_json.get("available_time_hours", 4)
+            planner_seconds = time.perf_counter() - planner_started
+
+        yield stream_event(PREFERENCES, preferences=prefs_json)
+
+        # Step 2: Research (or the local solver), skipped for repeated intents
+        if speculative is not None:
+            hit = same_route_inputs(guess, prefs_json)
+            if hit:
+                try:
+                    route, spec_seconds = await deadline.run("route", speculative)
+                except StageTimeout:
+                    # Nothing was saved; the fallback route below takes over.
+                    deadline.degrade("route")
+                    hit = False
+                except Exception:
+                    log.warning("[Speculation] speculative route failed", exc_info=True)
+                    hit = False
+            else:
+                speculative.cancel()
+            # Run back to back, the two steps would have taken planner + speculative time.
+            saved = min(planner_seconds, spec_seconds) if hit else 0.0
+            SPECULATION.record(hit, saved)
+            metadata["speculation"] = {"hit": hit, "saved_ms": round(saved * 1000)}
+            log.info("[Speculation] %s, saved %.0f ms %s",
+                     "hit" if hit else "miss", saved * 1000, SPECULATION.stats())
+    finally:
+        # A Planner error or a closed stream leaves nothing to await the guess.
+        if speculative is not None and not speculative.done():
+            speculative.cancel()
+    if not hit and "route" not in deadline.degraded:
+        try:
+            route, _ = await deadline.run("route", cached_route(
+                prefs_json, preferences, available_time, catalog, route_engine
+            ))
+        except StageTimeout:
+            deadline.degrade("route")
+
+    if "route" in deadline.degraded:
+        log.warning("[Deadline] route selection timed out, using fallback")
+    if route is None:
+        log.warning("[Research] Route build failed, using fallback")
+        reason = "deadline" if "route" in deadline.degraded else "route_failed"
+        record_fallback("route", reason)
+        with stage_span("fallback", reason=reason, fallback=True) as span:
+            route = await asyncio.to_thread(build_fallback_route, prefs_json, catalog)
+            span.set_attribute("route.stops", len(route.challenges) if route else 0)
 
-    return WorkflowResult(response=response_text, route=route)
+    yield stream_event(ROUTE, route=route.to_wire() if route else None)
+
+    # Step 3: Guide
+    guide_prompt, guide_user_msg = guide_request(message, history, route, catalog)
+    streamer = JsonFieldStreamer("response")
+    guide_chunks = []
+    response_parts = []
+    guide_results = []
+    with stage_span("guide", **{"route.stops": len(route.challenges) if route else 0}) as span:
+        try:
+            if "guide" in STRUCTURED_OUTPUT:
+                with GUIDES.acquire(system_prompt=guide_prompt) as guide:
+                    guide_response = await deadline.run("guide", invoke_agent_async(
+                        guide, guide_user_msg, structured_output_model=GuideReply
+                    ))
+                guide_results.append(guide_response)
+                response_text = (agent_output(guide_response, "guide").get("response")
+                                 or templated_guide_message(route))
+                yield stream_event(TOKEN, text=response_text)
+            else:
+                guide_stream = deadline.iterate("guide", stream_agent_text_async(
+                    partial(GUIDES.acquire, system_prompt=guide_prompt), guide_user_msg,
+                    on_result=guide_results.append,
+                ))
+                async with aclosing(guide_stream):
+                    async for chunk in guide_stream:
+                        guide_chunks.append(chunk)
+                        text = streamer.feed(chunk)
+                        if text:
+                            response_parts.append(text)
+                            yield stream_event(TOKEN, text=text)
+                        if streamer.done:
+                            # What follows is the Guide's copy of the route, which
+                            # is discarded anyway — stop generating it.
+                            break
+                if streamer.done:
+                    response_text = "".join(response_parts)
+                    span.set_attribute("stopped_early", not guide_results)
+                else:
+                    response_text = guide_response_text("".join(guide_chunks))
+                record_parse("guide", streamer.done, "text")
+                span.set_attribute("json.parsed", streamer.done)
+            log.info("[Guide] Response written")
+        except StageTimeout:
+            deadline.degrade("guide")
+            span.set_attribute("degraded", True)
+            record_fallback("guide", "deadline")
+            response_text = templated_guide_message(route)
+            log.warning("[Deadline] guide timed out, using templated message")
+        except StructuredOutputException as e:
+            record_parse("guide", False, "structured")
+            record_fallback("guide", "parse_failed")
+            response_text = templated_guide_message(route)
+            log.error("[Guide] Structured output failed (%s), using templated message", e)
+        record_agent_call(span, guide_results[0] if guide_results else None,
+                          MODEL_ID, guide_user_msg)
+
+    if deadline.degraded:
+        metadata["degraded"] = deadline.degraded
+    # The one place the route is validated against models.Route.
+    result = WorkflowResult(response=response_text, route=route.to_wire() if route else None,
+                            metadata=metadata)
+    yield stream_event(RESULT, result=result)
+
+
+async def run_travel_workflow_async(message: str, catalog: ChallengeCatalog | list, history: list,
+                                    route_engine: str = ROUTE_ENGINE,
+                                    start: GeoPoint | None = None,
+                                    start_radius_km: float = START_RADIUS_KM,
+                                    deadline: Deadline | None = None) -> WorkflowResult:
+    if not isinstance(catalog, ChallengeCatalog):
+        catalog = await asyncio.to_thread(ChallengeCatalog, "adhoc", catalog)
+    async for event in travel_workflow_events_async(
+        message, catalog, history, route_engine, start, start_radius_km, deadline
+    ):
+        if event["type"] == RESULT:
+            return event["result"]
+    raise RuntimeError("workflow ended without a result")
+
+
+def travel_workflow_events(message: str, catalog: ChallengeCatalog, history: list,
+                           route_engine: str = ROUTE_ENGINE, start: GeoPoint | None = None,
+                           start_radius_km: float = START_RADIUS_KM,
+                           deadline: Deadline | None = None
+                           ) -> Generator[dict, None, WorkflowResult]:
+    """Blocking travel_workflow_events_async; the generator returns the WorkflowResult."""
+    for event in iterate_on_model_loop(travel_workflow_events_async(
+        message, catalog, history, route_engine, start, start_radius_km, deadline
+    )):
+        if event["type"] == RESULT:
+            return event["result"]
+        yield event
+    raise RuntimeError("workflow ended without a result")
+
+
+def run_travel_workflow(message: str, catalog: ChallengeCatalog | list, history: list,
+                        route_engine: str = ROUTE_ENGINE, start: GeoPoint | None = None,
+                        start_radius_km: float = START_RADIUS_KM,
+                        deadline: Deadline | None = None) -> WorkflowResult:
+    if not isinstance(catalog, ChallengeCatalog):
+        catalog = ChallengeCatalog("adhoc", catalog)
+    events = travel_workflow_events(message, catalog, history, route_engine,
+                                    start, start_radius_km, deadline)
+    while True:
+        try:
+            next(events)
+        except StopIteration as done:
+            return done.value
+
+
+# ── Nearby challenges ────────────────────────────────────────
+
+def resolve_point(value) -> GeoPoint | None:
+    """A request location: a district name, {"lat", "lng"} or a wire pair."""
+    if isinstance(value, str):
+        district = find_district(value)
+        return district.center if district else None
+    return parse_point(value)
+
+
+def nearby_result(catalog: ChallengeCatalog, near: GeoPoint, radius_km: float = NEARBY_RADIUS_KM,
+                  limit: int = NEARBY_LIMIT, available_minutes: float | None = None
+                  ) -> WorkflowResult:
+    """Challenges around a point, nearest first, answered from the spatial index."""
+    nearby = []
+    for chlg_id, km in catalog.spatial.within(near, radius_km):
+        c = catalog.by_id[chlg_id]
+        if available_minutes is not None and catalog.durations[chlg_id] > available_minutes * 60:
+            continue
+        nearby.append({
+            "chlgID": chlg_id,
+            "title": c.get("title", ""),
+            "type": c.get("type", ""),
+            "location": wire_location(c.get("location"), catalog.points.get(chlg_id)),
+            "expected_duration": c.get("expected_duration", ""),
+            "distance_km": round(km, 2),
+        })
+        if len(nearby) >= limit:
+            break
+
+    if nearby:
+        lines = [f"{len(nearby)} challenge(s) within {radius_km:g} km:"]
+        lines += [
+            f"- {n['title']} ({n['type']}, {n['distance_km']:g} km, {n['expected_duration']})"
+            for n in nearby
+        ]
+        response = "\n".join(lines)
+    else:
+        response = f"No challenges within {radius_km:g} km — try a larger radius."
+    return WorkflowResult(
+        response=response,
+        metadata={"nearby": nearby, "near": [near.lat, near.lng], "radius_km": radius_km},
+    )
+
+
+# ── Batch planning ───────────────────────────────────────────
+# Many preference profiles against one catalog (tour groups, nightly
+# pre-computation). Items share the catalog's indexes, travel model and the
+# route cache; the agent pools recycle agents between items.
+
+async def plan_from_preferences(prefs_json: dict, catalog: ChallengeCatalog, route_engine: str,
+                                deadline: Deadline, guide: bool) -> WorkflowResult:
+    """Route for a known preference set (no Planner); Guide text only if `guide`."""
+    preferences = json.dumps(prefs_json)
+    available_time = prefs_json.get("available_time_hours", 4)
+    route = None
+    try:
+        route, _ = await deadline.run("route", cached_route(
+            prefs_json, preferences, available_time, catalog, route_engine
+        ))
+    except StageTimeout:
+        deadline.degrade("route")
+    if route is None:
+        reason = "deadline" if "route" in deadline.degraded else "route_failed"
+        record_fallback("route", reason)
+        with stage_span("fallback", reason=reason, fallback=True):
+            route = await asyncio.to_thread(build_fallback_route, prefs_json, catalog)
+
+    if route is None:
+        result = WorkflowResult(response=templated_guide_message(None))
+    elif guide:
+        guide_prompt, guide_user_msg = guide_request(
+            f"Plan a route for these preferences: {preferences}", [], route, catalog
+        )
+        result = await guide_only(guide_prompt, guide_user_msg, route, deadline, "batch")
+    else:
+        result = WorkflowResult(response=templated_guide_message(route), route=route.to_wire())
+    result.metadata["preferences"] = prefs_json
+    if deadline.degraded:
+        result.metadata["degraded"] = deadline.degraded
+    return result
+
+
+async def plan_batch_item(item: dict, catalog: ChallengeCatalog, route_engine: str,
+                          budget: dict, guide: bool) -> WorkflowResult:
+    """One batch item: {"preferences": {...}} skips the Planner, {"prompt": "..."} runs it all."""
+    try:
+        if not isinstance(item, dict):
+            raise TypeError("batch items are objects")
+        deadline = Deadline.from_payload({**budget, **item})
+        if "preferences" in item:
+            prefs_json = TravelPreferences.model_validate(item["preferences"]).model_dump()
+            result = await plan_from_preferences(prefs_json, catalog, route_engine, deadline, guide)
+        else:
+            result = await run_travel_workflow_async(
+                item.get("prompt", ""), catalog, [], route_engine, deadline=deadline
+            )
+    except Exception as e:
+        log.error("[Batch] item failed: %s", e, exc_info=True)
+        result = WorkflowResult(response="", metadata={"error": type(e).__name__})
+    if isinstance(item, dict) and "id" in item:
+        result.metadata["id"] = item["id"]
+    return result
+
+
+async def batch_events(items: list, catalog: ChallengeCatalog, route_engine: str,
+                       concurrency: int, guide: bool,
+                       budget: dict) -> AsyncGenerator[dict, None]:
+    """BATCH_ITEM events as items finish, then a RESULT event with the BatchResult.
+
+    At most `concurrency` items are in flight; model calls are further bounded
+    by MAX_INFLIGHT_MODEL_CALLS. The catalog's travel model is built once, up
+    front, so items do not race to build it.
+    """
+    started = time.perf_counter()
+    cache_hits = ROUTE_CACHE.stats()["hits"]
+    with stage_span("batch_setup", **{"catalog.challenges": len(catalog)}):
+        await asyncio.to_thread(lambda: catalog.travel)
+    setup_seconds = time.perf_counter() - started
+
+    semaphore = asyncio.Semaphore(concurrency)
+    item_seconds = [0.0] * len(items)
+
+    async def run(index: int, item: dict) -> tuple[int, WorkflowResult]:
+        async with semaphore:
+            item_started = time.perf_counter()
+            result = await plan_batch_item(item, catalog, route_engine, budget, guide)
+            item_seconds[index] = time.perf_counter() - item_started
+            return index, result
+
+    results: list[WorkflowResult | None] = [None] * len(items)
+    tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            results[index] = result
+            yield stream_event(BATCH_ITEM, index=index, result=result.model_dump())
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    wall_seconds = time.perf_counter() - started
+    ranked = sorted(item_seconds)
+    metadata = {"batch": {
+        "items": len(items),
+        "errors": sum(1 for r in results if "error" in r.metadata),
+        "concurrency": concurrency,
+        "setup_ms": round(setup_seconds * 1000, 1),
+        "wall_ms": round(wall_seconds * 1000, 1),
+        "amortized_ms_per_item": round(wall_seconds * 1000 / max(len(items), 1), 1),
+        "item_ms_p50": round(ranked[len(ranked) // 2] * 1000, 1) if ranked else None,
+        "item_ms_max": round(ranked[-1] * 1000, 1) if ranked else None,
+        "route_cache_hits": ROUTE_CACHE.stats()["hits"] - cache_hits,
+    }}
+    log.info("[Batch] %s", metadata["batch"])
+    yield stream_event(RESULT, result=BatchResult(results=results, metadata=metadata))
+
+
+# ── Non-planning intents ─────────────────────────────────────
+
+NO_CHALLENGES_REPLY = ("Sorry — I don't have any challenges loaded right now. "
+                       "Give me a moment and try again!")
+
+
+async def guide_only(guide_prompt: str, guide_user_msg: str, route: PlannedRoute,
+                     deadline: Deadline, intent: str) -> WorkflowResult:
+    """One Guide call about `route`, which the result returns unchanged."""
+    metadata = {}
+    with stage_span("guide", intent=intent, **{"route.stops": len(route.challenges)}) as span:
+        try:
+            with GUIDES.acquire(system_prompt=guide_prompt) as guide:
+                guide_response = await deadline.run("guide", invoke_agent_async(
+                    guide, guide_user_msg, **structured_kwargs("guide", GuideReply)
+                ))
+            record_agent_call(span, guide_response, MODEL_ID, guide_user_msg)
+            response_text = agent_output(guide_response, "guide").get("response")
+            if not response_text:
+                record_fallback("guide", "parse_failed")
+                response_text = templated_guide_message(route)
+        except StageTimeout:
+            deadline.degrade("guide")
+            record_fallback("guide", "deadline")
+            span.set_attribute("degraded", True)
+            response_text = templated_guide_message(route)
+            metadata["degraded"] = deadline.degraded
+            log.warning("[Deadline] guide timed out, using templated message")
+        except StructuredOutputException as e:
+            log.error("[Guide] Structured output failed (%s), using templated message", e)
+            record_parse("guide", False, "structured")
+            record_fallback("guide", "parse_failed")
+            response_text = templated_guide_message(route)
+    return WorkflowResult(response=response_text, route=route.to_wire(), metadata=metadata)
+
+
+async def answer_route_question(message: str, history: list, route: PlannedRoute,
+                                deadline: Deadline) -> WorkflowResult:
+    """Answer a question about the current route; no planning."""
+    guide_user_msg = load_prompt(
+        "guide_answer",
+        history=history_text(history),
+        message=message,
+        route_json=encode_json(route.to_wire()),
+        total_duration=route.total_duration,
+        travel_time=route.estimated_travel_time,
+    )
+    guide_prompt = load_prompt("guide", challenge_count=len(route.challenges))
+    return await guide_only(guide_prompt, guide_user_msg, route, deadline, ROUTE_QUESTION)
+
+
+async def apply_route_edit(message: str, history: list, route: PlannedRoute,
+                           catalog: ChallengeCatalog, deadline: Deadline) -> WorkflowResult | None:
+    """Edit the current route locally and have only the Guide present it.
+
+    Returns None when the message is not a clear edit or the edit cannot be
+    applied; the caller then plans from scratch.
+    """
+    edit = parse_edit(message, route)
+    if edit is None:
+        return None
+    with stage_span("route_edit", kind=edit.kind, **{"route.stops": len(route.challenges)}) as span:
+        edited = await asyncio.to_thread(edit_route, route, edit, catalog)
+        span.set_attribute("applied", edited is not None)
+    if edited is None:
+        log.info("[Edit] %s could not be applied, replanning", edit.kind)
+        return None
+    log.info("[Edit] %s: %d -> %d stop(s)", edit.kind, len(route.challenges), len(edited.challenges))
+
+    guide_prompt, guide_user_msg = guide_request(message, history, edited, catalog)
+    result = await guide_only(guide_prompt, guide_user_msg, edited, deadline, ROUTE_EDIT)
+    result.metadata["edit"] = edit.describe()
+    return result
+
+
+def valid_route(route) -> dict | None:
+    """`route` as a wire dict if it is a well-formed Route, else None."""
+    if not isinstance(route, dict):
+        return None
+    try:
+        return Route.model_validate(route).model_dump()
+    except ValidationError:
+        return None
+
+
+def previous_route(session: Session | None, payload: dict, history: list) -> dict | None:
+    """The route the conversation is about: the session's, else one the client sent back.
+
+    Malformed routes are ignored, so the message is planned from scratch.
+    """
+    if session is not None and session.last_route:
+        route = valid_route(session.last_route)
+        if route is not None:
+            return route
+    route = payload.get("route")
+    if not route:
+        route = next((h["route"] for h in reversed(history) if h.get("route")), None)
+    return valid_route(route)
+
+
+# ── Sessions ─────────────────────────────────────────────────
+
+def open_session(context, history: list) -> Session | None:
+    """The caller's session; a client-sent history seeds it on the first turn."""
+    session_id = getattr(context, "session_id", None)
+    if not session_id:
+        return None
+    session = SESSIONS.get(session_id)
+    if not session.turns and history:
+        session.extend(history)
+    return session
+
+
+def remember_turn(session: Session, message: str, result: WorkflowResult) -> None:
+    session.add("user", message)
+    session.add("assistant", result.response,
+                result.route.model_dump() if result.route else None)
+    SESSIONS.save(session)
+    result.metadata["session"] = {"turns": session.turns, "summarized": session.folded}
 
 
 # ── AgentCore Runtime entrypoint ─────────────────────────────
 
+def payload_number(payload: dict, key: str, default, cast=float):
+    """payload[key] as `cast`, `default` when absent, None when it is not a number."""
+    value = payload.get(key)
+    if value is None:
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def final_payload(result: WorkflowResult | BatchResult, stream: bool):
+    """Last chunk of an invocation: a result event, or the legacy JSON string."""
+    return stream_event(RESULT, result=result.model_dump()) if stream else result.model_dump_json()
+
+
 @app.entrypoint
-def invoke(payload, context):
+async def invoke(payload, context):
     """
     Expected payload:
     {
         "prompt": "user message",
         "challenges": [ ...challenge objects from Firestore... ],
         "history": [ {"role": "user"|"assistant", "content": "..."} ]
+                                              (optional; only seeds a new session — see sessions.py),
+        "route": { ...the previous Route... }  (optional; what follow-ups refer to when
+                                              there is no session),
+        "route_engine": "research"|"local"   (optional, defaults to ROUTE_ENGINE),
+        "stream": true,                       (optional, staged events — see streaming.py)
+        "start": "Mongkok" | {"lat", "lng"} | ["22.319° N", "114.169° E"]
+                                              (optional, restricts stops to start_radius_km),
+        "latency_budget_ms": 20000            (optional, defaults to LATENCY_BUDGET_SECONDS)
     }
+
+    "mode": "nearby" skips the agents and lists challenges around "near"
+    (same formats as "start"), filtered by "radius_km", "limit" and
+    "available_minutes"; they are returned in metadata.nearby.
+
+    Requests with a runtime session id (the X-Amzn-Bedrock-AgentCore-Runtime-Session-Id
+    header) are remembered server-side, so the client sends only the new prompt;
+    metadata.session reports the stored and summarized turn counts.
+
+    "mode": "batch" plans every entry of "items" — {"prompt": "..."} or
+    {"preferences": {...planner schema...}}, each optionally with an "id" —
+    against the one catalog, "concurrency" at a time (default BATCH_CONCURRENCY),
+    and returns a BatchResult whose metadata.batch reports the amortized cost.
+    "guide": false skips the Guide for preference items (templated text).
+
+    Follow-ups about the previous route (the session's, or "route") are
+    answered, or edited locally ("drop the last stop", "2 more hours"), with a
+    single Guide call instead of replanning; see metadata.intent and metadata.edit.
+
+    Instead of "challenges", a client that has already sent its catalog may send
+    "catalog_version" (the id returned in metadata.catalog_version), or
+    "catalog_delta": {"base_version", "version"?, "added", "changed", "removed"}.
+    An unknown version yields metadata.catalog_miss=true; resend the full list.
     """
     message = payload.get("prompt", "")
-    challenges = payload.get("challenges", [])
     history = payload.get("history", [])
-
-    log.info("[Invoke] prompt=%s, challenges=%d, history=%d",
-             message[:100], len(challenges), len(history))
-
-    # Handle greetings without full pipeline
-    greetings = {"hi", "hey", "hello", "yo", "sup", "hola", "hii", "heya"}
-    if message.strip().lower() in greetings:
-        guide = create_guide(challenge_count=0)
-        greeting_response = guide(
-            f"The user just said '{message}'. "
-            f"Give a short warm greeting and ask what they want to do in Hong Kong. "
-            f"2-3 sentences max."
+    route_engine = payload.get("route_engine", ROUTE_ENGINE)
+    stream = bool(payload.get("stream", False))
+    mode = payload.get("mode", "plan")
+    deadline = Deadline.from_payload(payload)
+
+    session = await asyncio.to_thread(open_session, context, history)
+    if session is not None:
+        history = session.context()
+
+    catalog, missed_version = await asyncio.to_thread(CATALOGS.resolve, payload)
+    challenges = catalog.challenges if catalog else []
+    metadata = {"catalog_version": catalog.version} if catalog else {}
+
+    log.info("[Invoke] prompt=%s, challenges=%d, catalog=%s, history=%d",
+             message[:100], len(challenges), metadata.get("catalog_version"), len(history))
+
+    if missed_version:
+        log.warning("[Catalog] version %s not loaded, asking client for full list", missed_version)
+        result = WorkflowResult(
+            response="Catalog version not loaded — resend the full challenges list.",
+            metadata={"catalog_miss": True, "catalog_version": missed_version},
         )
-        result = WorkflowResult(response=str(greeting_response))
-        yield result.model_dump_json()
+        yield final_payload(result, stream)
         return
 
-    if not challenges:
-        guide = create_guide(challenge_count=0)
-        no_challenges_response = guide(
-            f"The user said: '{message}'. "
-            f"There are no challenges loaded right now. "
-            f"Apologize briefly and ask them to try again in a moment. 2-3 sentences."
+    if mode == "nearby":
+        near = resolve_point(payload.get("near"))
+        radius_km = payload_number(payload, "radius_km", NEARBY_RADIUS_KM)
+        limit = payload_number(payload, "limit", NEARBY_LIMIT, int)
+        available_minutes = payload_number(payload, "available_minutes", None)
+        invalid = radius_km is None or limit is None or (
+            available_minutes is None and payload.get("available_minutes") is not None
         )
-        result = WorkflowResult(response=str(no_challenges_response))
-        yield result.model_dump_json()
+        if near is None or catalog is None:
+            result = WorkflowResult(
+                response="Tell me where you are — a district name or a lat/lng.",
+                metadata=metadata,
+            )
+        elif invalid:
+            result = WorkflowResult(
+                response="radius_km, limit and available_minutes must be numbers.",
+                metadata={**metadata, "error": "invalid nearby parameters"},
+            )
+        else:
+            started = time.perf_counter()
+            # Off the event loop: the first query builds the catalog's spatial index.
+            result = await asyncio.to_thread(
+                nearby_result, catalog, near, radius_km, limit, available_minutes
+            )
+            log.info("[Nearby] %d hit(s) in %.2f ms",
+                     len(result.metadata["nearby"]), (time.perf_counter() - started) * 1000)
+            result.metadata.update(metadata)
+        yield final_payload(result, stream)
+        return
+
+    if mode == "batch":
+        items = payload.get("items") or []
+        concurrency = payload_number(payload, "concurrency", BATCH_CONCURRENCY, int)
+        if catalog is None or not isinstance(items, list) or not items or len(items) > BATCH_MAX_ITEMS:
+            result = BatchResult(results=[], metadata={
+                **metadata, "error": "batch needs a catalog and 1-%d items" % BATCH_MAX_ITEMS,
+            })
+        elif concurrency is None:
+            result = BatchResult(results=[], metadata={
+                **metadata, "error": "concurrency must be an integer",
+            })
+        else:
+            concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+            budget = {k: payload[k] for k in ("latency_budget_ms",) if k in payload}
+            async for event in batch_events(items, catalog, route_engine, concurrency,
+                                            bool(payload.get("guide", True)), budget):
+                if event["type"] == RESULT:
+                    result = event["result"]
+                elif stream:
+                    yield event
+            result.metadata.update(metadata)
+        yield final_payload(result, stream)
         return
 
     try:
-        result = run_travel_workflow(message, challenges, history)
-        yield result.model_dump_json()
+        last_route = previous_route(session, payload, history)
+        intent = classify_intent(
+            message, [c["title"] for c in last_route["challenges"]] if last_route else ()
+        )
+        metadata["intent"] = intent
+        log.info("[Intent] %s", intent)
+
+        if intent in TEMPLATED_REPLIES:
+            result = WorkflowResult(response=TEMPLATED_REPLIES[intent], metadata=metadata)
+        elif intent == ROUTE_QUESTION:
+            result = await answer_route_question(
+                message, history, PlannedRoute.from_wire(last_route), deadline
+            )
+            result.metadata.update(metadata)
+        elif not challenges:
+            result = WorkflowResult(response=NO_CHALLENGES_REPLY, metadata=metadata)
+        elif intent == ROUTE_EDIT:
+            result = await apply_route_edit(
+                message, history, PlannedRoute.from_wire(last_route), catalog, deadline
+            )
+            if result is None:
+                metadata["intent"] = PLAN
+            else:
+                result.metadata.update(metadata)
+        else:
+            result = None
+
+        if result is None:
+            start = resolve_point(payload["start"]) if payload.get("start") else None
+            start_radius_km = float(payload.get("start_radius_km", START_RADIUS_KM))
+            if stream:
+                async for event in travel_workflow_events_async(
+                    message, catalog, history, route_engine, start, start_radius_km, deadline
+                ):
+                    if event["type"] == RESULT:
+                        result = event["result"]
+                    else:
+                        yield event
+            else:
+                result = await run_travel_workflow_async(
+                    message, catalog, history, route_engine, start, start_radius_km, deadline
+                )
+            result.metadata.update(metadata)
+        if session is not None:
+            await asyncio.to_thread(remember_turn, session, message, result)
+        yield final_payload(result, stream)
     except Exception as e:
         log.error("[Error] %s", str(e), exc_info=True)
         error_result = WorkflowResult(
-            response="Oops, I got a bit lost there! Could you tell me again what you're looking for? Like how much time you have and what you're into — food, hiking, photography?"
+            response="Oops, I got a bit lost there! Could you tell me again what you're looking for? Like how much time you have and what you're into — food, hiking, photography?",
+            metadata={**metadata, "error": type(e).__name__},
         )
-        yield error_result.model_dump_json()
+        yield final_payload(error_result, stream)
 
 
 if __name__ == "__main__":
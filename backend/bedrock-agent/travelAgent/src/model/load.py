@@ -1,4 +1,13 @@
+import asyncio
 import os
+import queue
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterator
+
+import openai
 from strands.models.openai import OpenAIModel
 from dotenv import load_dotenv
 from bedrock_agentcore.identity.auth import requires_api_key
@@ -7,7 +16,7 @@ from bedrock_agentcore.identity.auth import requires_api_key
 def agentcore_identity_api_key_provider(api_key: str) -> str:
     return api_key
 
-def _get_api_key() -> str:
+def _fetch_api_key() -> str:
     """
     Uses AgentCore Identity for API key management in deployed environments,
     and falls back to .env file for local development.
@@ -20,11 +29,127 @@ def _get_api_key() -> str:
 
 MODEL_ID = "gpt-5.1"
 
+# How long a fetched API key is trusted before AgentCore Identity is asked again.
+API_KEY_TTL_SECONDS = int(os.getenv("MODEL_API_KEY_TTL_SECONDS", "900"))
+
+# Upper bound on concurrent model calls per event loop; further calls queue.
+MAX_INFLIGHT_MODEL_CALLS = int(os.getenv("MAX_INFLIGHT_MODEL_CALLS", "16"))
+
+_lock = threading.Lock()
+_api_key: str | None = None
+_api_key_fetched_at = 0.0
+_model: OpenAIModel | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_api_key() -> str:
+    """Return the cached API key, refreshing it once the TTL has passed."""
+    global _api_key, _api_key_fetched_at
+    with _lock:
+        if _api_key is None or time.monotonic() - _api_key_fetched_at > API_KEY_TTL_SECONDS:
+            _api_key = _fetch_api_key()
+            _api_key_fetched_at = time.monotonic()
+        return _api_key
+
+
+class _LoopBoundClient:
+    """An AsyncOpenAI client per event loop, reused across requests.
+
+    httpx connections cannot be shared between event loops, so the pooled
+    client is keyed by the running loop and rebuilt when the API key rotates.
+    """
+
+    def __init__(self):
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _client(self) -> openai.AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        api_key = _get_api_key()
+        client = self._clients.get(loop)
+        if client is None or client.api_key != api_key:
+            client = openai.AsyncOpenAI(api_key=api_key)
+            self._clients[loop] = client
+        return client
+
+    def __getattr__(self, name):
+        return getattr(self._client(), name)
+
+
 def load_model() -> OpenAIModel:
     """
-    Get authenticated OpenAI model client.
+    Get the process-wide authenticated OpenAI model client.
     """
-    return OpenAIModel(
-        client_args={"api_key": _get_api_key()},
-        model_id=MODEL_ID,
-    )
\ No newline at end of file
+    global _model
+    with _lock:
+        if _model is None:
+            _model = OpenAIModel(client=_LoopBoundClient(), model_id=MODEL_ID)
+        return _model
+
+
+def _model_loop() -> asyncio.AbstractEventLoop:
+    """Long-lived event loop that blocking callers drive the workflow on."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="model-loop", daemon=True).start()
+        return _loop
+
+
+def _loop_semaphore() -> asyncio.Semaphore:
+    # Only ever touched from the running loop's own thread, so no lock.
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(MAX_INFLIGHT_MODEL_CALLS)
+    return semaphore
+
+
+@asynccontextmanager
+async def model_call_slot(agent):
+    """Hold one of the running loop's MAX_INFLIGHT_MODEL_CALLS slots.
+
+    Refreshes the API key in a worker thread first so a slow AgentCore
+    Identity lookup never blocks the event loop.
+    """
+    if agent.model is _model:
+        await asyncio.to_thread(_get_api_key)
+    async with _loop_semaphore():
+        yield
+
+
+async def invoke_agent_async(agent, prompt, **kwargs):
+    """Await an agent call on the current event loop, bounded per loop."""
+    async with model_call_slot(agent):
+        return await agent.invoke_async(prompt, **kwargs)
+
+
+def iterate_on_model_loop(agen: AsyncIterator) -> Iterator:
+    """Drive an async generator on the shared model loop from a blocking caller.
+
+    The generator runs start to finish inside one task (so context-local state
+    such as tracing spans stays consistent); items are handed over through a
+    queue. Closing the iterator early cancels that task; otherwise the task
+    is left to finish and its own exception, if any, is re-raised.
+    """
+    items: queue.Queue = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        finally:
+            items.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _model_loop())
+    finished = False
+    try:
+        while (item := items.get()) is not done:
+            yield item
+        finished = True
+    finally:
+        if not finished:
+            future.cancel()
+    future.result()
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from strands import Agent
+from strands.agent.state import AgentState
+from strands.handlers.callback_handler import null_callback_handler
+from strands.telemetry.metrics import EventLoopMetrics
+
+MAX_IDLE_AGENTS = 8
+
+
+class AgentPool:
+    """Pre-built Agent instances for one role, reused across requests.
+
+    An Agent is not safe for concurrent invocations, so each request checks
+    one out exclusively. Conversation state is reset on return; agents whose
+    request raised are discarded rather than recycled, unless it was merely
+    cancelled.
+    """
+
+    def __init__(self, factory: Callable[[], Agent], max_idle: int = MAX_IDLE_AGENTS):
+        self._factory = factory
+        self._max_idle = max_idle
+        self._idle: list[Agent] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, system_prompt: str | None = None,
+                callback_handler: Callable | None = None) -> Iterator[Agent]:
+        with self._lock:
+            agent = self._idle.pop() if self._idle else None
+        if agent is None:
+            agent = self._factory()
+        if system_prompt is not None and agent.system_prompt != system_prompt:
+            agent.system_prompt = system_prompt
+        agent.callback_handler = callback_handler or null_callback_handler
+
+        try:
+            yield agent  # any other exception in the caller skips recycling
+        except asyncio.CancelledError:
+            # The caller stopped early (a parsed answer, a deadline); strands
+            # unwinds a cancelled call cleanly, so the agent is reusable.
+            self._recycle(agent)
+            raise
+        self._recycle(agent)
+
+    def _recycle(self, agent: Agent) -> None:
+        self._reset(agent)
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(agent)
+
+    @staticmethod
+    def _reset(agent: Agent) -> None:
+        agent.messages.clear()
+        agent.state = AgentState()
+        agent.event_loop_metrics = EventLoopMetrics()
+        agent.callback_handler = null_callback_handler
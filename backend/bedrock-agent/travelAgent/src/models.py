@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -21,3 +23,37 @@ class Route(BaseModel):
 class WorkflowResult(BaseModel):
     response: str
     route: Route | None = None
+    metadata: dict = Field(default_factory=dict)
+
+
+class BatchResult(BaseModel):
+    results: list[WorkflowResult]
+    metadata: dict = Field(default_factory=dict)
+
+
+# ── Agent output schemas (STRUCTURED_OUTPUT) ─────────────────
+
+class TravelPreferences(BaseModel):
+    available_time_hours: float = Field(4, gt=0, le=24)
+    interests: list[Literal["food", "photo", "culture", "hiking", "nightlife", "activity"]] = Field(
+        default_factory=list
+    )
+    difficulty_preference: Literal["easy", "medium", "hard", "any"] = "any"
+    group_size: int = Field(1, ge=1)
+    special_requests: str = ""
+
+
+class ResearchPick(BaseModel):
+    chlgID: str
+    reason: str = "Recommended for you"
+
+
+class ResearchPlan(BaseModel):
+    """The Research agent's selection; durations and locations come from the catalog."""
+    selected_challenges: list[ResearchPick] = Field(min_length=1)
+    route_order: list[str] = Field(min_length=1)
+    route_logic: str = ""
+
+
+class GuideReply(BaseModel):
+    response: str
@@ -0,0 +1,224 @@
+"""Rule-based preference extraction — a fast path ahead of the Planner agent.
+
+Covers the short, formulaic requests that make up most traffic ("3 hours,
+food and photos", "quick easy culture walk") and produces the same JSON
+schema as prompts/planner.j2. Each extraction carries a confidence score;
+the Planner agent only runs when it is too low to trust.
+"""
+
+import re
+
+DEFAULT_HOURS = 4
+DEFAULT_INTERESTS = ["photo", "food", "culture"]
+
+INTEREST_KEYWORDS = {
+    "food": ("food", "eat", "eating", "foodie", "dim sum", "street food", "restaurant",
+             "snack", "curry", "dessert", "egg tart", "breakfast", "lunch", "dinner", "cuisine"),
+    "photo": ("photo", "photos", "photography", "pictures", "pics", "camera", "instagram",
+              "skyline", "views", "sunset", "neon"),
+    "culture": ("culture", "cultural", "temple", "temples", "history", "historic", "heritage",
+                "museum", "museums", "art", "architecture", "tradition", "traditional"),
+    "hiking": ("hike", "hikes", "hiking", "trail", "trails", "trek", "trekking", "mountain",
+               "peak", "nature", "outdoors"),
+    "nightlife": ("nightlife", "bar", "bars", "drinks", "drinking", "club", "clubs",
+                  "party", "pub", "cocktails", "night out"),
+    "activity": ("activity", "activities", "adventure", "shopping", "market", "markets",
+                 "haggle", "sneakers", "active", "sport", "sports"),
+}
+
+DIFFICULTY_KEYWORDS = {
+    "easy": ("easy", "chill", "relaxed", "relaxing", "nothing too hard", "not too hard",
+             "light", "gentle", "low effort", "laid back", "laid-back", "kids", "elderly"),
+    "medium": ("moderate", "medium", "some effort"),
+    "hard": ("hard", "hardcore", "challenging", "a challenge", "intense", "difficult",
+             "i'm fit", "im fit", "very fit", "extreme", "tough"),
+}
+
+WORD_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twelve": 12, "couple of": 2,
+}
+
+HOUR_PHRASES = (
+    (r"\b(?:all|full|whole|entire)[\s-]day\b", 8),
+    (r"\bhalf[\s-]a?[\s-]?day\b", 4),
+    (r"\b(?:this|the) (?:afternoon|evening)\b|\btonight\b", 3),
+    (r"\bquick\b|\bshort\b", 2),
+)
+
+SPECIAL_PHRASES = (
+    ("first time", "first time"),
+    ("with kids", "with kids, family-friendly"),
+    ("children", "with kids, family-friendly"),
+    ("family", "family-friendly"),
+    ("girlfriend", "couple"),
+    ("boyfriend", "couple"),
+    ("wife", "couple"),
+    ("husband", "couple"),
+    ("partner", "couple"),
+    ("couple", "couple"),
+    ("solo", "solo"),
+    ("backpacker", "backpacker"),
+    ("backpacking", "backpacker"),
+    ("rain", "rainy day"),
+    ("rainy", "rainy day"),
+    ("budget", "budget"),
+    ("cheap", "budget"),
+    ("wheelchair", "accessible"),
+)
+
+NEGATION_RE = re.compile(r"\b(?:no|not|don't|dont|without|except|hate|avoid|skip)\b")
+
+_NUMBER = r"\b(\d+(?:\.\d+)?|" + "|".join(re.escape(w) for w in WORD_NUMBERS) + r")"
+# A bare "h" only counts after digits ("2h", "3 h"), never after "a" / "an".
+HOURS_RE = re.compile(
+    _NUMBER + r"(?P<half>\s+and a half)?\s*(?:-|to)?\s*(?:\d+\s*)?"
+    r"(?:hours?|hrs?|(?<=\d)h|(?<=\d\s)h)\b"
+)
+HALF_HOUR_RE = re.compile(r"\bhalf[\s-](?:an[\s-])?hour\b")
+MINUTES_RE = re.compile(r"(\d+)\s*(?:minutes?|mins?)\b")
+# The minutes of "2 hours and 30 minutes", matched right after the hours.
+TRAILING_MINUTES_RE = re.compile(r",?\s*(?:and\s+)?(\d+)\s*(?:minutes?|mins?)\b")
+# "a couple of hours" is a number, not two people travelling together.
+COUPLE_OF_RE = re.compile(r"\bcouple of\b")
+GROUP_RE = re.compile(
+    r"\b(?:group of|party of|we are|we're|there are)\s+" + _NUMBER
+    + r"|\b" + _NUMBER + r"\s+(?:of us|people|persons|friends|adults)\b"
+)
+# Companions besides the speaker: "me and 3 friends" is a group of four.
+COMPANIONS_RE = re.compile(
+    r"\b(?:me and|myself and|with)\s+(?:my\s+)?" + _NUMBER
+    + r"\s+(?:friends|others|people|adults|kids|children)\b"
+)
+
+# Confidence contributed by each field that was read from the message rather
+# than defaulted. Interests and time drive the route, so they dominate.
+CONFIDENCE_WEIGHTS = {"interests": 0.5, "hours": 0.35, "difficulty": 0.1, "group": 0.05}
+LONG_MESSAGE_WORDS = 40
+
+
+def _number(token: str) -> float:
+    token = token.strip()
+    if token in WORD_NUMBERS:
+        return WORD_NUMBERS[token]
+    value = float(token)
+    return int(value) if value.is_integer() else value
+
+
+def _contains(text: str, phrase: str) -> bool:
+    return re.search(r"\b" + re.escape(phrase) + r"\b", text) is not None
+
+
+def _extract_hours(text: str) -> float | None:
+    # Before HOURS_RE, which would read the "an" of "half an hour" as 1.
+    if HALF_HOUR_RE.search(text):
+        return 0.5
+    match = HOURS_RE.search(text)
+    if match:
+        hours = _number(match.group(1))
+        if match.group("half") or text.startswith(" and a half", match.end()):
+            hours += 0.5
+        minutes = TRAILING_MINUTES_RE.match(text, match.end())
+        if minutes:
+            hours = round(hours + int(minutes.group(1)) / 60, 2)
+        return hours
+    match = MINUTES_RE.search(text)
+    if match:
+        return round(int(match.group(1)) / 60, 2)
+    for pattern, hours in HOUR_PHRASES:
+        if re.search(pattern, text):
+            return hours
+    return None
+
+
+def _extract_interests(text: str) -> list[str]:
+    return [
+        interest for interest, keywords in INTEREST_KEYWORDS.items()
+        if any(_contains(text, k) for k in keywords)
+    ]
+
+
+def _extract_difficulty(text: str) -> str | None:
+    for level in ("easy", "hard", "medium"):
+        if any(_contains(text, k) for k in DIFFICULTY_KEYWORDS[level]):
+            return level
+    return None
+
+
+def _extract_group_size(text: str, specials: list[str]) -> int | None:
+    match = COMPANIONS_RE.search(text)
+    if match:
+        return int(_number(match.group(1))) + 1
+    match = GROUP_RE.search(text)
+    if match:
+        return int(_number(match.group(1) or match.group(2)))
+    if "family-friendly" in specials or "with kids, family-friendly" in specials:
+        return 4
+    if "couple" in specials:
+        return 2
+    if "solo" in specials or _contains(text, "alone"):
+        return 1
+    return None
+
+
+def _extract_special_requests(text: str) -> list[str]:
+    found: list[str] = []
+    text = COUPLE_OF_RE.sub(" ", text)
+    for phrase, label in SPECIAL_PHRASES:
+        if label not in found and _contains(text, phrase):
+            found.append(label)
+    if "with kids, family-friendly" in found and "family-friendly" in found:
+        found.remove("family-friendly")
+    return found
+
+
+def mentioned_interests(message: str) -> list[str]:
+    """Interests named in the message, without the defaults."""
+    return _extract_interests(message.lower().replace("’", "'"))
+
+
+def mentioned_hours(message: str) -> float | None:
+    """Time named in the message, in hours, or None."""
+    return _extract_hours(message.lower().replace("’", "'"))
+
+
+def mentions_preferences(message: str) -> bool:
+    """Whether the message names an interest or an amount of time."""
+    return bool(mentioned_interests(message)) or mentioned_hours(message) is not None
+
+
+def extract_preferences(message: str) -> tuple[dict, float]:
+    """Parse planner-schema preferences from a message.
+
+    Returns (preferences, confidence) where confidence is in [0, 1].
+    """
+    text = message.lower().replace("’", "'")
+
+    hours = _extract_hours(text)
+    interests = _extract_interests(text)
+    difficulty = _extract_difficulty(text)
+    specials = _extract_special_requests(text)
+    group_size = _extract_group_size(text, specials)
+
+    found = {
+        "interests": bool(interests),
+        "hours": hours is not None,
+        "difficulty": difficulty is not None,
+        "group": group_size is not None,
+    }
+    confidence = sum(CONFIDENCE_WEIGHTS[field] for field, hit in found.items() if hit)
+    # Negations ("no hiking") and long free-form messages are where keyword
+    # matching goes wrong; leave those to the Planner.
+    if NEGATION_RE.search(text):
+        confidence -= 0.4
+    if len(text.split()) > LONG_MESSAGE_WORDS:
+        confidence -= 0.3
+
+    prefs = {
+        "available_time_hours": hours if hours is not None else DEFAULT_HOURS,
+        "interests": interests or list(DEFAULT_INTERESTS),
+        "difficulty_preference": difficulty or "any",
+        "group_size": group_size or 1,
+        "special_requests": ", ".join(specials),
+    }
+    return prefs, round(max(0.0, min(1.0, confidence)), 2)
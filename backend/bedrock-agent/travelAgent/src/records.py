@@ -0,0 +1,100 @@
+"""Slotted route records used on the request path.
+
+Routes are assembled straight from catalog entries: durations stay int
+seconds and locations stay GeoPoints until the route leaves the process.
+to_wire() gives the dict models.Route describes; pydantic only validates it
+once, when the WorkflowResult is built. Treat records as read-only — the wire
+dict is built once and shared by the ROUTE event, the cache and the prompt.
+"""
+
+from geo import GeoPoint, parse_point
+from helpers import parse_duration_seconds, seconds_to_duration
+
+DEFAULT_REASON = "Recommended for you"
+
+
+def wire_location(location, point: GeoPoint | None):
+    """The ["22.293° N", "114.168° E"] pair for a stop.
+
+    Seed records and browser-agent float pairs have no wire strings; theirs
+    are rebuilt from the parsed point.
+    """
+    if isinstance(location, (list, tuple)) and all(isinstance(v, str) for v in location):
+        return location
+    return point.to_wire() if point is not None else location
+
+
+class RouteStop:
+    __slots__ = ("chlgID", "title", "type", "location", "expected_duration",
+                 "duration", "point", "reason")
+
+    def __init__(self, challenge: dict, duration: int, point: GeoPoint | None,
+                 reason: str = DEFAULT_REASON):
+        self.chlgID = challenge["chlgID"]
+        self.title = challenge["title"]
+        self.type = challenge["type"]
+        self.location = wire_location(challenge.get("location"), point)
+        self.expected_duration = challenge.get("expected_duration") or seconds_to_duration(duration)
+        self.duration = duration
+        self.point = point
+        self.reason = reason
+
+    @classmethod
+    def from_catalog(cls, catalog, chlg_id: str, reason: str | None = None) -> "RouteStop":
+        """A stop for a catalog challenge, reusing its parsed duration and point."""
+        return cls(catalog.by_id[chlg_id], catalog.durations[chlg_id],
+                   catalog.points.get(chlg_id), reason or DEFAULT_REASON)
+
+    def to_wire(self) -> dict:
+        return {
+            "chlgID": self.chlgID,
+            "title": self.title,
+            "type": self.type,
+            "location": self.location,
+            "expected_duration": self.expected_duration,
+            "reason": self.reason,
+        }
+
+
+class PlannedRoute:
+    """Ordered stops plus travel time between consecutive stops, in seconds."""
+
+    __slots__ = ("challenges", "duration_seconds", "travel_seconds", "_wire")
+
+    def __init__(self, challenges: list[RouteStop], travel_seconds: int):
+        self.challenges = challenges
+        self.duration_seconds = sum(stop.duration for stop in challenges)
+        self.travel_seconds = int(travel_seconds)
+        self._wire: dict | None = None
+
+    @property
+    def total_duration(self) -> str:
+        return seconds_to_duration(self.duration_seconds)
+
+    @property
+    def estimated_travel_time(self) -> str:
+        return seconds_to_duration(self.travel_seconds)
+
+    def to_wire(self) -> dict:
+        """The route as models.Route.model_dump() would give it; built once."""
+        if self._wire is None:
+            self._wire = {
+                "challenges": [stop.to_wire() for stop in self.challenges],
+                "total_duration": self.total_duration,
+                "estimated_travel_time": self.estimated_travel_time,
+                "start_location": self.challenges[0].location,
+                "end_location": self.challenges[-1].location,
+            }
+        return self._wire
+
+    @classmethod
+    def from_wire(cls, data: dict) -> "PlannedRoute":
+        """Rebuild a route from its wire dict (e.g. a route cache entry)."""
+        stops = [
+            RouteStop(c, parse_duration_seconds(c["expected_duration"]),
+                      parse_point(c["location"]), c.get("reason") or DEFAULT_REASON)
+            for c in data["challenges"]
+        ]
+        route = cls(stops, parse_duration_seconds(data.get("estimated_travel_time", "00:00:00")))
+        route._wire = data
+        return route
@@ -0,0 +1,336 @@
+"""Local route solver — a deterministic replacement for the Research agent.
+
+Route selection is treated as an orienteering problem: pick the subset of
+challenges with the highest total prize (score weighted by preference fit)
+whose visit durations plus travel between consecutive stops fit inside the
+user's time budget, and order them to minimise travel.
+"""
+
+import math
+
+import numpy as np
+
+from catalog import ChallengeCatalog
+from geo import GeoPoint
+from edits import ADD, FIRST, OPTIMIZE, REMOVE, REORDER, REPLACE, REVERSE, TRIM, RouteEdit
+from records import PlannedRoute, RouteStop
+from travel import points_travel_seconds
+
+MAX_STOPS = 6
+MAX_CANDIDATES = 120
+SEED_COUNT = 8
+DIFFICULTY_MISMATCH_WEIGHT = 0.6
+SOCIAL_WEIGHT = 0.1
+
+
+# ── Candidates ───────────────────────────────────────────────
+
+class Candidate:
+    __slots__ = ("challenge", "point", "duration", "prize", "interest_match")
+
+    def __init__(self, challenge: dict, point: GeoPoint, duration: int,
+                 prize: float, interest_match: bool):
+        self.challenge = challenge
+        self.point = point
+        self.duration = duration
+        self.prize = prize
+        self.interest_match = interest_match
+
+
+def build_candidates(prefs: dict, catalog: ChallengeCatalog,
+                     limit: int | None = MAX_CANDIDATES,
+                     pool: list[dict] | None = None) -> list[Candidate]:
+    """Score every routable challenge against the user's preferences.
+
+    Interests act as a hard filter (when anything matches), difficulty as a
+    soft weight, and joined_people as a small social-proof bonus. Returns the
+    best `limit` candidates, highest prize first. `pool` restricts scoring to
+    those challenges instead of the whole catalog.
+    """
+    interests = {i.lower() for i in prefs.get("interests", [])}
+    difficulty = str(prefs.get("difficulty_preference", "any")).lower()
+
+    if pool is None:
+        pool = catalog.of_types(interests) if interests else []
+        matched = bool(pool)
+        if not matched:
+            pool = catalog.challenges
+    else:
+        matched = bool(interests)
+        if matched:
+            pool = [c for c in pool if c.get("type", "").lower() in interests]
+
+    candidates = []
+    for c in pool:
+        chlg_id = c["chlgID"]
+        point = catalog.points.get(chlg_id)
+        if point is None:
+            continue
+        prize = float(c.get("score", 0) or 0)
+        if difficulty != "any" and c.get("difficulty", "").lower() != difficulty:
+            prize *= DIFFICULTY_MISMATCH_WEIGHT
+        prize += SOCIAL_WEIGHT * math.log1p(catalog.participants[chlg_id])
+        candidates.append(Candidate(
+            challenge=c,
+            point=point,
+            duration=catalog.durations[chlg_id],
+            prize=prize,
+            interest_match=matched,
+        ))
+
+    candidates.sort(key=lambda cand: cand.prize, reverse=True)
+    return candidates[:limit]
+
+
+# ── Solver ───────────────────────────────────────────────────
+
+class OrienteeringSolver:
+    """Multi-start greedy insertion with 2-opt and swap improvement.
+
+    Candidates are indexed by position; routes are lists of indices. Travel
+    times for every pair are computed up front in one vectorized pass, or
+    taken from `travel_seconds` (e.g. a slice of the catalog's TravelTimeModel).
+    """
+
+    def __init__(self, candidates: list[Candidate], budget_seconds: int,
+                 max_stops: int = MAX_STOPS, travel_seconds: np.ndarray | None = None):
+        self.candidates = candidates
+        self.budget = budget_seconds
+        self.max_stops = max_stops
+        if travel_seconds is None:
+            travel_seconds = points_travel_seconds([cand.point for cand in candidates])
+        # Nested lists: scalar lookups in the search loops are much faster than ndarray indexing.
+        self._travel: list[list[int]] = travel_seconds.tolist()
+
+    def travel(self, i: int, j: int) -> int:
+        return self._travel[i][j]
+
+    def travel_time(self, order: list[int]) -> int:
+        return sum(self.travel(a, b) for a, b in zip(order, order[1:]))
+
+    def cost(self, order: list[int]) -> int:
+        return sum(self.candidates[i].duration for i in order) + self.travel_time(order)
+
+    def prize(self, order: list[int]) -> float:
+        return sum(self.candidates[i].prize for i in order)
+
+    def _insertion_delta(self, order: list[int], k: int, pos: int) -> int:
+        delta = self.candidates[k].duration
+        if pos > 0:
+            delta += self.travel(order[pos - 1], k)
+        if pos < len(order):
+            delta += self.travel(k, order[pos])
+        if 0 < pos < len(order):
+            delta -= self.travel(order[pos - 1], order[pos])
+        return delta
+
+    def _best_position(self, order: list[int], k: int, cost: int) -> tuple[int, int] | None:
+        best = None
+        for pos in range(len(order) + 1):
+            delta = self._insertion_delta(order, k, pos)
+            if cost + delta <= self.budget and (best is None or delta < best[1]):
+                best = (pos, delta)
+        return best
+
+    def _greedy_fill(self, order: list[int]) -> list[int]:
+        cost = self.cost(order)
+        used = set(order)
+        while len(order) < self.max_stops:
+            best = None
+            for k, cand in enumerate(self.candidates):
+                if k in used or cost + cand.duration > self.budget:
+                    continue
+                placed = self._best_position(order, k, cost)
+                if placed is None:
+                    continue
+                ratio = cand.prize / max(placed[1], 1)
+                if best is None or ratio > best[0]:
+                    best = (ratio, k, placed[0], placed[1])
+            if best is None:
+                break
+            _, k, pos, delta = best
+            order.insert(pos, k)
+            used.add(k)
+            cost += delta
+        return order
+
+    def _two_opt(self, order: list[int]) -> list[int]:
+        improved = True
+        while improved and len(order) > 2:
+            improved = False
+            best_travel = self.travel_time(order)
+            for i in range(len(order) - 1):
+                for j in range(i + 1, len(order)):
+                    trial = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    trial_travel = self.travel_time(trial)
+                    if trial_travel < best_travel:
+                        order, best_travel, improved = trial, trial_travel, True
+        return order
+
+    def _swap_improve(self, order: list[int]) -> list[int]:
+        """Replace a visited stop with a higher-prize unvisited one when it still fits."""
+        improved = True
+        while improved:
+            improved = False
+            used = set(order)
+            for idx, v in enumerate(order):
+                rest = order[:idx] + order[idx + 1:]
+                rest_cost = self.cost(rest)
+                for k, cand in enumerate(self.candidates):
+                    if k in used or cand.prize <= self.candidates[v].prize:
+                        continue
+                    placed = self._best_position(rest, k, rest_cost)
+                    if placed is not None:
+                        order = rest[:placed[0]] + [k] + rest[placed[0]:]
+                        improved = True
+                        break
+                if improved:
+                    break
+        return order
+
+    def solve(self) -> list[int]:
+        seeds = [
+            k for k, cand in enumerate(self.candidates) if cand.duration <= self.budget
+        ][:SEED_COUNT]
+
+        best_order: list[int] = []
+        best_key = (0.0, 0)
+        for seed in seeds:
+            order = self._greedy_fill([seed])
+            order = self._two_opt(order)
+            order = self._greedy_fill(order)
+            order = self._swap_improve(order)
+            order = self._two_opt(order)
+            key = (self.prize(order), -self.cost(order))
+            if key > best_key:
+                best_order, best_key = order, key
+        return best_order
+
+
+# ── Route assembly ───────────────────────────────────────────
+
+def _reason(cand: Candidate) -> str:
+    kind = cand.challenge.get("type", "")
+    if cand.interest_match:
+        return f"Matches your interest in {kind}"
+    return f"Highly rated {kind} challenge"
+
+
+def solve_route(prefs: dict, catalog: ChallengeCatalog) -> PlannedRoute | None:
+    """Pick and order challenges locally, without a model call."""
+    candidates = build_candidates(prefs, catalog)
+    if not candidates:
+        return None
+
+    travel_seconds = catalog.travel.seconds_matrix(
+        [cand.challenge["chlgID"] for cand in candidates]
+    )
+
+    budget = int(float(prefs.get("available_time_hours", 4) or 4) * 3600)
+    solver = OrienteeringSolver(candidates, budget, travel_seconds=travel_seconds)
+    order = solver.solve()
+    if not order:
+        order = [0]  # nothing fits the budget — offer the single best match
+
+    stops = [
+        RouteStop(cand.challenge, cand.duration, cand.point, _reason(cand))
+        for cand in (candidates[i] for i in order)
+    ]
+    return PlannedRoute(stops, solver.travel_time(order))
+
+
+# ── Route edits ──────────────────────────────────────────────
+
+EDIT_RADIUS_KM = 2.0
+EDIT_NEIGHBOURS = 4 * MAX_CANDIDATES  # nearest challenges considered per anchor
+ADD_STOP_SECONDS = 2 * 3600
+
+
+def _edit_pool(edit: RouteEdit, route: PlannedRoute, catalog: ChallengeCatalog) -> list[dict]:
+    """Challenges an edit may bring in: near its anchor (the place asked for, the
+    stop being replaced, or else any stop on the route) and not already on the route."""
+    if edit.near is not None:
+        anchors = [edit.near]
+    elif edit.kind == REPLACE:
+        anchors = [route.challenges[edit.index].point]
+    else:
+        anchors = [stop.point for stop in route.challenges]
+    used = {stop.chlgID for stop in route.challenges}
+    ids = {}
+    for anchor in anchors:
+        for chlg_id, _ in catalog.spatial.within(anchor, EDIT_RADIUS_KM, EDIT_NEIGHBOURS):
+            if chlg_id not in used:
+                ids[chlg_id] = None
+    return [catalog.by_id[chlg_id] for chlg_id in ids]
+
+
+def edit_route(route: PlannedRoute, edit: RouteEdit, catalog: ChallengeCatalog) -> PlannedRoute | None:
+    """Apply `edit` to `route`, re-optimising only the part of the route it touches.
+
+    The kept stops keep their relative order (and their reasons) except for
+    reorder edits. Returns None when the edit cannot be applied here — e.g. a
+    stop is not in this catalog, or nothing fits — and the caller replans.
+    """
+    stops = route.challenges
+    if not all(stop.chlgID in catalog.points for stop in stops):
+        return None
+    n = len(stops)
+
+    pool = []
+    if edit.kind in (REPLACE, ADD):
+        nearby = _edit_pool(edit, route, catalog)
+        pool = build_candidates({"interests": edit.interests}, catalog, pool=nearby)
+        if edit.kind == REPLACE and not edit.interests and edit.near is None:
+            # Like for like when the user did not say what they want instead.
+            pool = build_candidates({"interests": [stops[edit.index].type]}, catalog,
+                                    pool=nearby) or pool
+    current = {cand.challenge["chlgID"]: cand for cand in build_candidates(
+        {}, catalog, limit=None, pool=[catalog.by_id[stop.chlgID] for stop in stops]
+    )}
+    candidates = [current[stop.chlgID] for stop in stops] + pool
+    travel_seconds = catalog.travel.seconds_matrix([cand.challenge["chlgID"] for cand in candidates])
+    order = list(range(n))
+    cost = sum(stop.duration for stop in stops) + sum(
+        int(travel_seconds[a, b]) for a, b in zip(order, order[1:])
+    )
+
+    if edit.kind == REMOVE:
+        del order[edit.index]
+    elif edit.kind == REORDER:
+        solver = OrienteeringSolver(candidates, cost, travel_seconds=travel_seconds)
+        if edit.position == REVERSE:
+            order.reverse()
+        elif edit.position == OPTIMIZE:
+            order = solver._two_opt(order)
+        else:
+            order.remove(edit.index)
+            order.insert(0 if edit.position == FIRST else len(order), edit.index)
+    elif edit.kind == TRIM:
+        solver = OrienteeringSolver(candidates, edit.budget_seconds, travel_seconds=travel_seconds)
+        while len(order) > 1 and solver.cost(order) > edit.budget_seconds:
+            order.remove(min(order, key=lambda i: candidates[i].prize))
+    elif edit.kind == REPLACE:
+        rest = order[:edit.index] + order[edit.index + 1:]
+        solver = OrienteeringSolver(candidates, cost, travel_seconds=travel_seconds)
+        best = max(
+            range(n, len(candidates)),
+            key=lambda k: candidates[k].prize / max(solver._insertion_delta(rest, k, edit.index), 1),
+            default=None,
+        )
+        if best is None:
+            return None
+        order = rest[:edit.index] + [best] + rest[edit.index:]
+    elif edit.kind == ADD:
+        budget = cost + (ADD_STOP_SECONDS if edit.extra_seconds is None else edit.extra_seconds)
+        max_stops = n + edit.count if edit.count else max(MAX_STOPS, n + 1)
+        solver = OrienteeringSolver(candidates, budget, max_stops, travel_seconds=travel_seconds)
+        order = solver._greedy_fill(order)
+        if len(order) == n:
+            return None
+
+    edited = [
+        stops[i] if i < n else RouteStop(candidates[i].challenge, candidates[i].duration,
+                                         candidates[i].point, _reason(candidates[i]))
+        for i in order
+    ]
+    return PlannedRoute(edited, sum(int(travel_seconds[a, b]) for a, b in zip(order, order[1:])))
@@ -0,0 +1,251 @@
+"""Server-side conversation memory keyed by the AgentCore runtime session id.
+
+Clients used to resend the whole `history` every turn and the Guide only saw
+its last few entries. A session keeps the full history here instead; turns
+older than SESSION_RECENT_TURNS are folded into a rolling summary capped at
+SESSION_SUMMARY_CHARS, so the Guide prompt stays the same size however long
+the conversation gets. When the summary outgrows the cap, Guide chatter and
+superseded routes go first; user lines stating a constraint or preference
+("vegetarian, two kids", "no hiking") are shortened but kept. The last route
+offered is kept for follow-up turns.
+
+Sessions live in a bounded in-memory LRU. Set SESSION_DB_PATH to also keep
+them in a local SQLite file, which survives restarts of a local runtime
+(AgentCore microVMs are per session, so memory alone is enough there).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from helpers import encode_json
+from preferences import mentions_preferences
+
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1024"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(8 * 3600)))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "")
+SESSION_RECENT_TURNS = int(os.getenv("SESSION_RECENT_TURNS", "6"))
+SESSION_SUMMARY_CHARS = int(os.getenv("SESSION_SUMMARY_CHARS", "1200"))
+
+USER_CLAUSE_CHARS = 160
+ASSISTANT_CLAUSE_CHARS = 120
+PINNED_CLAUSE_CHARS = 80
+
+USER_PREFIX = "User: "
+ROUTE_PREFIX = "Guide suggested: "
+CONSTRAINT_RE = re.compile(
+    r"\b(?:vegetarian|vegan|halal|kosher|gluten|allerg\w*|dairy|nuts?|spicy|wheelchair|"
+    r"stroller|pram|kids?|children|baby|toddler|elderly|pregnant|knees?|budget|cheap|"
+    r"avoid|no|not|don't|dont|can't|cant|never|hate|only|must)\b"
+)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _first_sentence(text: str) -> str:
+    text = " ".join(str(text).split())
+    for end in (". ", "! ", "? "):
+        cut = text.find(end)
+        if 0 < cut:
+            text = text[:cut + 1]
+    return text
+
+
+def fold_entry(entry: dict) -> str:
+    """One summary line for a history entry."""
+    if entry.get("role") == "user":
+        return USER_PREFIX + _clip(entry.get("content", ""), USER_CLAUSE_CHARS)
+    stops = entry.get("stops")
+    if stops:
+        return ROUTE_PREFIX + _clip(" → ".join(stops), ASSISTANT_CLAUSE_CHARS)
+    return f"Guide: {_clip(_first_sentence(entry.get('content', '')), ASSISTANT_CLAUSE_CHARS)}"
+
+
+def is_pinned(line: str) -> bool:
+    """Whether a summary line is a user constraint or preference worth keeping."""
+    if not line.startswith(USER_PREFIX):
+        return False
+    text = line[len(USER_PREFIX):].lower()
+    # Questions name interests too ("what's the history there?") without stating one.
+    return CONSTRAINT_RE.search(text) is not None or ("?" not in text and mentions_preferences(text))
+
+
+def _size(lines: list[str]) -> int:
+    return sum(len(line) + 1 for line in lines)
+
+
+def compact_summary(lines: list[str], limit: int) -> list[str]:
+    """Fit summary lines into `limit` chars, giving up the least useful first.
+
+    Guide chatter goes first, then routes other than the latest, then user
+    lines without a constraint, then the latest route. Pinned lines are
+    shortened to PINNED_CLAUSE_CHARS, and only as a last resort dropped,
+    oldest first but never the opening request.
+    """
+    if _size(lines) <= limit:
+        return lines
+    latest_route = max((i for i, line in enumerate(lines) if line.startswith(ROUTE_PREFIX)),
+                       default=-1)
+
+    def rank(i: int, line: str) -> int:
+        if line.startswith(ROUTE_PREFIX):
+            return 3 if i == latest_route else 1
+        if line.startswith(USER_PREFIX):
+            return 4 if is_pinned(line) else 2
+        return 0
+
+    ranks = [rank(i, line) for i, line in enumerate(lines)]
+    keep = [True] * len(lines)
+    for i in sorted(range(len(lines)), key=lambda i: (ranks[i], i)):
+        if ranks[i] == 4 or _size([l for l, k in zip(lines, keep) if k]) <= limit:
+            break
+        keep[i] = False
+    lines = [
+        USER_PREFIX + _clip(line[len(USER_PREFIX):], PINNED_CLAUSE_CHARS) if r == 4 else line
+        for line, r, k in zip(lines, ranks, keep) if k
+    ]
+    first_user = next((i for i, line in enumerate(lines) if line.startswith(USER_PREFIX)), -1)
+    while _size(lines) > limit and len(lines) > 1:
+        if first_user == 0:
+            lines.pop(1)
+        else:
+            lines.pop(0)
+            first_user -= 1
+    return lines
+
+
+class Session:
+    """One conversation: full history, the rolling summary and the last route.
+
+    history[:folded] is represented by `summary`; history[folded:] is sent to
+    the Guide verbatim.
+    """
+
+    __slots__ = ("session_id", "history", "summary", "folded", "last_route", "updated")
+
+    def __init__(self, session_id: str, history: list | None = None, summary: str = "",
+                 folded: int = 0, last_route: dict | None = None, updated: float = 0.0):
+        self.session_id = session_id
+        self.history = history or []
+        self.summary = summary
+        self.folded = folded
+        self.last_route = last_route
+        self.updated = updated or time.time()
+
+    @property
+    def turns(self) -> int:
+        return len(self.history)
+
+    def add(self, role: str, content: str, route: dict | None = None) -> None:
+        entry = {"role": role, "content": content}
+        if route:
+            entry["stops"] = [c["title"] for c in route["challenges"]]
+            self.last_route = route
+        self.history.append(entry)
+        self.updated = time.time()
+        self._fold()
+
+    def extend(self, history: list) -> None:
+        """Seed a new session with a client-sent history."""
+        for h in history:
+            if h.get("role") in ("user", "assistant") and h.get("content"):
+                self.history.append({"role": h["role"], "content": h["content"]})
+        self._fold()
+
+    def context(self) -> list:
+        """History for the Guide prompt: the summary entry, then the recent turns."""
+        recent = self.history[self.folded:]
+        if self.summary:
+            return [{"role": "summary", "content": self.summary}] + recent
+        return recent
+
+    def _fold(self) -> None:
+        """Move turns beyond the recent window into the summary, then compact it."""
+        lines = self.summary.splitlines() if self.summary else []
+        while len(self.history) - self.folded > SESSION_RECENT_TURNS:
+            lines.append(fold_entry(self.history[self.folded]))
+            self.folded += 1
+        self.summary = "\n".join(compact_summary(lines, SESSION_SUMMARY_CHARS))
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Session":
+        return cls(**{slot: data[slot] for slot in cls.__slots__ if slot in data})
+
+
+class SessionStore:
+    """Thread-safe LRU of sessions with expiry and an optional SQLite tier."""
+
+    def __init__(self, max_sessions: int = SESSION_MAX_SESSIONS,
+                 ttl_seconds: int = SESSION_TTL_SECONDS, db_path: str | None = None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, session_id: str) -> Session:
+        """The session for `session_id`, a new empty one if unknown or expired."""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._db_get(session_id)
+            if session is None or now - session.updated > self.ttl_seconds:
+                session = Session(session_id)
+            self._store(session)
+        return session
+
+    def save(self, session: Session) -> None:
+        with self._lock:
+            self._store(session)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, data, updated) VALUES (?, ?, ?)",
+                    (session.session_id, encode_json(session.to_dict()), session.updated),
+                )
+                self._db.execute("DELETE FROM sessions WHERE updated < ?",
+                                 (time.time() - self.ttl_seconds,))
+                self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _store(self, session: Session) -> None:
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _db_get(self, session_id: str) -> Session | None:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return Session.from_dict(json.loads(row[0]))
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+
+SESSIONS = SessionStore(db_path=SESSION_DB_PATH or None)
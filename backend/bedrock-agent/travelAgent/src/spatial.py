@@ -0,0 +1,91 @@
+"""Grid spatial index over a challenge catalog.
+
+Points are bucketed into fixed-size lat/lng cells. Radius queries only look at
+the cells overlapping the query's bounding box; k-nearest queries grow the
+radius until enough points are found. Built once per catalog version (see
+ChallengeCatalog.spatial).
+"""
+
+import math
+from collections import defaultdict
+
+import numpy as np
+
+from distance import EARTH_RADIUS_KM, haversine_matrix, points_to_radians
+from geo import GeoPoint
+
+SPATIAL_CELL_DEGREES = 0.01  # ~1.1 km north–south
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+class SpatialIndex:
+    def __init__(self, points: dict[str, GeoPoint], cell_degrees: float = SPATIAL_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.ids = list(points)
+        self._lat, self._lng = points_to_radians(points.values())
+        buckets: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for i, point in enumerate(points.values()):
+            buckets[self._cell(point.lat, point.lng)].append(i)
+        self._cells = {cell: np.array(idx, dtype=np.intp) for cell, idx in buckets.items()}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def _candidates(self, point: GeoPoint, radius_km: float) -> np.ndarray:
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(point.lat)), 1e-6))
+        lat0, lng0 = self._cell(point.lat - dlat, point.lng - dlng)
+        lat1, lng1 = self._cell(point.lat + dlat, point.lng + dlng)
+        if (lat1 - lat0 + 1) * (lng1 - lng0 + 1) > len(self._cells):
+            # Box covers more cells than exist — cheaper to walk the buckets.
+            hits = [
+                idx for (i, j), idx in self._cells.items()
+                if lat0 <= i <= lat1 and lng0 <= j <= lng1
+            ]
+        else:
+            hits = [
+                self._cells[(i, j)]
+                for i in range(lat0, lat1 + 1)
+                for j in range(lng0, lng1 + 1)
+                if (i, j) in self._cells
+            ]
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.intp)
+
+    def _distances(self, point: GeoPoint, idx: np.ndarray) -> np.ndarray:
+        lat, lng = points_to_radians([point])
+        return haversine_matrix(lat, lng, self._lat[idx], self._lng[idx])[0]
+
+    def _ranked(self, point: GeoPoint, idx: np.ndarray, radius_km: float | None,
+                limit: int | None) -> list[tuple[str, float]]:
+        if not len(idx):
+            return []
+        dist = self._distances(point, idx)
+        if radius_km is not None:
+            keep = dist <= radius_km
+            idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[:limit]
+        return [(self.ids[i], float(d)) for i, d in zip(idx[order].tolist(), dist[order].tolist())]
+
+    def within(self, point: GeoPoint, radius_km: float,
+               limit: int | None = None) -> list[tuple[str, float]]:
+        """Challenges within `radius_km` of `point` as (chlgID, km), nearest first."""
+        return self._ranked(point, self._candidates(point, radius_km), radius_km, limit)
+
+    def nearest(self, point: GeoPoint, k: int = 5) -> list[tuple[str, float]]:
+        """The `k` challenges closest to `point` as (chlgID, km), nearest first."""
+        if k <= 0 or not self.ids:
+            return []
+        k = min(k, len(self.ids))
+        radius = self.cell_degrees * KM_PER_DEGREE_LAT
+        while True:
+            idx = self._candidates(point, radius)
+            if len(idx) == len(self.ids):
+                return self._ranked(point, idx, None, k)
+            if len(idx) >= k:
+                found = self._ranked(point, idx, radius, k)
+                if len(found) == k:
+                    return found
+            radius *= 2
@@ -0,0 +1,57 @@
+"""Speculative route selection while the Planner runs.
+
+When the rule-based parser is not confident enough to skip the Planner, its
+guess is still usually right about interests and time. Route selection starts
+from that guess alongside the Planner call; if the Planner's preferences
+normalise to the same route-shaping fields the speculative route is kept,
+otherwise it is cancelled and selection reruns.
+"""
+
+import os
+import threading
+
+from cache import normalize_preferences
+from preferences import mentioned_interests
+
+SPECULATIVE_ROUTING = os.getenv("SPECULATIVE_ROUTING", "auto")
+
+
+def should_speculate(message: str, route_engine: str) -> bool:
+    """Whether to start route selection from the parser's guess for `message`."""
+    if SPECULATIVE_ROUTING != "auto":
+        return SPECULATIVE_ROUTING == "1"
+    return route_engine == "local" or bool(mentioned_interests(message))
+
+
+def same_route_inputs(guess: dict, prefs: dict) -> bool:
+    """True when both preference sets would select the same route."""
+    return normalize_preferences(guess) == normalize_preferences(prefs)
+
+
+class SpeculationStats:
+    """Process-wide speculation counters, in the shape of TTLCache.stats()."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, saved_seconds: float = 0.0) -> None:
+        with self._lock:
+            self.attempts += 1
+            if hit:
+                self.hits += 1
+                self.saved_seconds += saved_seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.attempts, 3) if self.attempts else 0.0,
+                "saved_ms": round(self.saved_seconds * 1000),
+            }
+
+
+SPECULATION = SpeculationStats()
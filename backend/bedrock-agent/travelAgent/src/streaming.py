@@ -0,0 +1,140 @@
+"""Staged streaming events for the AgentCore entrypoint.
+
+A streaming invocation yields, in order:
+
+    {"type": "preferences", "preferences": {...}}
+    {"type": "route", "route": {...} | null}
+    {"type": "token", "text": "..."}          (repeated, Guide text as it arrives)
+    {"type": "result", "result": {...}}       (the full WorkflowResult)
+
+A batch invocation ("mode": "batch") instead yields one
+{"type": "batch_item", "index": i, "result": {...}} per item as it
+finishes, then a result event carrying the BatchResult.
+"""
+
+import asyncio
+import json
+import re
+from typing import AsyncIterator, Callable
+
+from model.load import model_call_slot
+
+PREFERENCES = "preferences"
+ROUTE = "route"
+TOKEN = "token"
+RESULT = "result"
+BATCH_ITEM = "batch_item"
+
+
+def stream_event(kind: str, **fields) -> dict:
+    return {"type": kind, **fields}
+
+
+class JsonFieldStreamer:
+    """Incrementally decode one top-level string field from streamed JSON.
+
+    The Guide answers with {"response": "...", "route": {...}}; feeding its
+    output chunk by chunk returns the newly decoded part of "response" so it
+    can be forwarded to the user before the JSON is complete. Output that does
+    not start like JSON is passed through unchanged.
+    """
+
+    def __init__(self, field: str = "response"):
+        self._key_re = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._mode = "seek"
+        self._pending = ""
+
+    @property
+    def done(self) -> bool:
+        """True once the field's closing quote has been seen."""
+        return self._mode == "done"
+
+    def feed(self, chunk: str) -> str:
+        if self._mode == "done":
+            return ""
+        if self._mode == "raw":
+            return chunk
+
+        self._pending += chunk
+        if self._mode == "seek":
+            head = self._pending.lstrip()
+            if head and head[0] not in "{`":
+                self._mode = "raw"
+                text, self._pending = self._pending, ""
+                return text
+            match = self._key_re.search(self._pending)
+            if not match:
+                return ""
+            self._mode = "string"
+            self._pending = self._pending[match.end():]
+        return self._decode()
+
+    def _decode(self) -> str:
+        out = []
+        text = self._pending
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            if ch == '"':
+                self._mode = "done"
+                i = len(text)
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            # Escape sequence — wait for the rest of it if it was split.
+            if i + 1 >= len(text):
+                break
+            if text[i + 1] != "u":
+                out.append(json.loads(f'"{text[i:i + 2]}"'))
+                i += 2
+                continue
+            end = i + 6
+            if end > len(text):
+                break
+            if 0xD800 <= int(text[i + 2:end], 16) <= 0xDBFF:
+                end = i + 12  # high surrogate: decode together with its pair
+                if end > len(text):
+                    break
+            out.append(json.loads(f'"{text[i:end]}"'))
+            i = end
+        self._pending = text[i:]
+        return "".join(out)
+
+
+async def stream_agent_text_async(acquire: Callable, prompt: str,
+                                  on_result: Callable | None = None) -> AsyncIterator[str]:
+    """Run an agent on the caller's event loop and yield its text deltas as they arrive.
+
+    `acquire()` must return a context manager yielding the agent, e.g. a
+    partial of AgentPool.acquire; `on_result` receives the final AgentResult.
+    Closing the generator early cancels the call. The agent streams in a task
+    of its own so that cancelling unwinds strands' nested streams (and their
+    tracing spans) in the context they were entered in; closing them from here
+    would leave them to the garbage collector.
+    """
+    chunks: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            with acquire() as agent:
+                async with model_call_slot(agent):
+                    async for event in agent.stream_async(prompt):
+                        if "data" in event:
+                            chunks.put_nowait(event["data"])
+                        elif "result" in event and on_result is not None:
+                            on_result(event["result"])
+        finally:
+            chunks.put_nowait(done)
+
+    task = asyncio.create_task(pump())
+    try:
+        while (chunk := await chunks.get()) is not done:
+            yield chunk
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.wait([task])  # the agent is back in its pool on return
+    await task  # re-raise the call's own exception, if any
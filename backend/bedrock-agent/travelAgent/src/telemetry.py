@@ -0,0 +1,126 @@
+"""OpenTelemetry spans and latency histograms for the workflow stages.
+
+Deployed on AgentCore with observability enabled, the ADOT distro installs
+the global tracer/meter providers and these spans join its traces. Locally,
+TRAVEL_AGENT_OTEL_EXPORTER selects an exporter:
+
+    console   print spans and metrics to stdout
+    otlp      send to an OTLP/HTTP collector (OTEL_EXPORTER_OTLP_ENDPOINT,
+              default http://localhost:4318)
+
+Every stage span records its duration in the travel_agent.stage.duration
+histogram, tagged by stage, so per-stage p99 can be read off one metric.
+travel_agent.agent.parse counts agent answers by outcome and output mode, and
+travel_agent.fallbacks counts stage results substituted locally; their ratio
+to workflow spans gives the parse-failure and fallback rates.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from opentelemetry import metrics, trace
+
+OTEL_EXPORTER = os.getenv("TRAVEL_AGENT_OTEL_EXPORTER", "")
+METRIC_EXPORT_INTERVAL_MS = int(os.getenv("TRAVEL_AGENT_METRIC_INTERVAL_MS", "10000"))
+
+log = logging.getLogger(__name__)
+
+
+def setup_telemetry(exporter: str = OTEL_EXPORTER) -> None:
+    """Install SDK providers for local runs; a no-op when no exporter is chosen."""
+    if not exporter:
+        return
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    if exporter == "console":
+        from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        span_exporter, metric_exporter = ConsoleSpanExporter(), ConsoleMetricExporter()
+    elif exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            log.warning("opentelemetry-exporter-otlp-proto-http is not installed; telemetry disabled")
+            return
+        span_exporter, metric_exporter = OTLPSpanExporter(), OTLPMetricExporter()
+    else:
+        log.warning("Unknown TRAVEL_AGENT_OTEL_EXPORTER %r; telemetry disabled", exporter)
+        return
+
+    resource = Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "travel-agent")})
+    tracer_provider = TracerProvider(resource=resource)
+    tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(tracer_provider)
+    metrics.set_meter_provider(MeterProvider(
+        resource=resource,
+        metric_readers=[PeriodicExportingMetricReader(
+            metric_exporter, export_interval_millis=METRIC_EXPORT_INTERVAL_MS
+        )],
+    ))
+
+
+setup_telemetry()
+
+tracer = trace.get_tracer("travel_agent")
+meter = metrics.get_meter("travel_agent")
+STAGE_DURATION = meter.create_histogram(
+    "travel_agent.stage.duration",
+    unit="ms",
+    description="Wall-clock time per workflow stage",
+)
+PARSE_RESULTS = meter.create_counter(
+    "travel_agent.agent.parse",
+    description="Agent answers by agent, outcome (ok/failed) and mode (structured/text)",
+)
+FALLBACKS = meter.create_counter(
+    "travel_agent.fallbacks",
+    description="Stage results replaced by a local fallback, by stage and reason",
+)
+
+
+@contextmanager
+def stage_span(stage: str, **attributes) -> Iterator[trace.Span]:
+    """Span named travel_agent.<stage> plus a duration sample for the histogram.
+
+    Attributes set on the span before it closes are kept; `fallback` and
+    `degraded`, if set, also tag the histogram sample.
+    """
+    started = time.perf_counter()
+    with tracer.start_as_current_span(f"travel_agent.{stage}", attributes=attributes) as span:
+        try:
+            yield span
+        finally:
+            labels = {"stage": stage}
+            span_attributes = getattr(span, "attributes", None) or {}
+            for key in ("fallback", "degraded"):
+                if key in span_attributes:
+                    labels[key] = span_attributes[key]
+            STAGE_DURATION.record((time.perf_counter() - started) * 1000, labels)
+
+
+def record_agent_call(span: trace.Span, result, model_id: str, prompt: str) -> None:
+    """Prompt size, token usage and model id of one agent call."""
+    span.set_attribute("gen_ai.request.model", model_id)
+    span.set_attribute("prompt.chars", len(prompt))
+    try:
+        usage = result.metrics.accumulated_usage
+    except AttributeError:
+        return
+    span.set_attribute("gen_ai.usage.input_tokens", int(usage.get("inputTokens", 0)))
+    span.set_attribute("gen_ai.usage.output_tokens", int(usage.get("outputTokens", 0)))
+
+
+def record_parse(agent: str, ok: bool, mode: str) -> None:
+    PARSE_RESULTS.add(1, {"agent": agent, "outcome": "ok" if ok else "failed", "mode": mode})
+
+
+def record_fallback(stage: str, reason: str) -> None:
+    FALLBACKS.add(1, {"stage": stage, "reason": reason})
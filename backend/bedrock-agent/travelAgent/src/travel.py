@@ -0,0 +1,161 @@
+"""Travel-time estimates between challenges.
+
+Two sources are blended:
+
+- distance: short hops are walked, longer ones take the MTR/bus (a fixed
+  overhead plus ride time);
+- districts: known links between Hong Kong districts (Star Ferry, cable car,
+  bus to the south side) whose duration distance alone misjudges.
+
+When both ends of a hop fall in different districts with a known link, the
+district time is used; otherwise the distance estimate is.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from distance import DistanceMatrix, haversine_matrix, points_to_radians
+from geo import GeoPoint
+
+WALK_LIMIT_KM = 1.2
+WALK_SPEED_KMH = 4.5
+MIN_HOP_SECONDS = 5 * 60
+TRANSIT_OVERHEAD_SECONDS = 12 * 60
+TRANSIT_SPEED_KMH = 25.0
+
+
+class District(NamedTuple):
+    name: str
+    lat_min: float
+    lat_max: float
+    lng_min: float
+    lng_max: float
+
+    def contains(self, point: GeoPoint) -> bool:
+        return (self.lat_min <= point.lat <= self.lat_max
+                and self.lng_min <= point.lng <= self.lng_max)
+
+    @property
+    def center(self) -> GeoPoint:
+        return GeoPoint((self.lat_min + self.lat_max) / 2, (self.lng_min + self.lng_max) / 2)
+
+
+DISTRICTS = (
+    District("TST", 22.290, 22.302, 114.165, 114.180),
+    District("Mongkok", 22.310, 22.325, 114.165, 114.175),
+    District("Sham Shui Po", 22.328, 22.335, 114.155, 114.165),
+    District("Central", 22.278, 22.285, 114.155, 114.165),
+    District("Sheung Wan", 22.284, 22.290, 114.145, 114.155),
+    District("Wan Chai", 22.275, 22.282, 114.170, 114.180),
+    District("Causeway Bay", 22.278, 22.282, 114.180, 114.192),
+    District("Aberdeen", 22.240, 22.250, 114.150, 114.165),
+    District("Stanley", 22.215, 22.220, 114.210, 114.220),
+    District("Dragon's Back", 22.240, 22.250, 114.225, 114.240),
+    District("Lantau", 22.245, 22.260, 113.895, 113.920),
+)
+NO_DISTRICT = len(DISTRICTS)
+
+DISTRICT_TRAVEL_MINUTES = {
+    ("TST", "Central"): 10,          # Star Ferry or MTR
+    ("TST", "Mongkok"): 10,          # MTR
+    ("Central", "Sheung Wan"): 10,   # walk or tram
+    ("Central", "Wan Chai"): 10,     # MTR or tram
+    ("Wan Chai", "Causeway Bay"): 5,  # walk
+    ("Central", "Dragon's Back"): 40,  # MTR + bus
+    ("Central", "Stanley"): 35,      # bus
+    ("Central", "Lantau"): 75,       # MTR + cable car, 60–90 min
+    ("TST", "Sham Shui Po"): 15,     # MTR
+}
+
+
+def _district_table() -> np.ndarray:
+    """(districts + 1)² seconds; 0 where no link is known, last row/column is "none"."""
+    index = {d.name: i for i, d in enumerate(DISTRICTS)}
+    table = np.zeros((NO_DISTRICT + 1, NO_DISTRICT + 1), dtype=np.int64)
+    for (a, b), minutes in DISTRICT_TRAVEL_MINUTES.items():
+        table[index[a], index[b]] = table[index[b], index[a]] = minutes * 60
+    return table
+
+
+DISTRICT_TRAVEL_SECONDS = _district_table()
+
+
+def district_index(point: GeoPoint) -> int:
+    for i, district in enumerate(DISTRICTS):
+        if district.contains(point):
+            return i
+    return NO_DISTRICT
+
+
+def find_district(name: str) -> District | None:
+    """Look a district up by name, ignoring case, spaces and punctuation."""
+    key = "".join(ch for ch in name.lower() if ch.isalnum())
+    for district in DISTRICTS:
+        if "".join(ch for ch in district.name.lower() if ch.isalnum()) == key:
+            return district
+    return None
+
+
+def district_of(point: GeoPoint) -> str | None:
+    i = district_index(point)
+    return DISTRICTS[i].name if i != NO_DISTRICT else None
+
+
+def estimate_travel_seconds(distance_km: float) -> int:
+    """Walk short hops, take the MTR/bus (fixed overhead + ride) for longer ones."""
+    if distance_km <= WALK_LIMIT_KM:
+        return max(MIN_HOP_SECONDS, int(distance_km / WALK_SPEED_KMH * 3600))
+    return TRANSIT_OVERHEAD_SECONDS + int(distance_km / TRANSIT_SPEED_KMH * 3600)
+
+
+def travel_seconds_matrix(distance_km: np.ndarray, districts: np.ndarray) -> np.ndarray:
+    """Blended travel seconds for a square distance matrix and per-point district indices."""
+    walk = np.maximum(MIN_HOP_SECONDS, (distance_km / WALK_SPEED_KMH * 3600).astype(np.int64))
+    ride = TRANSIT_OVERHEAD_SECONDS + (distance_km / TRANSIT_SPEED_KMH * 3600).astype(np.int64)
+    by_distance = np.where(distance_km <= WALK_LIMIT_KM, walk, ride)
+    by_district = DISTRICT_TRAVEL_SECONDS[districts[:, None], districts[None, :]]
+    return np.where(by_district > 0, by_district, by_distance)
+
+
+def points_travel_seconds(points: list[GeoPoint]) -> np.ndarray:
+    """Travel seconds between every pair of ad-hoc points (no catalog needed)."""
+    lat, lng = points_to_radians(points)
+    districts = np.fromiter((district_index(p) for p in points), dtype=np.intp, count=len(points))
+    return travel_seconds_matrix(haversine_matrix(lat, lng, lat, lng), districts)
+
+
+class TravelTimeModel:
+    """Travel times between the challenges of one catalog, keyed by chlgID."""
+
+    def __init__(self, points: dict[str, GeoPoint], distances: DistanceMatrix):
+        self.points = points
+        self.distances = distances
+        self._districts = np.fromiter(
+            (district_index(points[chlg_id]) for chlg_id in distances.ids),
+            dtype=np.intp, count=len(distances),
+        )
+
+    def __contains__(self, chlg_id: str) -> bool:
+        return chlg_id in self.distances
+
+    def district(self, chlg_id: str) -> str | None:
+        i = self._districts[self.distances.index[chlg_id]]
+        return DISTRICTS[i].name if i != NO_DISTRICT else None
+
+    def seconds_matrix(self, chlg_ids: list[str]) -> np.ndarray:
+        idx = np.fromiter((self.distances.index[c] for c in chlg_ids),
+                          dtype=np.intp, count=len(chlg_ids))
+        return travel_seconds_matrix(self.distances.submatrix(chlg_ids), self._districts[idx])
+
+    def seconds(self, a: str, b: str) -> int:
+        da = self._districts[self.distances.index[a]]
+        db = self._districts[self.distances.index[b]]
+        linked = int(DISTRICT_TRAVEL_SECONDS[da, db])
+        return linked or estimate_travel_seconds(self.distances.km(a, b))
+
+    def route_seconds(self, chlg_ids: list[str]) -> int:
+        """Total travel between consecutive stops; unknown IDs are skipped."""
+        known = [c for c in chlg_ids if c in self]
+        return sum(self.seconds(a, b) for a, b in zip(known, known[1:]))
+
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from catalog import ChallengeCatalog  # noqa: E402
+
+
+def make_challenge(n: int, kind: str, lat: float, lng: float, duration: str = "01:00:00",
+                   score: float = 5.0, difficulty: str = "easy") -> dict:
+    return {
+        "chlgID": f"chlg_{n:03d}",
+        "title": f"{kind.title()} Spot {n}",
+        "type": kind,
+        "difficulty": difficulty,
+        "expected_duration": duration,
+        "location": [f"{lat:.4f}° N", f"{lng:.4f}° E"],
+        "score": score,
+        "joined_people": [],
+    }
+
+
+def invoke(payload: dict) -> list:
+    """Everything the entrypoint yields for `payload`, without a runtime session."""
+    import main  # loads the agent framework; only the entrypoint tests need it
+
+    async def collect():
+        return [event async for event in main.invoke(payload, None)]
+
+    return asyncio.run(collect())
+
+
+@pytest.fixture
+def challenges() -> list[dict]:
+    """Ten short challenges around Central and TST, two of each type."""
+    kinds = ("food", "photo", "culture", "hiking", "nightlife")
+    return [
+        make_challenge(i, kinds[i % len(kinds)], 22.28 + 0.002 * i, 114.16 + 0.002 * i,
+                       duration="00:30:00", score=10 - i * 0.5)
+        for i in range(10)
+    ]
+
+
+@pytest.fixture
+def catalog(challenges) -> ChallengeCatalog:
+    return ChallengeCatalog("test", challenges)
@@ -0,0 +1,54 @@
+import json
+
+from .conftest import invoke
+
+
+def batch(challenges, items, **payload) -> dict:
+    events = invoke({"mode": "batch", "items": items, "challenges": challenges,
+                     "route_engine": "local", "guide": False, **payload})
+    return json.loads(events[-1])
+
+
+def test_preference_items_are_routed_without_a_model(challenges):
+    items = [
+        {"id": "food", "preferences": {"available_time_hours": 2, "interests": ["food"]}},
+        {"id": "any", "preferences": {"available_time_hours": 3}},
+    ]
+
+    result = batch(challenges, items, concurrency=2)
+
+    assert [r["metadata"]["id"] for r in result["results"]] == ["food", "any"]
+    assert all(r["route"]["challenges"] for r in result["results"])
+    assert {c["type"] for c in result["results"][0]["route"]["challenges"]} == {"food"}
+    assert result["metadata"]["batch"]["items"] == 2
+    assert result["metadata"]["batch"]["errors"] == 0
+
+
+def test_streamed_batch_yields_an_event_per_item(challenges):
+    items = [{"preferences": {"available_time_hours": h}} for h in (1, 2, 3)]
+
+    events = invoke({"mode": "batch", "items": items, "challenges": challenges,
+                     "route_engine": "local", "guide": False, "stream": True})
+
+    assert sorted(e["index"] for e in events if e["type"] == "batch_item") == [0, 1, 2]
+    assert events[-1]["type"] == "result"
+
+
+def test_invalid_items_fail_on_their_own(challenges):
+    items = ["3 hours food", {"id": "bad", "preferences": {"interests": ["bogus"]}},
+             {"id": "ok", "preferences": {"available_time_hours": 2}}]
+
+    results = batch(challenges, items)["results"]
+
+    assert results[0]["metadata"] == {"error": "TypeError"}
+    assert results[1]["metadata"] == {"error": "ValidationError", "id": "bad"}
+    assert results[2]["route"] is not None
+
+
+def test_bad_batch_requests(challenges):
+    assert "error" in batch(challenges, [])["metadata"]
+    assert "error" in batch(challenges, "3 hours food")["metadata"]
+    assert "error" in batch([], [{"prompt": "food"}])["metadata"]
+    assert batch(challenges, [{"prompt": "food"}], concurrency="abc")["metadata"]["error"] == (
+        "concurrency must be an integer"
+    )
@@ -0,0 +1,87 @@
+import os
+import time
+
+import cache as cache_module
+from cache import TTLCache, catalog_fingerprint, normalize_preferences, route_cache_key
+from speculation import same_route_inputs
+
+
+def test_routes_are_not_shared_across_time_budgets():
+    longer = route_cache_key({"available_time_hours": 3.2}, "fp", "local")
+
+    assert route_cache_key({"available_time_hours": 2.76}, "fp", "local") != longer
+    assert route_cache_key({"available_time_hours": 3}, "fp", "local") != longer
+    assert not same_route_inputs({"available_time_hours": 3.2}, {"available_time_hours": 3})
+
+
+def test_normalized_preferences():
+    prefs = {"available_time_hours": "3", "interests": ["Photo", "food ", "photo"],
+             "difficulty_preference": " Easy", "special_requests": "With  KIDS", "group_size": 4}
+
+    assert normalize_preferences(prefs) == {
+        "available_time_hours": 3.0,
+        "interests": ["food", "photo"],
+        "difficulty_preference": "easy",
+        "special_requests": "with kids",
+    }
+    assert normalize_preferences({"available_time_hours": "soon"})["available_time_hours"] == 4.0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75, "entries": 2}
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=8, ttl_seconds=60)
+    cache.set("a", 1)
+
+    now[0] += 59
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    route = {"challenges": [{"title": "Star Ferry Sunset"}], "total_duration": "01:00:00"}
+    TTLCache(max_entries=8, ttl_seconds=60, disk_dir=str(tmp_path)).set("key", route)
+
+    restarted = TTLCache(max_entries=8, ttl_seconds=60, disk_dir=str(tmp_path))
+
+    assert restarted.get("key") == route
+    assert restarted.stats()["entries"] == 1  # promoted to memory
+    assert restarted.get("other") is None
+
+
+def test_expired_and_corrupt_disk_entries_are_misses(tmp_path):
+    cache = TTLCache(max_entries=8, ttl_seconds=60, disk_dir=str(tmp_path))
+    cache.set("old", 1)
+    cache.set("bad", 2)
+    old, bad = cache._disk_path("old"), cache._disk_path("bad")
+    os.utime(old, (time.time() - 120, time.time() - 120))
+    bad.write_text("{not json")
+
+    restarted = TTLCache(max_entries=8, ttl_seconds=60, disk_dir=str(tmp_path))
+
+    assert restarted.get("old") is None
+    assert not old.exists()
+    assert restarted.get("bad") is None
+
+
+def test_fingerprint_ignores_fields_that_do_not_shape_a_route(challenges):
+    churned = [dict(c, joined_people=["usr_z"], description="new") for c in challenges]
+    rescored = [dict(challenges[0], score=1.0)] + challenges[1:]
+
+    assert catalog_fingerprint(churned) == catalog_fingerprint(challenges)
+    assert catalog_fingerprint(list(reversed(challenges))) == catalog_fingerprint(challenges)
+    assert catalog_fingerprint(rescored) != catalog_fingerprint(challenges)
@@ -0,0 +1,49 @@
+from candidates import COMPACT_COLUMNS, prune_candidates, serialize_compact
+from catalog import ChallengeCatalog
+
+from .conftest import make_challenge
+
+
+def ids(candidates) -> list[str]:
+    return [cand.challenge["chlgID"] for cand in candidates]
+
+
+def test_small_catalogs_are_kept_whole(catalog):
+    assert len(prune_candidates({"available_time_hours": 3}, catalog)) == len(catalog)
+
+
+def test_candidates_that_cannot_fit_are_dropped():
+    catalog = ChallengeCatalog("v", [
+        make_challenge(1, "hiking", 22.25, 114.19, duration="05:00:00", score=9),
+        make_challenge(2, "food", 22.28, 114.16, duration="00:30:00", score=5),
+    ])
+
+    assert ids(prune_candidates({"available_time_hours": 2}, catalog)) == ["chlg_002"]
+    # Nothing fits: the agent still gets the closest matches.
+    assert ids(prune_candidates({"available_time_hours": 0.25}, catalog)) == ["chlg_001", "chlg_002"]
+
+
+def test_pruning_keeps_the_strongest_area_together():
+    strong = [make_challenge(i, "food", 22.281 + 0.001 * i, 114.151, score=9) for i in range(4)]
+    spread = [make_challenge(10 + i, "food", 22.2 + 0.05 * i, 113.95 + 0.05 * i, score=9.5 - i)
+              for i in range(6)]
+    catalog = ChallengeCatalog("v", strong + spread)
+
+    kept = prune_candidates({"available_time_hours": 4, "interests": ["food"]}, catalog, limit=5)
+
+    assert len(kept) == 5
+    assert {c["chlgID"] for c in strong} <= set(ids(kept))
+
+
+def test_serialize_compact():
+    challenge = make_challenge(7, "food", 22.2814, 114.1581, score=8.5)
+    challenge.update(title="Dim Sum | Tea", joined_people=["a", "b"])
+    candidates = prune_candidates({"available_time_hours": 4}, ChallengeCatalog("v", [challenge]))
+
+    header, row = serialize_compact(candidates).splitlines()
+
+    assert header.split(" | ") == list(COMPACT_COLUMNS)
+    assert row.split(" | ") == [
+        "chlg_007", "Dim Sum / Tea", "food", "easy", "01:00:00", "22.2814,114.1581",
+        "Central", "8.5", "2",
+    ]
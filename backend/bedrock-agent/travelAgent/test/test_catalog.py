@@ -0,0 +1,98 @@
+import json
+
+from catalog import CatalogStore, ChallengeCatalog, catalog_content_hash
+
+from .conftest import invoke, make_challenge
+
+
+def test_full_list_is_stored_under_its_version(challenges):
+    store = CatalogStore()
+
+    catalog, missed = store.resolve({"challenges": challenges, "catalog_version": "v1"})
+
+    assert missed is None
+    assert catalog.version == "v1"
+    assert store.resolve({"catalog_version": "v1"}) == (catalog, None)
+
+
+def test_version_defaults_to_the_content_hash(challenges):
+    store = CatalogStore()
+
+    catalog = store.put(challenges)
+
+    assert catalog.version == catalog_content_hash(challenges)
+    assert catalog_content_hash(list(reversed(challenges))) == catalog.version
+
+
+def test_resending_the_same_list_reuses_the_catalog(challenges):
+    store = CatalogStore()
+    first = store.put(challenges, "v1")
+    first.travel  # built lazily; must survive the resend
+
+    again = store.put([dict(c) for c in challenges], "v1")
+    changed = store.put(challenges[1:], "v1")
+
+    assert again is first
+    assert changed is not first
+    assert len(changed) == len(challenges) - 1
+    assert store.get("v1") is changed
+
+
+def test_unknown_version_is_a_miss():
+    store = CatalogStore()
+
+    assert store.resolve({"catalog_version": "nope"}) == (None, "nope")
+    assert store.resolve({}) == (None, None)
+
+
+def test_delta_against_a_known_base(challenges):
+    store = CatalogStore()
+    store.put(challenges, "v1")
+    changed = dict(challenges[1], score=0.5)
+    added = make_challenge(42, "food", 22.3, 114.17)
+
+    catalog, missed = store.resolve({"catalog_delta": {
+        "base_version": "v1", "version": "v2",
+        "added": [added], "changed": [changed], "removed": ["chlg_000"],
+    }})
+
+    assert missed is None
+    assert catalog.version == "v2"
+    assert set(catalog.by_id) == {c["chlgID"] for c in challenges[1:]} | {"chlg_042"}
+    assert catalog.by_id["chlg_001"]["score"] == 0.5
+    assert store.get("v1").by_id["chlg_000"]  # the base is left as it was
+
+
+def test_delta_against_an_unknown_base_is_a_miss(challenges):
+    store = CatalogStore()
+
+    assert store.resolve({"catalog_delta": {"base_version": "v0", "added": challenges}}) == (
+        None, "v0",
+    )
+
+
+def test_least_recently_used_versions_are_evicted(challenges):
+    store = CatalogStore(max_versions=2)
+    store.put(challenges, "v1")
+    store.put(challenges[:5], "v2")
+    store.get("v1")
+    store.put(challenges[:3], "v3")
+
+    assert store.get("v2") is None
+    assert store.get("v1") is not None
+    assert store.get("v3") is not None
+
+
+def test_catalog_indexes(challenges):
+    catalog = ChallengeCatalog("v", challenges)
+
+    assert [c["chlgID"] for c in catalog.by_score][:2] == ["chlg_000", "chlg_001"]
+    assert [c["chlgID"] for c in catalog.of_types({"food"})] == ["chlg_000", "chlg_005"]
+    assert catalog.durations["chlg_003"] == 1800
+    assert catalog.by_difficulty["easy"] == catalog.by_score
+
+
+def test_entrypoint_asks_for_the_full_list_on_a_miss():
+    result = json.loads(invoke({"prompt": "3 hours of food", "catalog_version": "gone"})[-1])
+
+    assert result["metadata"] == {"catalog_miss": True, "catalog_version": "gone"}
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from deadline import STAGE_SHARES, Deadline, StageTimeout
+
+
+def test_later_stages_keep_their_share():
+    deadline = Deadline(10)
+
+    assert deadline.stage_timeout("planner") == pytest.approx(10 * STAGE_SHARES["planner"], abs=0.05)
+    assert deadline.stage_timeout("route") == pytest.approx(
+        10 * (STAGE_SHARES["planner"] + STAGE_SHARES["route"]), abs=0.05
+    )
+    assert deadline.stage_timeout("guide") == pytest.approx(10, abs=0.05)
+
+
+def test_from_payload():
+    assert Deadline.from_payload({"latency_budget_ms": 2500}).budget == 2.5
+    assert Deadline.from_payload({"latency_budget_ms": "soon"}).budget == Deadline().budget
+    assert Deadline.from_payload({}).budget == Deadline().budget
+
+
+def test_degrade_records_each_stage_once():
+    deadline = Deadline(1)
+
+    deadline.degrade("planner")
+    deadline.degrade("planner")
+    deadline.degrade("route")
+
+    assert deadline.degraded == ["planner", "route"]
+
+
+def test_run_returns_within_the_budget():
+    async def stage():
+        await asyncio.sleep(0)
+        return "done"
+
+    assert asyncio.run(Deadline(1).run("guide", stage())) == "done"
+
+
+def test_run_raises_stage_timeout():
+    async def main():
+        with pytest.raises(StageTimeout) as raised:
+            await Deadline(0.05).run("guide", asyncio.sleep(1))
+        return raised.value
+
+    assert asyncio.run(main()).stage == "guide"
+
+
+def test_run_with_no_time_left_closes_the_awaitable():
+    async def main():
+        deadline = Deadline(0)
+        stage = asyncio.sleep(1)
+        with pytest.raises(StageTimeout):
+            await deadline.run("planner", stage)
+        return stage
+
+    assert asyncio.run(main()).cr_frame is None  # closed, never awaited
+
+
+def test_iterate_yields_until_the_timeout_and_cancels():
+    cancelled = []
+
+    async def ticks():
+        try:
+            for i in range(100):
+                yield i
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        seen = []
+        with pytest.raises(StageTimeout):
+            async for i in Deadline(0.05).iterate("guide", ticks()):
+                seen.append(i)
+        await asyncio.sleep(0)
+        return seen
+
+    seen = asyncio.run(main())
+    assert 0 < len(seen) < 100
+    assert cancelled == [True]
+
+
+def test_iterate_reraises_the_generator_error():
+    async def broken():
+        yield 1
+        raise ValueError("bad chunk")
+
+    async def main():
+        return [i async for i in Deadline(1).iterate("guide", broken())]
+
+    with pytest.raises(ValueError, match="bad chunk"):
+        asyncio.run(main())
@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+import pytest
+
+from distance import DistanceMatrix
+from geo import GeoPoint
+
+STAR_FERRY = GeoPoint(22.2936, 114.1686)
+MAN_MO = GeoPoint(22.2840, 114.1503)
+
+
+@pytest.fixture
+def points() -> dict[str, GeoPoint]:
+    rng = random.Random(3)
+    points = {f"c{i}": GeoPoint(22.2 + rng.random() * 0.2, 114.0 + rng.random() * 0.3)
+              for i in range(50)}
+    points.update(ferry=STAR_FERRY, temple=MAN_MO)
+    return points
+
+
+def test_known_distance(points):
+    matrix = DistanceMatrix(points)
+
+    assert matrix.km("ferry", "temple") == pytest.approx(2.17, abs=0.01)
+    assert matrix.km("ferry", "ferry") == 0.0
+
+
+def test_dense_matrix_is_symmetric(points):
+    matrix = DistanceMatrix(points)
+
+    assert matrix.dense.shape == (52, 52)
+    assert matrix.dense.dtype == np.float32
+    np.testing.assert_allclose(matrix.dense, matrix.dense.T)
+
+
+def test_on_demand_rows_match_the_dense_matrix(points):
+    dense = DistanceMatrix(points)
+    lazy = DistanceMatrix(points, max_dense=10, row_cache_size=4)
+    ids = ["c3", "temple", "c7", "ferry"]
+
+    assert lazy.dense is None
+    for a in points:
+        np.testing.assert_allclose(lazy.row(a), dense.row(a), rtol=1e-6)
+    assert len(lazy._rows) == 4
+    np.testing.assert_allclose(lazy.submatrix(ids), dense.submatrix(ids), rtol=1e-6)
+    assert lazy.km("c3", "temple") == pytest.approx(dense.km("c3", "temple"))
+
+
+def test_distances_from_a_point(points):
+    matrix = DistanceMatrix(points)
+
+    row = matrix.distances_from(STAR_FERRY)
+
+    np.testing.assert_allclose(row, matrix.row("ferry"), atol=1e-6)
+
+
+@pytest.mark.parametrize("max_dense", [4000, 10])
+def test_nearest(points, max_dense):
+    matrix = DistanceMatrix(points, max_dense=max_dense)
+    expected = sorted((d, i) for i, d in zip(matrix.ids, matrix.row("ferry").tolist()) if i != "ferry")
+
+    nearest = matrix.nearest("ferry", k=4)
+
+    assert [i for i, _ in nearest] == [i for _, i in expected[:4]]
+    assert matrix.nearest(STAR_FERRY, k=1) == [("ferry", 0.0)]
+    assert all(km <= 2.0 for _, km in matrix.nearest("ferry", k=50, max_km=2.0))
+    assert len(matrix.nearest("ferry", k=100)) == 51
+    assert matrix.nearest("ferry", k=0) == []
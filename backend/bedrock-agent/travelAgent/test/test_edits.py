@@ -0,0 +1,117 @@
+import pytest
+
+from catalog import ChallengeCatalog
+from edits import (
+    ADD,
+    FIRST,
+    LAST,
+    OPTIMIZE,
+    REMOVE,
+    REORDER,
+    REPLACE,
+    REVERSE,
+    TRIM,
+    RouteEdit,
+    parse_edit,
+)
+from records import PlannedRoute, RouteStop
+from routing import edit_route
+
+
+def planned(catalog, ids) -> PlannedRoute:
+    travel = catalog.travel.seconds_matrix(ids)
+    return PlannedRoute([RouteStop.from_catalog(catalog, i) for i in ids],
+                        sum(int(travel[k, k + 1]) for k in range(len(ids) - 1)))
+
+
+@pytest.fixture
+def route(catalog):
+    # Food Spot 0, Photo Spot 1, Culture Spot 2, Hiking Spot 3
+    return planned(catalog, ["chlg_000", "chlg_001", "chlg_002", "chlg_003"])
+
+
+@pytest.mark.parametrize("message, kind, fields", [
+    ("drop the last stop", REMOVE, {"index": 3}),
+    ("skip the culture spot", REMOVE, {"index": 2}),
+    ("remove stop 2", REMOVE, {"index": 1}),
+    ("swap the hiking for some food", REPLACE, {"index": 3, "interests": ["food"]}),
+    ("skip the photo spot and add a culture stop", REPLACE, {"index": 1, "interests": ["culture"]}),
+    ("start with the hiking spot", REORDER, {"index": 3, "position": FIRST}),
+    ("save the food spot for last", REORDER, {"index": 0, "position": LAST}),
+    ("reverse the order", REORDER, {"position": REVERSE}),
+    ("reorder for less walking", REORDER, {"position": OPTIMIZE}),
+    ("add a nightlife stop", ADD, {"interests": ["nightlife"], "count": 1}),
+    ("I have 2 more hours", ADD, {"extra_seconds": 7200, "count": 0}),
+    ("I only have 1 hour now", TRIM, {"budget_seconds": 3600}),
+])
+def test_parse_edit(route, message, kind, fields):
+    edit = parse_edit(message, route)
+
+    assert edit is not None
+    assert edit.kind == kind
+    for name, value in fields.items():
+        assert getattr(edit, name) == value
+
+
+@pytest.mark.parametrize("message", [
+    "tell me more about it",
+    "drop the museum",  # no such stop
+])
+def test_parse_edit_unclear(route, message):
+    assert parse_edit(message, route) is None
+
+
+def titles(route):
+    return [stop.title for stop in route.challenges]
+
+
+def test_edit_route_remove(route, catalog):
+    edited = edit_route(route, RouteEdit(REMOVE, 1), catalog)
+
+    assert titles(edited) == ["Food Spot 0", "Culture Spot 2", "Hiking Spot 3"]
+    assert edited.travel_seconds < route.travel_seconds
+
+
+def test_edit_route_reorder(route, catalog):
+    edited = edit_route(route, RouteEdit(REORDER, 3, FIRST), catalog)
+
+    assert titles(edited) == ["Hiking Spot 3", "Food Spot 0", "Photo Spot 1", "Culture Spot 2"]
+    assert edited.challenges[1].reason == route.challenges[0].reason
+
+
+def test_edit_route_replace_keeps_the_other_stops(route, catalog):
+    edited = edit_route(route, RouteEdit(REPLACE, 3, interests=["food"]), catalog)
+
+    assert titles(edited)[:3] == titles(route)[:3]
+    assert edited.challenges[3].type == "food"
+    assert edited.challenges[3].chlgID not in {stop.chlgID for stop in route.challenges}
+
+
+def test_edit_route_add_within_extra_time(route, catalog):
+    edited = edit_route(route, RouteEdit(ADD, interests=["nightlife"]), catalog)
+
+    assert len(edited.challenges) == len(route.challenges) + 1
+    assert [s for s in edited.challenges if s.type == "nightlife"]
+
+
+def test_edit_route_trim_to_budget(route, catalog):
+    edited = edit_route(route, RouteEdit(TRIM, budget_seconds=3600), catalog)
+
+    assert edited.duration_seconds + edited.travel_seconds <= 3600
+    assert set(titles(edited)) < set(titles(route))
+
+
+def test_budget_that_matches_the_route_keeps_it(route, catalog):
+    hours = (route.duration_seconds + route.travel_seconds) / 3600
+
+    edit = parse_edit(f"I only have {hours} hours", route)
+    edited = edit_route(route, edit, catalog)
+
+    assert edit.kind == TRIM
+    assert titles(edited) == titles(route)
+
+
+def test_edit_route_needs_the_stops_in_the_catalog(route, challenges):
+    other = ChallengeCatalog("other", challenges[4:])
+
+    assert edit_route(route, RouteEdit(REMOVE, 0), other) is None
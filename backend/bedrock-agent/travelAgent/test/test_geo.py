@@ -0,0 +1,52 @@
+import pytest
+
+from geo import GeoPoint, challenge_point, parse_coordinate, parse_point
+
+
+@pytest.mark.parametrize("coord, degrees", [
+    ("22.293° N", 22.293),
+    ("114.168° E", 114.168),
+    ("33.868° S", -33.868),
+    ("0.127° W", -0.127),
+    ("22.293N", 22.293),
+    (" 43.7w ", -43.7),
+    ("-22.5", -22.5),
+    (114, 114.0),
+])
+def test_parse_coordinate(coord, degrees):
+    assert parse_coordinate(coord) == pytest.approx(degrees)
+
+
+def test_wire_round_trip_keeps_the_hemisphere():
+    sydney = GeoPoint(-33.8688, 151.2093)
+    london = GeoPoint(51.5072, -0.1276)
+
+    assert sydney.to_wire() == ["33.869° S", "151.209° E"]
+    assert london.to_wire(4) == ["51.5072° N", "0.1276° W"]
+    assert GeoPoint.from_wire(london.to_wire(4)) == london
+
+
+@pytest.mark.parametrize("challenge, point", [
+    ({"location": ["22.293° N", "114.168° E"]}, GeoPoint(22.293, 114.168)),
+    ({"location": [114.168, 22.293]}, GeoPoint(22.293, 114.168)),  # browser agent [lon, lat]
+    ({"latitude": 22.293, "longitude": 114.168}, GeoPoint(22.293, 114.168)),  # seed data
+    ({"location": ["somewhere", "else"]}, None),
+    ({"location": []}, None),
+    ({"title": "no location"}, None),
+])
+def test_challenge_point(challenge, point):
+    assert challenge_point(challenge) == point
+
+
+@pytest.mark.parametrize("value, point", [
+    ({"lat": 22.28, "lng": 114.16}, GeoPoint(22.28, 114.16)),
+    ({"lat": "22.28", "lng": "114.16"}, GeoPoint(22.28, 114.16)),
+    ({"latitude": 22.28, "longitude": 114.16}, GeoPoint(22.28, 114.16)),
+    (["22.28° N", "114.16° E"], GeoPoint(22.28, 114.16)),
+    ({"lat": 22.28}, None),
+    ([22.28, 114.16], None),
+    ("Central", None),
+    (None, None),
+])
+def test_parse_point(value, point):
+    assert parse_point(value) == point
@@ -0,0 +1,52 @@
+import pytest
+
+from intent import (
+    GREETING,
+    OFF_TOPIC,
+    PLAN,
+    ROUTE_EDIT,
+    ROUTE_QUESTION,
+    THANKS,
+    classify_intent,
+)
+
+ROUTE_TITLES = ["Star Ferry Sunset", "Man Mo Temple Seek", "Dim Sum Master"]
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("hi there", GREETING),
+    ("", GREETING),
+    ("thanks so much!", THANKS),
+    ("what's the weather tomorrow?", OFF_TOPIC),
+    ("write me a python script", OFF_TOPIC),
+    ("3 hours of food and photos", PLAN),
+    ("what can I do near Central?", PLAN),
+    ("hmm", PLAN),
+])
+def test_without_a_route(message, intent):
+    assert classify_intent(message) == intent
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("how long is the second stop?", ROUTE_QUESTION),
+    ("Is Man Mo Temple Seek open on Sundays?", ROUTE_QUESTION),
+    ("how do I get between the stops?", ROUTE_QUESTION),
+    ("drop the last stop", ROUTE_EDIT),
+    ("swap the dim sum for something near Central", ROUTE_EDIT),
+    ("I have 2 more hours", ROUTE_EDIT),
+    ("is there any extra cost at the second stop?", ROUTE_QUESTION),
+    ("How long does it take to move between stops?", ROUTE_QUESTION),
+    ("can you add a food stop?", ROUTE_EDIT),
+    ("could we start with the temple?", ROUTE_EDIT),
+    ("can we move the second stop to the end?", ROUTE_EDIT),
+    ("can I get an extra hour at the second stop?", ROUTE_EDIT),
+    ("what if I only have 2 hours?", ROUTE_EDIT),
+    ("plan a new route for tomorrow with hiking", PLAN),
+])
+def test_with_a_route(message, intent):
+    assert classify_intent(message, ROUTE_TITLES) == intent
+
+
+def test_route_messages_need_a_route():
+    assert classify_intent("drop the last stop") == PLAN
+    assert classify_intent("how long is the second stop?") == PLAN
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+import jsonstream
+from jsonstream import JsonStreamParser, first_json
+
+
+def chunks(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_value_split_across_chunks(size):
+    text = 'Sure! Here is the plan:\n```json\n{"stops": [{"id": "a"}, {"id": "b"}], "n": 2}\n```\nEnjoy!'
+    parser = JsonStreamParser()
+
+    values = [parser.feed(chunk) for chunk in chunks(text, size)]
+
+    assert parser.done
+    assert parser.value == {"stops": [{"id": "a"}, {"id": "b"}], "n": 2}
+    assert values[-1] == parser.value
+
+
+def test_done_as_soon_as_the_value_closes():
+    parser = JsonStreamParser()
+
+    assert parser.feed('{"a": [1, 2') is None
+    assert parser.feed("]}") == {"a": [1, 2]}
+    assert parser.done
+    parser.feed('{"b": 1}')
+    assert parser.value == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize("size", [1, 4, 1000])
+def test_brackets_and_escaped_quotes_inside_strings(size):
+    text = r'{"reason": "a \"quoted\" {brace} [and] \\", "ok": true} trailing }'
+
+    assert first_json(chunks(text, size)) == {"reason": 'a "quoted" {brace} [and] \\', "ok": True}
+
+
+def test_escape_split_from_the_quote():
+    assert first_json(['{"a": "x\\', '"y"}']) == {"a": 'x"y'}
+
+
+def test_invalid_span_is_skipped():
+    assert first_json('Options {not json} then {"a": 1}') == {"a": 1}
+
+
+def test_value_nested_in_a_rejected_span():
+    assert first_json('{prose {"a": 1} more}') == {"a": 1}
+
+
+def test_rejected_by_accept():
+    text = '{"kind": "draft"} {"kind": "final", "stops": []}'
+
+    assert first_json(text, accept=lambda v: v.get("kind") == "final") == {
+        "kind": "final", "stops": [],
+    }
+
+
+def test_openers_limit_the_value_type():
+    assert first_json('[1, 2] {"a": 1}', openers="{") == {"a": 1}
+    assert first_json('[1, 2] {"a": 1}') == [1, 2]
+
+
+def test_incomplete_value():
+    parser = JsonStreamParser()
+
+    parser.feed('{"a": [1, 2')
+
+    assert not parser.done
+    assert parser.value is None
+    assert first_json("no json here") is None
+
+
+@pytest.mark.parametrize("service", ["browser-agent", "photo-verification"])
+def test_vendored_copies_match(service):
+    source = Path(jsonstream.__file__)
+    copy = source.resolve().parents[3] / service / "jsonstream.py"
+
+    assert copy.read_text() == source.read_text()
@@ -0,0 +1,69 @@
+import pytest
+
+from preferences import DEFAULT_HOURS, DEFAULT_INTERESTS, extract_preferences, mentioned_hours
+
+
+@pytest.mark.parametrize("message, hours", [
+    ("3 hours, food and photos", 3),
+    ("2h of culture", 2),
+    ("about 1.5 hrs", 1.5),
+    ("two and a half hours of hiking", 2.5),
+    ("half an hour near Central", 0.5),
+    ("half-hour photo stop", 0.5),
+    ("90 minutes of food", 1.5),
+    ("2 hours and 30 minutes", 2.5),
+    ("1 hour 15 mins of photos", 1.25),
+    ("i have a couple of hours", 2),
+    ("a whole day out", 8),
+    ("something for this afternoon", 3),
+])
+def test_hours(message, hours):
+    assert extract_preferences(message)[0]["available_time_hours"] == hours
+
+
+def test_an_h_word_is_not_an_hour():
+    assert mentioned_hours("an hiking trip") is None
+
+
+def test_formulaic_request_is_confident():
+    prefs, confidence = extract_preferences("3 hours, food and photos, nothing too hard")
+
+    assert prefs["interests"] == ["food", "photo"]
+    assert prefs["difficulty_preference"] == "easy"
+    assert confidence >= 0.9
+
+
+def test_group_and_special_requests():
+    prefs, _ = extract_preferences("We're 4 friends on a budget, with kids")
+
+    assert prefs["group_size"] == 4
+    assert prefs["special_requests"] == "with kids, family-friendly, budget"
+
+
+@pytest.mark.parametrize("message, group_size, special_requests", [
+    ("me and 3 friends, 4 hours", 4, ""),
+    ("me and my 2 kids", 3, ""),
+    ("i have a couple of hours", 1, ""),
+    ("a couple of friends and i", 2, ""),
+    ("for me and my partner", 2, "couple"),
+])
+def test_group_size(message, group_size, special_requests):
+    prefs, _ = extract_preferences(message)
+
+    assert prefs["group_size"] == group_size
+    assert prefs["special_requests"] == special_requests
+
+
+def test_defaults_and_low_confidence_for_vague_messages():
+    prefs, confidence = extract_preferences("surprise me")
+
+    assert prefs["available_time_hours"] == DEFAULT_HOURS
+    assert prefs["interests"] == DEFAULT_INTERESTS
+    assert confidence == 0
+
+
+def test_negation_lowers_confidence():
+    _, plain = extract_preferences("3 hours of hiking")
+    _, negated = extract_preferences("3 hours, no hiking")
+
+    assert negated < plain
@@ -0,0 +1,78 @@
+from catalog import ChallengeCatalog
+from edits import REMOVE, RouteEdit
+from models import Route
+from routing import MAX_STOPS, edit_route, solve_route
+
+from .conftest import make_challenge
+
+
+def test_solve_route_fits_the_time_budget(catalog):
+    route = solve_route({"available_time_hours": 2, "interests": []}, catalog)
+
+    assert route is not None
+    assert route.duration_seconds + route.travel_seconds <= 2 * 3600
+    assert len({stop.chlgID for stop in route.challenges}) == len(route.challenges)
+
+
+def test_solve_route_prefers_the_requested_interests(catalog):
+    route = solve_route({"available_time_hours": 3, "interests": ["food", "photo"]}, catalog)
+
+    assert route.challenges
+    assert {stop.type for stop in route.challenges} <= {"food", "photo"}
+
+
+def test_solve_route_stops_at_max_stops():
+    catalog = ChallengeCatalog("many", [
+        make_challenge(i, "food", 22.28, 114.16 + 0.0001 * i, duration="00:10:00")
+        for i in range(20)
+    ])
+
+    route = solve_route({"available_time_hours": 12, "interests": ["food"]}, catalog)
+
+    assert len(route.challenges) == MAX_STOPS
+
+
+def test_solve_route_falls_back_to_the_best_single_stop():
+    catalog = ChallengeCatalog("long", [
+        make_challenge(1, "hiking", 22.25, 114.19, duration="05:00:00", score=6),
+        make_challenge(2, "hiking", 22.26, 114.20, duration="06:00:00", score=9),
+    ])
+
+    route = solve_route({"available_time_hours": 1, "interests": ["hiking"]}, catalog)
+
+    assert [stop.chlgID for stop in route.challenges] == ["chlg_002"]
+    assert route.travel_seconds == 0
+
+
+def test_solve_route_without_routable_challenges():
+    challenge = make_challenge(1, "food", 22.28, 114.16)
+    challenge["location"] = ["somewhere", "else"]
+
+    assert solve_route({"available_time_hours": 2}, ChallengeCatalog("bad", [challenge])) is None
+
+
+def test_mixed_location_formats_route_to_wire_strings():
+    import main
+
+    seed = make_challenge(1, "food", 22.28, 114.16)
+    del seed["location"], seed["expected_duration"]
+    seed.update(latitude=22.2812, longitude=114.1589)
+    browser = make_challenge(2, "food", 22.29, 114.17)
+    browser["location"] = [114.1722, 22.2934]  # [lon, lat]
+    wire = make_challenge(3, "food", 22.30, 114.17)
+    catalog = ChallengeCatalog("mixed", [seed, browser, wire])
+    prefs = {"available_time_hours": 4, "interests": ["food"]}
+
+    route = solve_route(prefs, catalog)
+    edited = edit_route(route, RouteEdit(REMOVE, 0), catalog)
+    fallback = main.build_fallback_route(prefs, catalog)
+
+    for planned in (route, edited, fallback):
+        Route.model_validate(planned.to_wire())
+    locations = {stop.chlgID: stop.location for stop in route.challenges}
+    assert locations == {
+        "chlg_001": ["22.281° N", "114.159° E"],
+        "chlg_002": ["22.293° N", "114.172° E"],
+        "chlg_003": wire["location"],
+    }
+    assert next(s for s in route.challenges if s.chlgID == "chlg_001").expected_duration == "01:00:00"
@@ -0,0 +1,91 @@
+import sessions
+from sessions import ROUTE_PREFIX, USER_PREFIX, Session, compact_summary, is_pinned
+
+ROUTE = {"challenges": [{"title": f"Stop {i}"} for i in range(4)]}
+
+
+def test_recent_turns_stay_verbatim(monkeypatch):
+    monkeypatch.setattr(sessions, "SESSION_RECENT_TURNS", 4)
+    session = Session("s")
+
+    for i in range(6):
+        session.add("user" if i % 2 == 0 else "assistant", f"turn {i}")
+
+    assert session.folded == 2
+    assert session.summary == "User: turn 0\nGuide: turn 1"
+    context = session.context()
+    assert context[0] == {"role": "summary", "content": session.summary}
+    assert [h["content"] for h in context[1:]] == ["turn 2", "turn 3", "turn 4", "turn 5"]
+
+
+def test_fold_keeps_the_opening_constraints(monkeypatch):
+    monkeypatch.setattr(sessions, "SESSION_RECENT_TURNS", 2)
+    monkeypatch.setattr(sessions, "SESSION_SUMMARY_CHARS", 600)
+    session = Session("s")
+    session.add("user", "We're vegetarian and travelling with two kids, plan us an afternoon")
+    session.add("assistant", "Here you go!", ROUTE)
+    session.add("user", "I love street food and photos")
+
+    for i in range(30):
+        session.add("assistant", "Great question! The stop is lovely at night. More text.",
+                    ROUTE if i % 5 == 0 else None)
+        session.add("user", f"What is the history of place {i}? Tell me about the views there.")
+
+    lines = session.summary.splitlines()
+    assert len(session.summary) <= 600
+    assert lines[0].startswith("User: We're vegetarian and travelling with two kids")
+    assert "User: I love street food and photos" in lines
+    assert sum(line.startswith(ROUTE_PREFIX) for line in lines) == 1
+    assert not any(line.startswith("Guide: ") for line in lines)
+    assert session.last_route is ROUTE
+
+
+def test_is_pinned():
+    assert is_pinned("User: no hiking please, my knees")
+    assert is_pinned("User: 3 hours of food")
+    assert not is_pinned("User: what's the history of this temple?")
+    assert not is_pinned("Guide: we're vegetarian too")
+
+
+def test_compact_summary_clips_pinned_lines_and_keeps_the_first():
+    lines = [USER_PREFIX + f"no {i} " + "x" * 150 for i in range(10)]
+
+    compacted = compact_summary(lines, 300)
+
+    assert sum(len(line) + 1 for line in compacted) <= 300
+    assert compacted[0].startswith("User: no 0 ")
+    assert all(len(line) <= len(USER_PREFIX) + sessions.PINNED_CLAUSE_CHARS for line in compacted)
+
+
+def test_compact_summary_within_the_limit_is_unchanged():
+    lines = ["User: hi", "Guide: hello"]
+
+    assert compact_summary(lines, 100) is lines
+
+
+def test_store_round_trip(tmp_path):
+    store = sessions.SessionStore(db_path=str(tmp_path / "sessions.db"))
+    session = store.get("a")
+    session.add("user", "3 hours of food")
+    session.add("assistant", "Here you go!", ROUTE)
+    store.save(session)
+
+    restored = sessions.SessionStore(db_path=str(tmp_path / "sessions.db")).get("a")
+
+    assert restored.history == session.history
+    assert restored.last_route == ROUTE
+
+
+def test_store_expires_and_evicts():
+    store = sessions.SessionStore(max_sessions=2, ttl_seconds=60)
+    store.get("a").add("user", "hello")
+    store.get("b")
+    store.get("c")
+
+    assert len(store) == 2
+    assert store.get("a").turns == 0
+
+    old = store.get("b")
+    old.add("user", "hello")
+    old.updated -= 120
+    assert store.get("b").turns == 0
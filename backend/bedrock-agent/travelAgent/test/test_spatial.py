@@ -0,0 +1,97 @@
+import json
+import math
+import random
+
+import pytest
+
+from catalog import ChallengeCatalog
+from geo import GeoPoint
+from spatial import SpatialIndex
+
+from .conftest import invoke
+
+CENTRAL = GeoPoint(22.2819, 114.1589)
+
+
+def brute_force_km(a: GeoPoint, b: GeoPoint) -> float:
+    lat1, lat2 = math.radians(a.lat), math.radians(b.lat)
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(b.lng - a.lng) / 2) ** 2)
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+@pytest.fixture
+def points() -> dict[str, GeoPoint]:
+    rng = random.Random(7)
+    return {f"c{i}": GeoPoint(22.2 + rng.random() * 0.25, 113.95 + rng.random() * 0.35)
+            for i in range(400)}
+
+
+def test_within_matches_brute_force(points):
+    index = SpatialIndex(points)
+
+    for radius_km in (0.5, 2.0, 8.0):
+        expected = sorted((brute_force_km(CENTRAL, p), i) for i, p in points.items()
+                          if brute_force_km(CENTRAL, p) <= radius_km)
+        found = index.within(CENTRAL, radius_km)
+
+        assert [i for i, _ in found] == [i for _, i in expected]
+        assert [km for _, km in found] == pytest.approx([km for km, _ in expected], abs=1e-6)
+
+
+def test_within_limit_keeps_the_nearest(points):
+    index = SpatialIndex(points)
+
+    assert index.within(CENTRAL, 8.0, limit=5) == index.within(CENTRAL, 8.0)[:5]
+
+
+def test_nearest(points):
+    index = SpatialIndex(points)
+    expected = sorted(points, key=lambda i: brute_force_km(CENTRAL, points[i]))
+
+    assert [i for i, _ in index.nearest(CENTRAL, 7)] == expected[:7]
+    assert len(index.nearest(GeoPoint(0.0, 0.0), 3)) == 3  # far from every cell
+    assert index.nearest(CENTRAL, 0) == []
+    assert SpatialIndex({}).nearest(CENTRAL) == []
+
+
+def test_catalog_around(challenges):
+    catalog = ChallengeCatalog("test", challenges)
+    start = catalog.points["chlg_000"]
+
+    local = catalog.around(start, 0.7)
+
+    assert 0 < len(local) < len(catalog)
+    assert all(brute_force_km(start, p) <= 0.7 for p in local.points.values())
+    assert local.travel is catalog.travel
+
+
+def nearby(challenges, **payload) -> dict:
+    return json.loads(invoke({"mode": "nearby", "challenges": challenges, **payload})[-1])
+
+
+def test_nearby_mode(challenges):
+    result = nearby(challenges, near={"lat": 22.28, "lng": 114.16}, radius_km=1, limit=3)
+
+    found = result["metadata"]["nearby"]
+    assert [c["chlgID"] for c in found] == ["chlg_000", "chlg_001", "chlg_002"]
+    assert [c["distance_km"] for c in found] == sorted(c["distance_km"] for c in found)
+
+
+def test_nearby_mode_by_district_and_time(challenges):
+    challenges[1]["expected_duration"] = "02:00:00"
+
+    result = nearby(challenges, near="Central", available_minutes=45)
+
+    assert "chlg_001" not in [c["chlgID"] for c in result["metadata"]["nearby"]]
+
+
+@pytest.mark.parametrize("fields", [
+    {"radius_km": "far"},
+    {"limit": "many"},
+    {"available_minutes": "soon"},
+])
+def test_nearby_mode_rejects_bad_numbers(challenges, fields):
+    result = nearby(challenges, near="Central", **fields)
+
+    assert result["metadata"]["error"] == "invalid nearby parameters"
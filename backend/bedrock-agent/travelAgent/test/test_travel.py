@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from distance import DistanceMatrix
+from geo import GeoPoint
+from travel import (
+    MIN_HOP_SECONDS,
+    TRANSIT_OVERHEAD_SECONDS,
+    WALK_LIMIT_KM,
+    TravelTimeModel,
+    district_of,
+    estimate_travel_seconds,
+    find_district,
+    points_travel_seconds,
+)
+
+POINTS = {
+    "ferry": GeoPoint(22.2936, 114.1686),    # TST
+    "curry": GeoPoint(22.2965, 114.1722),    # TST
+    "tart": GeoPoint(22.2820, 114.1580),     # Central
+    "lantau": GeoPoint(22.2540, 113.9050),   # Lantau
+    "nowhere": GeoPoint(22.3700, 114.1100),  # no district
+    "nearby": GeoPoint(22.3705, 114.1110),   # no district
+}
+
+
+@pytest.fixture
+def model() -> TravelTimeModel:
+    return TravelTimeModel(POINTS, DistanceMatrix(POINTS))
+
+
+def test_estimate_walks_short_hops_and_rides_long_ones():
+    assert estimate_travel_seconds(0.0) == MIN_HOP_SECONDS
+    assert estimate_travel_seconds(1.0) == 800  # 1 km at 4.5 km/h
+    assert estimate_travel_seconds(WALK_LIMIT_KM + 0.01) > TRANSIT_OVERHEAD_SECONDS
+    assert estimate_travel_seconds(10.0) == TRANSIT_OVERHEAD_SECONDS + 1440
+
+
+def test_districts():
+    assert district_of(POINTS["ferry"]) == "TST"
+    assert district_of(POINTS["tart"]) == "Central"
+    assert district_of(POINTS["nowhere"]) is None
+    assert find_district("dragons back").name == "Dragon's Back"
+    assert find_district("SHAM-SHUI-PO").name == "Sham Shui Po"
+    assert find_district("Narnia") is None
+
+
+def test_known_district_links_override_distance(model):
+    assert model.seconds("ferry", "tart") == model.seconds("tart", "ferry") == 10 * 60
+    assert model.seconds("tart", "lantau") == 75 * 60
+    assert model.district("lantau") == "Lantau"
+
+
+def test_unlinked_hops_are_estimated_from_distance(model):
+    assert model.seconds("ferry", "curry") == estimate_travel_seconds(model.distances.km("ferry", "curry"))
+    assert model.seconds("nowhere", "nearby") == estimate_travel_seconds(
+        model.distances.km("nowhere", "nearby")
+    )
+
+
+def test_matrix_matches_pairwise_seconds(model):
+    ids = list(POINTS)
+
+    matrix = model.seconds_matrix(ids)
+
+    for i, a in enumerate(ids):
+        for j, b in enumerate(ids):
+            if a != b:
+                assert abs(int(matrix[i, j]) - model.seconds(a, b)) <= 1
+    np.testing.assert_array_equal(points_travel_seconds(list(POINTS.values())), matrix)
+
+
+def test_route_seconds_skips_unknown_stops(model):
+    assert model.route_seconds(["ferry", "gone", "tart", "lantau"]) == (
+        model.seconds("ferry", "tart") + model.seconds("tart", "lantau")
+    )
+    assert model.route_seconds(["ferry"]) == 0
@@ -1,6 +1,5 @@
 import os
 import sys
-import re
 import json
 import asyncio
 import logging
@@ -26,6 +25,9 @@ from strands_tools.browser import AgentCoreBrowser
 from bedrock_agentcore.tools.browser_client import BrowserClient as AgentCoreBrowserClient
 from playwright.async_api import Browser as PlaywrightBrowser
 
+# Vendored copy of the travel agent's extractor; see jsonstream.py.
+from jsonstream import first_json
+
 
 # ── Pydantic Models ──────────────────────────────────────────
 
@@ -200,33 +202,14 @@ End your response with ONLY the JSON object:
 
 def parse_challenges(text: str) -> DiscoveredChallenges:
     """Parse and validate challenges from agent response using Pydantic."""
-    # Strip markdown code fences if present
-    cleaned = re.sub(r'```(?:json)?\s*', '', text)
-    cleaned = cleaned.strip()
-
-    # Try to find JSON object with "challenges" key
-    start = cleaned.find('{"challenges"')
-    if start == -1:
-        start = cleaned.find('{')
-    end = cleaned.rfind('}') + 1
-
-    if start != -1 and end > start:
-        try:
-            raw = json.loads(cleaned[start:end])
-            if "challenges" in raw:
-                return DiscoveredChallenges.model_validate(raw)
-        except json.JSONDecodeError:
-            pass
-
-    # Fallback: try bare JSON array
-    start = cleaned.find('[')
-    end = cleaned.rfind(']') + 1
-    if start != -1 and end > start:
-        try:
-            raw = json.loads(cleaned[start:end])
-            return DiscoveredChallenges.model_validate({"challenges": raw})
-        except json.JSONDecodeError:
-            pass
+    raw = first_json(text, openers="{", accept=lambda v: "challenges" in v)
+    if raw is not None:
+        return DiscoveredChallenges.model_validate(raw)
+
+    # Fallback: a bare array of challenge objects
+    raw = first_json(text, openers="[", accept=lambda v: bool(v) and all(isinstance(c, dict) for c in v))
+    if raw is not None:
+        return DiscoveredChallenges.model_validate({"challenges": raw})
 
     raise ValueError("No valid JSON found in response")
 
@@ -22,6 +22,9 @@ from strands import Agent
 from strands.models.openai import OpenAIModel
 from strands_tools import image_reader
 
+# Vendored copy of the travel agent's extractor; see jsonstream.py.
+from jsonstream import first_json
+
 
 # ── Pydantic Models ──────────────────────────────────────────
 
@@ -63,13 +66,8 @@ No text after the JSON."""
 
 def parse_verification_result(text: str) -> VerificationResult:
     """Parse and validate verification result from agent response."""
-    cleaned = text.strip()
-
-    start = cleaned.rfind('{')
-    end = cleaned.rfind('}') + 1
-
-    if start != -1 and end > start:
-        raw = json.loads(cleaned[start:end])
+    raw = first_json(text, openers="{", accept=lambda v: "verified" in v)
+    if raw is not None:
         if "funFact" in raw and "fun_fact" not in raw:
             raw["fun_fact"] = raw.pop("funFact")
         return VerificationResult.model_validate(raw)